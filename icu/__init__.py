@@ -26,6 +26,8 @@ from . import component
 from . import highlight
 from . import process
 from . import generator
+from .bridge import Bridge
+from .broker import Broker # forwards events to many external sinks from a separate process
 from . import config as configuration
 
 __all__ = ('panel', 'system_monitor', 'constants', 'event', 'main_panel', 'tracking', 'fuel_monitor', 'process')
@@ -48,10 +50,10 @@ def get_event_sinks():
     return event.get_event_sinks()
 
 def get_external_event_sinks():
-    return event.GLOBAL_EVENT_CALLBACK.external_sinks
+    return event.session().bus.external_sinks
 
 def get_external_event_sources():
-    return event.GLOBAL_EVENT_CALLBACK.external_sources
+    return event.session().bus.external_sources
 
 def start(sinks=[], sources=[], **kwargs):
     """ Start ICU as a seperate process. 
@@ -75,7 +77,7 @@ def start(sinks=[], sources=[], **kwargs):
 #global config
 #config = None
 
-def run(shared=None, sinks=[], sources=[], config=None):
+def run(shared=None, sinks=[], sources=[], config=None, schedular='wheel', changes='delta', pool=False, profile=False, bridge=None, session=None, log='event_log.txt'):
     """ Starts the ICU system. Call blocks until the GUI is closed.
 
     Args:
@@ -83,12 +85,33 @@ def run(shared=None, sinks=[], sources=[], config=None):
         sinks (list, optional): A list of external sinks, used to receive events from the ICU system. Defaults to [].
         sources (list, optional): A list of external sources, used to send events to the ICU system. Defaults to [].
         config (str): Path of configuration file.
+        schedular (str, optional): event schedular backend (see event.SCHEDULARS). 'tk' runs in wall-clock time, 'wheel' is the same 
+            but drives all timers from a single tk tick, 'virtual' runs in virtual time as fast as possible until the 
+            configured shutdown time (the window is never shown, but the widgets are still built on a tk root so a display is 
+            required, e.g. run with xvfb-run on a server), 'asyncio' runs in an asyncio event loop that also processes tk events (see event.AsyncioSchedular). 
+            Defaults to 'wheel'.
+        changes (str, optional): how changes to component properties are published (see event.CHANGE_MODES). 'delta' publishes one 
+            'delta' event per frame with the latest values, 'every-write' publishes a 'change' event on every write. Defaults to 'delta'.
+        pool (bool, optional): reuse the events of high frequency event generators (see event.EventPool). Defaults to False.
+        profile (bool, optional): profile event dispatch, a table is printed at shutdown (see event.Profiler). Defaults to False.
+        bridge (str, optional): path of a Unix domain socket on which agents in other processes can connect to send and receive 
+            events (see bridge.Bridge). Defaults to None (no bridge).
+        session (event.Session, optional): the session that ICU runs in, it owns the event bus, schedular and components 
+            (see event.Session). Defaults to None (a new session that logs to `log`).
+        log (str, optional): event log file of a new session, None for no log. Defaults to 'event_log.txt'.
     """
     if config is None:
         config = os.path.join(os.path.split(__file__)[0], 'config.json')
     
     #global config # this is used in other places and needs to be accessible TODO fix it...
     config = SimpleNamespace(**configuration.load(config)) #load config file
+
+    if schedular == 'virtual' and config.shutdown <= 0:
+        raise ValueError("A virtual session must end, set 'shutdown' in the config.")
+
+    if session is None:
+        session = event.Session(log=log)
+    session.activate()
     
     #pprint(config.__dict__)
 
@@ -96,6 +119,7 @@ def run(shared=None, sinks=[], sources=[], config=None):
     window_properties = {}
                          
     eyetracker = None #prevent exit errors
+    server = None
 
     try:
      
@@ -133,21 +157,23 @@ def run(shared=None, sinks=[], sources=[], config=None):
                 self.root = root
                 event.EventCallback.register(self, "System")
                 if config.shutdown > 0:
-                    root.after(config.shutdown, self.shutdown)
+                    self.session.schedular.after(config.shutdown, self.shutdown)
                     
             def shutdown(self, *args, **kwargs): # WARNING -- GETS CALLED MULTIPLE TIME (sigterm etc)
                 #print("SHUTDOWN")
 
                 # subvert the usual scheduling mechanism (otherwise it wont trigger as root is destroyed...)
-                if not event.GLOBAL_EVENT_CALLBACK.is_closed: # shutdown has already been called...
+                if not self.session.bus.is_closed: # shutdown has already been called...
                     e = event.Event(self.name, "Global", label="system", command="shutdown")
-                    event.GLOBAL_EVENT_CALLBACK.trigger(e)
+                    self.session.bus.trigger(e)
 
                 if eyetracker is not None:
                     eyetracker.close() #close eye tracker if it was used
                 if shared is not None:
                     shared.release() #release shared process memory (if it was used)
-                event.close() #close all external sources/sink buffers
+                if server is not None:
+                    server.close() #disconnect bridge clients
+                self.session.close() #close all external sources/sink buffers
                 try: 
                     root.destroy()
                 except:
@@ -156,13 +182,18 @@ def run(shared=None, sinks=[], sources=[], config=None):
             def resize(self):
                 raise NotImplementedError("TODO - resize events") # TODO move from main_panel.resize?
         
+        event.event_schedular(schedular, root) #initial event schedular of the session
+        session.bus.changes = event.ChangeBuffer(mode=changes)
+        event.enable_event_pool(event.POOL_SIZE if pool else None)
+        session.bus.profile(profile)
+        if schedular == 'virtual':
+            root.withdraw() # the GUI is never shown (tk still needs a display)
+
         system = System(root, config) # system commands
 
         root.title("ICU")
         root.protocol("WM_DELETE_WINDOW", system.shutdown)
         root.geometry('%dx%d+%d+%d' % (config.screen_width, config.screen_height, config.screen_x, config.screen_y))
-  
-        event.tk_event_schedular(root) #initial global event schedular
          
         main = main_panel.MainPanel(root, width=config.screen_width, height=config.screen_height, background_colour=config.background_colour)
         root.bind("<Configure>", main.resize) #for resizing the window
@@ -260,6 +291,10 @@ def run(shared=None, sinks=[], sources=[], config=None):
         for source in sources:
             event.add_event_source(source)
 
+        if bridge is not None:
+            server = Bridge(bridge)
+            server.start()
+
         if shared is not None:
             # update shared memory
             shared.event_sinks = get_event_sinks()
@@ -288,7 +323,10 @@ def run(shared=None, sinks=[], sources=[], config=None):
             shared.release() # the parent process can now access attributes in shared memory
         
 
-        root.mainloop()
+        if schedular in ('virtual', 'asyncio'):
+            session.schedular.run() # until shutdown
+        else:
+            root.mainloop()
 
     except:
         traceback.print_exc()
@@ -304,13 +342,13 @@ def task_system_monitor(config):
     scales = system_monitor.Scale.all_components()
     for scale in scales:
         schedule = config.__dict__[scale]['schedule']
-        event.event_scheduler.schedule(generator.ScaleEventGenerator(scale), sleep=schedule)
+        event.session().schedular.schedule(generator.ScaleEventGenerator(scale), sleep=schedule, key=scale)
 
 
     warning_lights = system_monitor.WarningLight.all_components()
     for warning_light in warning_lights:
         schedule = config.__dict__[warning_light]['schedule']
-        event.event_scheduler.schedule(generator.WarningLightEventGenerator(warning_light), sleep=schedule)
+        event.session().schedular.schedule(generator.WarningLightEventGenerator(warning_light), sleep=schedule, key=warning_light)
         #print(scale, schedule)
 
 def task_tracking(config):
@@ -322,7 +360,7 @@ def task_tracking(config):
     targets = tracking.Tracking.all_components()
     for target in targets:
         schedule = config.__dict__[target]['schedule']
-        event.event_scheduler.schedule(generator.TargetEventGenerator(target, **config.__dict__[target]), sleep=schedule)
+        event.session().schedular.schedule(generator.TargetEventGenerator(target, **config.__dict__[target]), sleep=schedule, key=target)
 
 def task_fuel_monitor(config):
     """ Set up fuel monitoring task event scheduless
@@ -333,7 +371,7 @@ def task_fuel_monitor(config):
     pumps = fuel_monitor.Pump.all_components()
     for pump in pumps:
         schedule = config.__dict__[pump]['schedule']
-        event.event_scheduler.schedule(generator.PumpEventGenerator(pump, False), sleep=schedule)
+        event.session().schedular.schedule(generator.PumpEventGenerator(pump, False), sleep=schedule, key=pump)
 
 def pumps():
     return list(fuel_monitor.Pump.all_components())
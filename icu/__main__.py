@@ -2,6 +2,8 @@ import argparse
 import os
 
 from . import run
+from .event import SCHEDULARS, CHANGE_MODES
+from .bridge import BRIDGE_PATH
 
 DEFAULT_CONFIG_FILE = os.path.join(os.path.split(__file__)[0], 'config.json')
 
@@ -16,5 +18,20 @@ parser.add_argument('--config', '-c', metavar='C', action=PathAction, type=str,
         default= DEFAULT_CONFIG_FILE,
         help='path of the config file to use.')
 
+parser.add_argument('--schedular', '-s', choices=list(SCHEDULARS.keys()), default='wheel',
+        help='event schedular, virtual runs a session in virtual time until shutdown without showing the window (a display is still required), asyncio runs in an asyncio event loop.')
+
+parser.add_argument('--changes', choices=list(CHANGE_MODES), default='delta',
+        help='change notifications, delta publishes the latest values once per frame, every-write publishes every change (raw logging).')
+
+parser.add_argument('--pool', action='store_true',
+        help='reuse the events of high frequency event generators (burn, transfer, tracking, key hold).')
+
+parser.add_argument('--profile', action='store_true',
+        help='profile event dispatch, time spent in each sink, logging and external sinks is printed at shutdown.')
+
+parser.add_argument('--bridge', metavar='PATH', nargs='?', const=BRIDGE_PATH, default=None,
+        help='accept agent connections on a unix domain socket (default path {0}).'.format(BRIDGE_PATH))
+
 args = parser.parse_args()
 run(**args.__dict__)
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""
+    asyncio wrappers of external event sinks and sources. An agent can wait for events from many sinks at once
+    and send events to ICU without polling, e.g.
+
+        sink = icu.ExternalEventSink(wakeup=True)
+        source = icu.ExternalEventSource()
+        p, m = icu.start(sinks=[sink], sources=[source])
+
+        async def agent():
+            sender = AsyncEventSource(source)
+            async for event in AsyncEventSink(sink):
+                await sender.send('agent', 'Pump:AB', label='click')
+
+    The sink should be created with wakeup=True, otherwise it is checked every POLL seconds.
+"""
+import asyncio
+
+from collections import deque
+from queue import Full
+
+from .event import Event, encode
+
+POLL = 0.01      # seconds between checks of a sink without a wakeup, or between attempts to send to a full source
+SETTLE = 0.001   # seconds to wait for a signalled event that cannot be read yet (see multiprocessing.Queue)
+
+async def readable(fd):
+    """ Wait until a file descriptor is readable.
+
+    Args:
+        fd (int): file descriptor.
+
+    Raises:
+        NotImplementedError: if the running event loop cannot watch file descriptors (e.g. the proactor event loop on windows).
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    loop.add_reader(fd, lambda: future.done() or future.set_result(None))
+    try:
+        await future
+    finally:
+        loop.remove_reader(fd)
+
+class AsyncEventSink:
+    """
+        Receive events from an ExternalEventSink in a coroutine, use `async for event in sink` or await get/get_many.
+        A single coroutine should receive from the sink.
+    """
+
+    def __init__(self, sink):
+        super(AsyncEventSink, self).__init__()
+        self.sink = sink
+        self.__events = deque()
+        self.__watch = sink.wakeup is not None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+    async def get(self):
+        """ Wait for the next event.
+
+        Returns:
+            Event: the event.
+        """
+        if not self.__events:
+            self.__events.extend(await self.get_many())
+        return self.__events.popleft()
+
+    async def get_many(self, max_n=None):
+        """ Wait for events, all that are available are returned together.
+
+        Args:
+            max_n (int, optional): maximum number of events. Defaults to None (no limit).
+
+        Returns:
+            list: events in the order they were sent.
+        """
+        events = self.__events
+        if events:
+            n = len(events) if max_n is None else min(max_n, len(events))
+            return [events.popleft() for _ in range(n)]
+        sink = self.sink
+        while True:
+            received = sink.get_many(max_n=max_n, timeout=0)
+            if received:
+                return received
+            await self.__wait()
+
+    async def __wait(self):
+        wakeup = self.sink.wakeup
+        if not self.__watch:
+            return await asyncio.sleep(POLL)
+        if wakeup.consume() > 0: # signalled, the events were received already or are on their way
+            return await asyncio.sleep(SETTLE)
+        try:
+            await readable(wakeup.fileno())
+        except NotImplementedError:
+            self.__watch = False
+
+class AsyncEventSource:
+    """
+        Send events to ICU through an ExternalEventSource from a coroutine. If the source transport is full
+        (e.g. a RingBuffer) the coroutine waits for space rather than blocking the event loop.
+    """
+
+    def __init__(self, source):
+        super(AsyncEventSource, self).__init__()
+        self.source = source
+
+    async def send(self, src, dst, timestamp=None, monotonic=None, **data):
+        """ Send a new event to the ICU system (see ExternalEventSource.source).
+
+        Args:
+            src (str): the name of the source object (a unique ID)
+            dst (str): the name of the destination (sink) object (a unique ID).
+            timestamp (float, optional): seconds since the epoch (see time.time()). Defaults to the current time.
+            monotonic (int, optional): monotonic time (ns, see time.perf_counter_ns). Defaults to the current time.
+        """
+        await self.__send(encode(Event(src, dst, timestamp=timestamp, monotonic=monotonic, **data)))
+
+    async def send_many(self, events):
+        """ Send many new events to the ICU system as a single message (see ExternalEventSource.source_many).
+
+        Args:
+            events (iterable): the events, each a dict of the arguments to send, or an Event.
+        """
+        events = [e if isinstance(e, Event) else Event(**e) for e in events]
+        if events:
+            await self.__send(encode(events))
+
+    async def __send(self, payload):
+        while True:
+            try:
+                return self.source._send(payload, block=False)
+            except Full:
+                await asyncio.sleep(POLL)
+
+async def merge(*sinks):
+    """ Receive events from many sinks at once, in the order they arrive.
+
+        async for event in merge(sink1, sink2):
+            ...
+
+    Args:
+        sinks (ExternalEventSink, AsyncEventSink): sinks.
+
+    Yields:
+        Event: events.
+    """
+    queue = asyncio.Queue()
+    async def forward(sink):
+        try:
+            while True:
+                for event in await sink.get_many():
+                    queue.put_nowait(event)
+        except Exception as e: # raised by merge
+            queue.put_nowait(e)
+    sinks = [sink if isinstance(sink, AsyncEventSink) else AsyncEventSink(sink) for sink in sinks]
+    tasks = [asyncio.ensure_future(forward(sink)) for sink in sinks]
+    try:
+        while True:
+            event = await queue.get()
+            if isinstance(event, Exception):
+                raise event
+            yield event
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,453 @@
+"""
+    A compact binary event log, written in chunks by BinaryEventLogger (on the writer thread, see log.AsyncEventLogger)
+    and read by BinaryEventLog, which memory-maps the file and returns NumPy arrays without parsing any text. Text logs
+    (event_log.txt) can be converted with convert:
+
+        python -m icu.binlog event_log.txt event_log.icul
+
+    Each chunk stores its rows column by column (all integers are little-endian, columns are 8 byte aligned):
+
+        file      := magic:'ICUL' version:u16 reserved:u16 chunk*
+        chunk     := magic:'CHNK' rows:u32 size:u64 strings columns padding data
+        strings   := count:u32 (length:u16 utf-8)*      new strings, appended to the string table of previous chunks
+        columns   := count:u32 (name:u8+utf-8 type:u8 offset:u64 size:u64)*   offset from the start of the chunk
+
+    Columns are id (i64), timestamp (f64), monotonic (i64), src, dst, label, attr (u32 ids in the string table, NONE if
+    missing, a list of destinations is joined with ','), a column for each numeric data item (e.g. value, x, y, cause),
+    i64 if every value in the chunk is an int (INT_NONE if missing), f64 otherwise (NaN if missing), and extra, the rest
+    of the data of each row as JSON (u32 offsets followed by utf-8). A column may be missing from a chunk if no row of
+    the chunk has it.
+"""
+import re
+import ast
+import sys
+import json
+import mmap
+import struct
+
+from array import array
+
+from .log import AsyncEventLogger
+
+MAGIC = b'ICUL'
+VERSION = 2          # 1: numeric data columns are all f64
+CHUNK_ROWS = 1 << 16 # maximum rows in a chunk
+NONE = 0xFFFFFFFF    # string id of a missing string
+INT_NONE = -1 << 63  # missing value of an i64 data column
+
+TYPE_F64 = ord('d')
+TYPE_I64 = ord('q')
+TYPE_U32 = ord('I')
+TYPE_JSON = ord('J')
+
+COLUMNS = ('id', 'timestamp', 'monotonic', 'src', 'dst', 'label', 'attr', 'extra')
+STRING_COLUMNS = ('src', 'dst', 'label', 'attr')
+
+_HEADER = struct.Struct('<4sHH')
+_CHUNK = struct.Struct('<4sIQ')
+_COUNT = struct.Struct('<I')
+_STR = struct.Struct('<H')
+_COLUMN = struct.Struct('<BQQ')
+
+_DTYPES = {TYPE_F64 : '<f8', TYPE_I64 : '<i8', TYPE_U32 : '<u4'}
+
+def _align(n):
+    return (n + 7) & ~7
+
+def _bytes(column):
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column.tobytes()
+
+def _numeric(key, values):
+    # an i64 column if every value is an int (e.g. ids of causes), otherwise f64
+    if all(type(value) is int for value in values if value is not None):
+        return (key, TYPE_I64, _bytes(array('q', [INT_NONE if value is None else value for value in values])))
+    nan = float('nan')
+    return (key, TYPE_F64, _bytes(array('d', [nan if value is None else value for value in values])))
+
+class ChunkWriter:
+    """
+        Encodes records (name, timestamp, monotonic, src, dst, data) as chunks (see module doc), keeping the string
+        table of the chunks written so far.
+    """
+
+    def __init__(self):
+        super(ChunkWriter, self).__init__()
+        self.__strings = {} # str -> id
+
+    def header(self):
+        return _HEADER.pack(MAGIC, VERSION, 0)
+
+    def __intern(self, value, new):
+        if value is None:
+            return NONE
+        i = self.__strings.get(value)
+        if i is None:
+            i = self.__strings[value] = len(self.__strings)
+            new.append(value)
+        return i
+
+    def chunks(self, records):
+        """ Encode records as chunks of at most CHUNK_ROWS rows.
+
+        Returns:
+            list: chunks (bytes).
+        """
+        return [self.chunk(records[i:i + CHUNK_ROWS]) for i in range(0, len(records), CHUNK_ROWS)]
+
+    def chunk(self, records):
+        new = []
+        intern = self.__intern
+        ids, timestamps, monotonics = array('q'), array('d'), array('q')
+        src, dst, label, attr = array('I'), array('I'), array('I'), array('I')
+        numeric = {} # key -> values (None if missing)
+        offsets, extra = array('I', [0]), bytearray()
+        for i, (name, timestamp, monotonic, s, d, data) in enumerate(records):
+            ids.append(name)
+            timestamps.append(timestamp)
+            monotonics.append(monotonic or 0)
+            src.append(intern(str(s), new))
+            dst.append(intern(','.join(d) if isinstance(d, (list, tuple)) else str(d), new))
+            rest = {}
+            a = l = NONE
+            for key, value in data.items():
+                if key == 'label' and isinstance(value, str):
+                    l = intern(value, new)
+                elif key == 'attr' and isinstance(value, str):
+                    a = intern(value, new)
+                elif (type(value) is float or (type(value) is int and INT_NONE < value < -INT_NONE)) and key not in COLUMNS:
+                    column = numeric.get(key)
+                    if column is None:
+                        column = numeric[key] = [None] * i
+                    column.append(value)
+                else:
+                    rest[key] = value
+            label.append(l)
+            attr.append(a)
+            for column in numeric.values():
+                if len(column) == i:
+                    column.append(None)
+            if rest:
+                extra += json.dumps(rest, separators=(',', ':'), default=str).encode('utf-8')
+            offsets.append(len(extra))
+
+        columns = [('id', TYPE_I64, _bytes(ids)), ('timestamp', TYPE_F64, _bytes(timestamps)), ('monotonic', TYPE_I64, _bytes(monotonics)),
+                   ('src', TYPE_U32, _bytes(src)), ('dst', TYPE_U32, _bytes(dst)), ('label', TYPE_U32, _bytes(label)),
+                   ('attr', TYPE_U32, _bytes(attr))]
+        columns.extend(_numeric(key, column) for key, column in numeric.items())
+        columns.append(('extra', TYPE_JSON, _bytes(offsets) + bytes(extra)))
+
+        strings = [_COUNT.pack(len(new))]
+        for value in new:
+            value = value.encode('utf-8')
+            strings.append(_STR.pack(len(value)) + value)
+        strings = b''.join(strings)
+        names = [name.encode('utf-8') for name, _, _ in columns]
+        offset = _align(_CHUNK.size + len(strings) + _COUNT.size + sum(1 + len(name) + _COLUMN.size for name in names))
+        directory, body = [_COUNT.pack(len(columns))], []
+        for name, (_, kind, data) in zip(names, columns):
+            directory.append(bytes((len(name),)) + name + _COLUMN.pack(kind, offset, len(data)))
+            body.append(data + bytes(_align(len(data)) - len(data)))
+            offset += _align(len(data))
+        head = strings + b''.join(directory)
+        head += bytes(_align(_CHUNK.size + len(head)) - _CHUNK.size - len(head))
+        rest = head + b''.join(body)
+        return _CHUNK.pack(b'CHNK', len(records), len(rest)) + rest
+
+class BinaryEventLogger(AsyncEventLogger):
+    """
+        An event logger that writes a binary log (see module doc), one chunk for each batch of records written by
+        the writer thread (see AsyncEventLogger).
+    """
+
+    def _open(self, file):
+        self.file = open(file, 'wb')
+        self.__writer = ChunkWriter()
+        self.file.write(self.__writer.header())
+
+    def _write(self, records):
+        for chunk in self.__writer.chunks(records):
+            self.file.write(chunk)
+        self.file.flush()
+
+class BinaryEventLog:
+    """
+        A binary event log (see module doc), memory-mapped. Columns are returned as NumPy arrays, string columns
+        (src, dst, label, attr) as ids in the string table (see strings):
+
+            with BinaryEventLog('event_log.icul') as log:
+                gaze = log.label('gaze')
+                x, y = gaze['x'], gaze['y']
+                src = log.decode(log.column('src'))
+
+        Requires numpy (it is imported when the log is opened, install icu[binlog]).
+
+    Args:
+        path (str): binary log file.
+    """
+
+    def __init__(self, path):
+        super(BinaryEventLog, self).__init__()
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("BinaryEventLog requires numpy, install it with: pip install numpy (or pip install icu[binlog])") from None
+        self.__np = numpy
+        self.path = path
+        self.__file = open(path, 'rb')
+        self.__mmap = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _ = _HEADER.unpack_from(self.__mmap, 0)
+        if magic != MAGIC:
+            raise ValueError("{0} is not a binary event log.".format(path))
+        if version > VERSION:
+            raise ValueError("Unsupported binary event log version: {0}".format(version))
+        strings = []
+        self.chunks = [] # (rows, {name: (type, offset, size)}), offsets are from the start of the file
+        offset = _HEADER.size
+        while offset + _CHUNK.size <= len(self.__mmap):
+            magic, rows, size = _CHUNK.unpack_from(self.__mmap, offset)
+            if magic != b'CHNK' or offset + _CHUNK.size + size > len(self.__mmap):
+                break # the log was not closed, the last chunk is incomplete
+            self.chunks.append((rows, self.__read_chunk(offset, strings)))
+            offset += _CHUNK.size + size
+        self.strings = numpy.array(strings + [None], dtype=object) # the last string is None (see decode)
+        self.__ids = None
+        self.__rows = sum(rows for rows, _ in self.chunks)
+
+    def __read_chunk(self, start, strings):
+        buffer = self.__mmap
+        offset = start + _CHUNK.size
+        n = _COUNT.unpack_from(buffer, offset)[0]
+        offset += _COUNT.size
+        for _ in range(n):
+            size = _STR.unpack_from(buffer, offset)[0]
+            offset += _STR.size
+            strings.append(buffer[offset:offset + size].decode('utf-8'))
+            offset += size
+        n = _COUNT.unpack_from(buffer, offset)[0]
+        offset += _COUNT.size
+        columns = {}
+        for _ in range(n):
+            size = buffer[offset]
+            name = buffer[offset + 1:offset + 1 + size].decode('utf-8')
+            offset += 1 + size
+            kind, column, nbytes = _COLUMN.unpack_from(buffer, offset)
+            offset += _COLUMN.size
+            columns[name] = (kind, start + column, nbytes)
+        return columns
+
+    def __len__(self):
+        return self.__rows
+
+    def columns(self):
+        """ Names of all columns. """
+        names = list(COLUMNS[:-1])
+        for _, columns in self.chunks:
+            names.extend(name for name in columns if name not in names and name != 'extra')
+        return names + ['extra']
+
+    def __column(self, rows, columns, name, dtype):
+        np = self.__np
+        if name not in columns:
+            return np.full(rows, NONE if name in STRING_COLUMNS else INT_NONE if dtype == '<i8' else np.nan, dtype=dtype)
+        kind, offset, _ = columns[name]
+        column = np.frombuffer(self.__mmap, dtype=_DTYPES[kind], count=rows, offset=offset)
+        if kind == TYPE_I64 and dtype == '<f8': # an int column in a chunk, a float column in others
+            missing = column == INT_NONE
+            column = column.astype(dtype)
+            column[missing] = np.nan
+        return column
+
+    def dtype(self, name):
+        """ The type of a column (see column), '<i8' for a numeric data column that has only ints in every chunk. """
+        if name in STRING_COLUMNS:
+            return '<u4'
+        if name in ('id', 'monotonic'):
+            return '<i8'
+        kinds = set(columns[name][0] for _, columns in self.chunks if name in columns)
+        return '<i8' if kinds == {TYPE_I64} else '<f8'
+
+    def column(self, name):
+        """ A column of every row (see module doc). Numeric data columns are INT_NONE (int columns, see dtype) or NaN 
+            where a row does not have them.
+
+        Args:
+            name (str): column name (see columns), the extra column is read with extra().
+
+        Returns:
+            numpy.ndarray: the column, a read-only view of the file if the log has one chunk.
+        """
+        np = self.__np
+        if name == 'extra':
+            raise ValueError("Read the extra column with extra().")
+        dtype = self.dtype(name)
+        parts = [self.__column(rows, columns, name, dtype) for rows, columns in self.chunks]
+        if not parts:
+            return np.empty(0, dtype=dtype)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def string(self, value):
+        """ The id of a string in the string table, NONE if it is not in the log. """
+        if self.__ids is None:
+            self.__ids = {s:i for i, s in enumerate(self.strings[:-1])}
+        return self.__ids.get(value, NONE)
+
+    def decode(self, ids):
+        """ The strings of a string column (see column), None where it is NONE.
+
+        Returns:
+            numpy.ndarray: strings (dtype=object).
+        """
+        ids = ids.astype(self.__np.int64)
+        ids[ids == NONE] = -1
+        return self.strings[ids]
+
+    def label(self, label, columns=None):
+        """ The rows of events with the given label.
+
+        Args:
+            label (str): event label, e.g. 'gaze'.
+            columns (list, optional): names of the columns to return. Defaults to None (all columns except extra).
+
+        Returns:
+            dict: name -> numpy.ndarray
+        """
+        label = self.string(label)
+        mask = self.column('label') == label
+        if label == NONE: # not in the log, rows without a label do not match
+            mask[:] = False
+        if columns is None:
+            columns = self.columns()[:-1]
+        return {name:self.column(name)[mask] for name in columns}
+
+    def extra(self, index=None):
+        """ The extra data (see module doc) of a row or of every row.
+
+        Args:
+            index (int, optional): row index. Defaults to None (every row).
+
+        Returns:
+            dict, list: the extra data of the row (a list of them if index is None).
+        """
+        np = self.__np
+        result = []
+        start = 0
+        for rows, columns in self.chunks:
+            if index is not None and not start <= index < start + rows:
+                start += rows
+                continue
+            _, offset, _ = columns['extra']
+            offsets = np.frombuffer(self.__mmap, dtype='<u4', count=rows + 1, offset=offset)
+            base = offset + (rows + 1) * 4
+            for i in (range(rows) if index is None else [index - start]):
+                a, b = int(offsets[i]), int(offsets[i + 1])
+                result.append(json.loads(self.__mmap[base + a:base + b].decode('utf-8')) if b > a else {})
+            if index is not None:
+                return result[0]
+            start += rows
+        if index is not None:
+            raise IndexError(index)
+        return result
+
+    def records(self):
+        """ Rebuild the log records (name, timestamp, monotonic, src, dst, data), numeric data is int (int columns, see dtype) or float. """
+        np = self.__np
+        names = [name for name in self.columns()[:-1] if name not in COLUMNS]
+        ids, timestamps, monotonics = self.column('id'), self.column('timestamp'), self.column('monotonic')
+        src, dst, label, attr = (self.decode(self.column(name)) for name in STRING_COLUMNS)
+        numeric = [(name, self.column(name), self.dtype(name) == '<i8') for name in names]
+        for i, extra in enumerate(self.extra()):
+            data = {}
+            if label[i] is not None:
+                data['label'] = label[i]
+            if attr[i] is not None:
+                data['attr'] = attr[i]
+            for name, column, ints in numeric:
+                if ints:
+                    if column[i] != INT_NONE:
+                        data[name] = int(column[i])
+                elif not np.isnan(column[i]):
+                    data[name] = float(column[i])
+            data.update(extra)
+            yield (int(ids[i]), float(timestamps[i]), int(monotonics[i]), src[i], dst[i], data)
+
+    def close(self):
+        try:
+            self.__mmap.close()
+        except BufferError: # columns still refer to the file, it is unmapped once they are garbage collected
+            pass
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+# id:timestamp[:monotonic] - (src->dst): data (see Event.__str__, older logs have no monotonic stamp)
+_LINE = re.compile(r"^(\d+):([^:\s]+)(?::(-?\d+))? - \((.*?)->(.*?)\): (.*)$")
+_LABEL = re.compile(r"'label': '([^']*)'")
+
+def parse_line(line):
+    """ A log record (name, timestamp, monotonic, src, dst, data) from a line of a text log (see Event.__str__).
+        Data that is not a python literal (e.g. it contains a SimpleNamespace) is kept as text: {'label':..., 'text':...}
+
+    Returns:
+        tuple: the record, None if the line is not an event.
+    """
+    match = _LINE.match(line.rstrip('\n'))
+    if match is None:
+        return None
+    name, timestamp, monotonic, src, dst, data = match.groups()
+    if dst.startswith('['):
+        try:
+            dst = ast.literal_eval(dst)
+        except (ValueError, SyntaxError):
+            pass
+    try:
+        data = ast.literal_eval(data)
+    except (ValueError, SyntaxError):
+        label = _LABEL.search(data)
+        data = dict(label=label.group(1) if label is not None else None, text=data)
+    return (int(name), float(timestamp), int(monotonic) if monotonic is not None else 0, src, dst, data)
+
+def convert(text, binary, chunk=CHUNK_ROWS):
+    """ Convert a text event log (see log.EventLogger) to a binary event log.
+
+    Args:
+        text (str): text log file.
+        binary (str): binary log file.
+        chunk (int, optional): rows in each chunk. Defaults to CHUNK_ROWS.
+
+    Returns:
+        tuple: (rows, skipped) the number of events converted and of lines that were not events.
+    """
+    writer = ChunkWriter()
+    rows = skipped = 0
+    with open(text) as lines, open(binary, 'wb') as out:
+        out.write(writer.header())
+        records = []
+        for line in lines:
+            record = parse_line(line)
+            if record is None:
+                skipped += 1
+                continue
+            records.append(record)
+            if len(records) == chunk:
+                out.write(writer.chunk(records))
+                rows += len(records)
+                records = []
+        if records:
+            out.write(writer.chunk(records))
+            rows += len(records)
+    return rows, skipped
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Convert a text event log to a binary event log.')
+    parser.add_argument('text', type=str, help='text event log (e.g. event_log.txt).')
+    parser.add_argument('binary', type=str, help='binary event log to write.')
+    args = parser.parse_args()
+    rows, skipped = convert(args.text, args.binary)
+    print("converted {0} events ({1} lines skipped)".format(rows, skipped))
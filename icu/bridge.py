@@ -0,0 +1,383 @@
+"""
+    A local event bridge, a server in the ICU process that accepts connections on a Unix domain socket. Clients
+    (in any process, written in any language) can attach and detach at any time during a session, send events to
+    ICU and subscribe to the events that ICU generates.
+
+    Messages are length prefixed binary frames (all integers are big-endian):
+
+        frame     := length:u32 kind:u8 body        length is the size of kind and body
+        EVENT     := timestamp:f64 monotonic:i64 id:str src:str dst:str data:json
+        SUBSCRIBE := filters:json                   e.g. {"labels": ["change", "delta"], "src": "Pump:*"} (see event.Subscription)
+        UNSUBSCRIBE :=                              (empty)
+        str       := length:u16 utf-8
+        json      := length:u32 utf-8 json object
+
+    A client receives events once it has subscribed. Events sent to ICU may have a timestamp/monotonic of 0 (the time
+    they arrive), their id is ignored. A dst that contains ',' is a list of destinations.
+
+    Each client has an outbox of at most `capacity` bytes, frames are dropped (and counted) while it is full, so a
+    slow client never holds up ICU.
+"""
+import os
+import json
+import socket
+import struct
+import tempfile
+import traceback
+
+from . import event
+from .event import Event, Subscription, OVERFLOW_DROP_NEWEST
+
+BRIDGE_PATH = os.path.join(tempfile.gettempdir(), 'icu.sock')
+BRIDGE_CAPACITY = 1 << 20 # bytes in the outbox of each client
+BRIDGE_POLL = 50 # ms, if the event schedular cannot watch sockets
+
+FRAME_EVENT = 1
+FRAME_SUBSCRIBE = 2
+FRAME_UNSUBSCRIBE = 3
+
+_FRAME = struct.Struct('!IB')
+_STAMP = struct.Struct('!dq')
+_STR = struct.Struct('!H')
+_JSON = struct.Struct('!I')
+
+def _str(value):
+    value = value.encode('utf-8')
+    return _STR.pack(len(value)) + value
+
+def _json(value):
+    value = json.dumps(value, separators=(',', ':'), default=str).encode('utf-8')
+    return _JSON.pack(len(value)) + value
+
+def frame(kind, body=b''):
+    """ A frame of the given kind (see FRAME_EVENT, FRAME_SUBSCRIBE, FRAME_UNSUBSCRIBE). """
+    return _FRAME.pack(len(body) + 1, kind) + body
+
+def encode_event(event):
+    """ An event as an EVENT frame. """
+    dst = ','.join(event.dst) if isinstance(event.dst, (list, tuple)) else str(event.dst)
+    body = b''.join((_STAMP.pack(event.timestamp, event.monotonic), _str(str(event.name)), _str(str(event.src)), _str(dst),
+                     _json(dict(event.data))))
+    return frame(FRAME_EVENT, body)
+
+def decode_event(body):
+    """ An event from the body of an EVENT frame.
+
+    Returns:
+        tuple: (id, Event), the event has a new id.
+    """
+    timestamp, monotonic = _STAMP.unpack_from(body, 0)
+    offset = _STAMP.size
+    fields = []
+    for _ in range(3):
+        size = _STR.unpack_from(body, offset)[0]
+        offset += _STR.size
+        fields.append(bytes(body[offset:offset + size]).decode('utf-8'))
+        offset += size
+    size = _JSON.unpack_from(body, offset)[0]
+    offset += _JSON.size
+    data = json.loads(bytes(body[offset:offset + size]).decode('utf-8'))
+    name, src, dst = fields
+    if ',' in dst:
+        dst = dst.split(',')
+    return name, Event(src, dst, timestamp=timestamp or None, monotonic=monotonic or None, **data)
+
+def frames(buffer):
+    """ Remove complete frames from the front of a buffer.
+
+    Args:
+        buffer (bytearray): received bytes.
+
+    Returns:
+        list: (kind, body) of each complete frame.
+    """
+    result = []
+    offset = 0
+    while len(buffer) - offset >= _FRAME.size:
+        length, kind = _FRAME.unpack_from(buffer, offset)
+        end = offset + _FRAME.size - 1 + length # length counts kind and body
+        if len(buffer) < end:
+            break
+        result.append((kind, bytes(buffer[offset + _FRAME.size:end])))
+        offset = end
+    del buffer[:offset]
+    return result
+
+class Connection:
+    """
+        A client of the Bridge. A subscribed connection is an external sink of ICU (see GlobalEventCallback.register_external_sink),
+        it is sent events as EVENT frames.
+    """
+    __NAME = 0
+
+    overflow = OVERFLOW_DROP_NEWEST
+
+    def __init__(self, bridge, sock, capacity=BRIDGE_CAPACITY):
+        super(Connection, self).__init__()
+        Connection.__NAME += 1
+        self.__name = "{0}:{1}".format(type(self).__name__, Connection.__NAME)
+        self.bridge = bridge
+        self._encode = bridge.encode # events are sent as EVENT frames, framed once for all connections (see FanOut)
+        self.socket = sock
+        self.fd = sock.fileno()
+        self.capacity = capacity
+        self.subscription = None
+        self.__in = bytearray()
+        self.__out = bytearray()
+        self.__flushing = False
+        self.sent = 0     # frames put in the outbox
+        self.dropped = 0  # frames dropped while the outbox was full
+
+    @property
+    def name(self):
+        return self.__name
+
+    def _put(self, payload, event):
+        # payload is an EVENT frame (see _encode)
+        self.send(payload)
+
+    def _flush(self):
+        pass
+
+    def send(self, data):
+        """ Send a frame, it is written to the socket once ICU is idle (with any other frames sent before then). """
+        if len(self.__out) + len(data) > self.capacity:
+            self.dropped += 1
+            return
+        self.__out += data
+        self.sent += 1
+        if not self.__flushing:
+            self.__flushing = True
+            self.bridge.session.schedular.after(0, self.flush)
+
+    def flush(self):
+        self.__flushing = False
+        if self.socket is None:
+            return
+        try:
+            n = self.socket.send(self.__out)
+            del self.__out[:n]
+        except BlockingIOError:
+            pass
+        except OSError: # the client has gone, it is detached when the socket is next read
+            self.__out.clear()
+            return
+        if self.__out: # try again later, the client is slow
+            self.__flushing = True
+            self.bridge.session.schedular.after(BRIDGE_POLL, self.flush)
+
+    def receive(self):
+        """ Read all available frames.
+
+        Raises:
+            OSError: if the connection failed.
+
+        Returns:
+            tuple: (frames, closed) the (kind, body) of each frame and whether the client has disconnected.
+        """
+        if self.socket is None:
+            return [], True
+        while True:
+            try:
+                data = self.socket.recv(1 << 16)
+            except BlockingIOError:
+                return frames(self.__in), False
+            if not data:
+                return frames(self.__in), True
+            self.__in += data
+
+    def stats(self):
+        return dict(sent=self.sent, dropped=self.dropped, lag=len(self.__out))
+
+    def close(self):
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+    def __str__(self):
+        return "{0}:{1}".format(self.name, len(self.__out))
+
+    def __repr__(self):
+        return str(self)
+
+class Bridge:
+    """
+        A server that bridges ICU events to and from clients connected to a Unix domain socket (see module doc).
+        Create it once the event schedular of the session has been initialised (see event.event_schedular) and start it, 
+        the bridge belongs to the current session (see event.Session).
+    """
+
+    def __init__(self, path=BRIDGE_PATH, capacity=BRIDGE_CAPACITY):
+        super(Bridge, self).__init__()
+        self.session = event.session()
+        self.path = path
+        self.capacity = capacity
+        self.connections = {} # fd -> Connection
+        self.__socket = None
+        self.__polled = False
+        self.__last = (None, None, None) # the last event framed, its id (pooled events are reused) and its frame
+
+    def start(self):
+        """ Listen for clients.
+
+        Raises:
+            OSError: if another bridge is listening on the same path.
+        """
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+            except OSError: # left by a previous session
+                os.unlink(self.path)
+            else:
+                raise OSError("Another ICU bridge is listening on: {0}".format(self.path))
+            finally:
+                probe.close()
+        self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.__socket.bind(self.path)
+        self.__socket.listen()
+        self.__socket.setblocking(False)
+        self.__polled = not self.session.schedular.watch(self.__socket.fileno(), self.__accept)
+        if self.__polled:
+            self.session.schedular.after(BRIDGE_POLL, self.__poll)
+
+    def encode(self, e):
+        """ An event as an EVENT frame, encoded once for all connections. """
+        last, name, data = self.__last
+        if last is not e or name != e.name:
+            data = encode_event(e)
+            self.__last = (e, e.name, data)
+        return data
+
+    def __poll(self):
+        if self.__socket is None:
+            return
+        self.__accept()
+        for connection in list(self.connections.values()):
+            self.__receive(connection)
+        self.session.schedular.after(BRIDGE_POLL, self.__poll)
+
+    def __accept(self):
+        while True:
+            try:
+                sock, _ = self.__socket.accept()
+            except BlockingIOError:
+                return
+            sock.setblocking(False)
+            connection = Connection(self, sock, capacity=self.capacity)
+            self.connections[connection.fd] = connection
+            if not self.__polled:
+                self.session.schedular.watch(connection.fd, self.__receive, connection)
+
+    def __receive(self, connection):
+        try:
+            received, closed = connection.receive()
+        except OSError:
+            return self.detach(connection)
+        events = []
+        for kind, body in received:
+            try:
+                if kind == FRAME_EVENT:
+                    events.append(decode_event(body)[1])
+                elif kind == FRAME_SUBSCRIBE:
+                    filters = json.loads(body[_JSON.size:].decode('utf-8'))
+                    connection.subscription = Subscription(**filters)
+                    self.session.bus.register_external_sink(connection.name, connection)
+                elif kind == FRAME_UNSUBSCRIBE:
+                    self.session.bus.remove_external_sink(connection.name)
+                    connection.subscription = None
+            except Exception: # a malformed frame, the client is detached
+                traceback.print_exc()
+                closed = True
+                break
+        self.session.bus._dispatch(events)
+        if closed:
+            self.detach(connection)
+
+    def detach(self, connection):
+        """ Close a connection, it receives no more events. """
+        if self.connections.pop(connection.fd, None) is None:
+            return
+        if not self.__polled:
+            self.session.schedular.unwatch(connection.fd)
+        self.session.bus.remove_external_sink(connection.name)
+        connection.close()
+
+    def close(self):
+        if self.__socket is None:
+            return
+        for connection in list(self.connections.values()):
+            self.detach(connection)
+        if not self.__polled:
+            self.session.schedular.unwatch(self.__socket.fileno())
+        self.__socket.close()
+        self.__socket = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+class BridgeClient:
+    """
+        A (blocking) client of the Bridge, for agents in other processes. Clients in other languages implement the
+        frames in the module doc.
+    """
+
+    def __init__(self, path=BRIDGE_PATH):
+        super(BridgeClient, self).__init__()
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(path)
+        self.__in = bytearray()
+        self.__events = []
+
+    def subscribe(self, src=None, dst=None, labels=None, attrs=None):
+        """ Receive the events that match (see event.Subscription), replaces any previous subscription. """
+        filters = dict(src=src, dst=dst, labels=list(labels) if labels is not None else None, attrs=list(attrs) if attrs is not None else None)
+        self.socket.sendall(frame(FRAME_SUBSCRIBE, _json(filters)))
+
+    def unsubscribe(self):
+        self.socket.sendall(frame(FRAME_UNSUBSCRIBE))
+
+    def source(self, src, dst, timestamp=None, monotonic=None, **data):
+        """ Send a new event to the ICU system (see ExternalEventSource.source). """
+        dst = ','.join(dst) if isinstance(dst, (list, tuple)) else dst
+        body = b''.join((_STAMP.pack(timestamp or 0., monotonic or 0), _str(''), _str(src), _str(dst), _json(data)))
+        self.socket.sendall(frame(FRAME_EVENT, body))
+
+    def get(self, timeout=None):
+        """ Wait for the next event.
+
+        Args:
+            timeout (float, optional): maximum time (seconds) to wait. Defaults to None (no limit).
+
+        Raises:
+            socket.timeout: if no event arrived in time.
+            ConnectionError: if ICU has closed the connection.
+
+        Returns:
+            Event: the event (with the id given to it by ICU).
+        """
+        if not self.__events:
+            self.__receive(timeout)
+        return self.__events.pop(0)
+
+    def get_many(self, timeout=None):
+        """ Wait for events, all that have arrived are returned together. """
+        if not self.__events:
+            self.__receive(timeout)
+        events, self.__events = self.__events, []
+        return events
+
+    def __receive(self, timeout):
+        self.socket.settimeout(timeout)
+        while not self.__events:
+            data = self.socket.recv(1 << 16)
+            if not data:
+                raise ConnectionResetError()
+            self.__in += data
+            for kind, body in frames(self.__in):
+                if kind == FRAME_EVENT:
+                    name, e = decode_event(body)
+                    e.name = name
+                    self.__events.append(e)
+
+    def close(self):
+        self.socket.close()
@@ -0,0 +1,86 @@
+"""
+    A broker process between ICU and many external sinks. ICU sends each event once, over a single channel (an
+    ExternalEventSink, see Broker.sink), the broker sends it on to each sink that subscribes to it (see event.FanOut).
+    Filtering, fan-out and the overflow policy of each sink run in the broker process, so adding sinks (agents,
+    loggers, dashboards) adds no work to the ICU (GUI) process.
+
+        broker = Broker(sinks=[sink1, sink2, ...])
+        broker.start()
+        p, m = icu.start(sinks=[broker.sink], sources=[source])
+
+    A sink with overflow='block' holds up the broker (and so every other sink) while it is full, the other policies
+    isolate a slow sink. The broker stops when ICU shuts down or when it is closed.
+"""
+from multiprocessing import Process, Event as Flag
+
+from .event import ExternalEventSink, FanOut, decode, OVERFLOW_COALESCE
+
+BROKER_CAPACITY = 100000 # events waiting in the channel from ICU
+BROKER_TIMEOUT = 0.05    # seconds, how often the broker sends coalesced events and checks whether it has been closed
+
+class Broker:
+    """
+        Sends events from ICU to many external sinks in a separate process (see module doc). The sinks must be given
+        before the broker is started.
+
+    Args:
+        sinks (list, optional): external sinks. Defaults to [].
+        transport (str, optional): transport of the channel from ICU (see icu.transport). Defaults to None ('queue').
+        capacity (int, optional): capacity of the channel. Defaults to BROKER_CAPACITY.
+        overflow (str, optional): overflow policy of the channel (see event.OVERFLOW). Defaults to None (the default of the transport, see ExternalEventSink).
+        subscription: keyword arguments of the channel subscription (see event.Subscription), ICU only sends the events
+            that match. Defaults to every event.
+    """
+
+    def __init__(self, sinks=[], transport=None, capacity=BROKER_CAPACITY, overflow=None, **subscription):
+        super(Broker, self).__init__()
+        self.sink = ExternalEventSink(transport=transport, capacity=capacity, overflow=overflow, **subscription)
+        self.sinks = list(sinks)
+        self.process = None
+        self.__closed = Flag()
+
+    def start(self):
+        self.process = Process(target=broker, args=(self.sink, self.sinks, self.__closed), name=type(self).__name__)
+        self.process.daemon = True
+        self.process.start()
+
+    def stats(self):
+        """ Counters of the channel and of each sink (see ExternalEventSink.stats).
+
+        Returns:
+            dict: name -> counters.
+        """
+        return {sink.name:sink.stats() for sink in [self.sink] + self.sinks}
+
+    def close(self, timeout=None):
+        """ Stop the broker once it has sent on the events that have arrived.
+
+        Args:
+            timeout (float, optional): maximum time (seconds) to wait for the broker to stop. Defaults to None (no limit).
+        """
+        self.__closed.set()
+        if self.process is not None:
+            self.process.join(timeout)
+
+def broker(channel, sinks, closed):
+    """ The broker process (see Broker).
+
+    Args:
+        channel (ExternalEventSink): events from ICU.
+        sinks (list): external sinks.
+        closed (multiprocessing.Event): set when the broker should stop.
+    """
+    fanout = FanOut({sink.name:sink for sink in sinks})
+    coalescing = [sink for sink in sinks if sink.overflow == OVERFLOW_COALESCE]
+    shutdown = False
+    while not shutdown:
+        payloads = channel._get_payloads(timeout=BROKER_TIMEOUT)
+        for payload in payloads:
+            message = decode(payload)
+            fanout.send(message, payload) # the payload is shared, it is not encoded again
+            if message.data.get('label', None) == 'system' and message.data.get('command', None) == 'shutdown':
+                shutdown = True
+        for sink in coalescing:
+            sink._flush()
+        if not payloads and closed.is_set():
+            break
@@ -2,16 +2,18 @@ from abc import ABC, abstractmethod
 from collections import defaultdict
 import math
 
+from .event import session as current_session
+
 class Component(ABC): #TODO refactor this, probably it can be in BaseComponent
 
-    __components__ = {} #all of the visual components, tanks, pumps, tracking etc
+    # all of the visual components, tanks, pumps, tracking etc are registered with the current session (see event.Session)
 
     def __init__(self, *args, **kwargs):
         super(Component, self).__init__(*args, **kwargs)
     
     def register(self, name):
         self.__name = name
-        Component.__components__[self.__name] = self
+        current_session().registry('Component')[self.__name] = self
         #print("INFO: registered component: {0}".format(self.__name))
 
     @property
@@ -19,7 +21,7 @@ class Component(ABC): #TODO refactor this, probably it can be in BaseComponent
         return self.__name
 
 def all_components():
-    return Component.__components__
+    return current_session().registry('Component')
 
 def __validate_padding__(padding):
     if isinstance(padding, (int, float)):
@@ -169,8 +171,7 @@ def rotate(angle, *p): #rotate a set of points
 
 class BaseComponent:
 
-    __all_components__ = {}
-    __bind__ = defaultdict(dict)
+    # components and event bindings are registered with the current session (see event.Session)
 
     def __init__(self, canvas, x=0., y=0., width=0., height=0., padding=0.):
         self.canvas = canvas
@@ -287,11 +288,19 @@ class BaseComponent:
         pass
 
     def bind(self, event):
-        BaseComponent.__bind__[event][self.tag] = self
+        current_session().registry('bind', lambda: defaultdict(dict))[event][self.tag] = self
     
     @staticmethod
-    def bound(event):
-        return BaseComponent.__bind__.get(event, {})
+    def bound(event, session=None):
+        """ The components bound to an event (tag -> component).
+
+        Args:
+            event (str): tk event, e.g. <Button-1>.
+            session (Session, optional): session of the components. Defaults to None (the current session).
+        """
+        if session is None:
+            session = current_session()
+        return session.registry('bind', lambda: defaultdict(dict)).get(event, {})
 
 class EmptyComponent(BaseComponent): #useful for padding...
 
@@ -317,7 +326,7 @@ class SimpleComponent(BaseComponent):
         #(x,y), (w,h) = bounding_box(*canvas.coords(self.component))
 
         super(SimpleComponent, self).__init__(canvas, x=x1,y=y1,width=x2-x1,height=y2-y1,padding=padding)
-        BaseComponent.__all_components__[self.component] = self
+        current_session().registry('BaseComponent')[self.component] = self
     
     @property
     def component(self):
@@ -364,7 +373,7 @@ class PolyComponent(BaseComponent):
         #self.__debug = canvas.create_rectangle(x1, y1, x2, y2, outline="pink")
         super(PolyComponent, self).__init__(canvas, x=x1, y=y1, width=x2-x1, height=y2-y1, padding=padding)
         
-        BaseComponent.__all_components__[self.component] = self
+        current_session().registry('BaseComponent')[self.component] = self
 
     def rotate(self, angle, center=(0,0)):
         points = self.lcoords
@@ -549,7 +558,7 @@ class CanvasWidget(BaseComponent):
             self.canvas.tag_lower(c)
 
     def bind(self, event):
-        BaseComponent.__bind__[event][self.components['background'].tag] = self
+        current_session().registry('bind', lambda: defaultdict(dict))[event][self.components['background'].tag] = self
   
     @property
     def background(self):
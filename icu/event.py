@@ -1,21 +1,43 @@
+import re
+import math
 import copy
+import asyncio
+import heapq
+import fnmatch
+import traceback
 
 from sys import version_info
 
-from types import SimpleNamespace
 from json import dumps
-from multiprocessing import Queue
-from time import time
+from pickle import dumps as dumps_pickle, loads as loads_pickle, HIGHEST_PROTOCOL
+from itertools import count
+from collections import deque
+from time import time, monotonic, perf_counter, perf_counter_ns, sleep as pause
+from threading import Lock
+from multiprocessing import Array
+
+from .constants import EVENT_LABEL_CLICK, EVENT_LABEL_KEY
+from .transport import transport as make_transport, wakeup as make_wakeup, RingBuffer, Empty, Full
 
 global finish
 finish = False
 
-# create unique event ids (ids do not reflect time)
-EVENT_NAME = 0
-def next_name():
-    global EVENT_NAME
-    EVENT_NAME += 1
-    return str(EVENT_NAME)
+def now():
+    """ The current time according to the event schedular of the current session (seconds since the epoch). """
+    return _session.clock()
+
+def to_wall(stamp):
+    """ Convert a monotonic stamp (ns, see Event.monotonic) to wall-clock time (seconds since the epoch) using the session anchor. """
+    anchor = _session.anchor
+    return anchor[0] + (stamp - anchor[1]) / 1e9
+
+def to_monotonic(timestamp):
+    """ Convert wall-clock time (seconds since the epoch) to a monotonic stamp (ns) using the session anchor. """
+    anchor = _session.anchor
+    return anchor[1] + int(round((timestamp - anchor[0]) * 1e9))
+
+# create unique (integer) event ids (ids do not reflect time)
+next_name = count(1).__next__
 
 
 
@@ -24,46 +46,343 @@ class etuple(tuple):
     def __new__(self, value, cause=None):
         return super(etuple, self).__new__(etuple, (value, cause))
 
+_changing = [] # ids of the event property writes in progress (see changing)
+
+def changing():
+    """ The id of the innermost event property write in progress (its setter is running), None if there is none. """
+    return _changing[-1] if _changing else None
+
 class event_property(property):
+    """
+        A property that publishes its changes (see ChangeBuffer). Each write is given an id from the event id sequence, 
+        the cause of a write may be given with an etuple (value, cause), a cause is an event or an event id. Writes made 
+        by the setter of another write (see changing) are caused by it.
+    """
 
     def __set__(self, obj, value):
         cause = None
         if isinstance(value, etuple):
             assert len(value) == 2
             value, cause = value
-        super(event_property, self).__set__(obj, value)
+        if isinstance(cause, Event):
+            cause = cause.name
+        elif cause is None:
+            cause = changing()
+        change = next_name()
+        _changing.append(change)
+        try:
+            super(event_property, self).__set__(obj, value)
+        finally:
+            _changing.pop()
         nvalue = self.__get__(obj)
-        obj.source("Global", label="change", attr=self.fget.__name__, value=nvalue, cause=cause)
+        _session.bus.changes.write(obj, self.fget.__name__, nvalue, cause=cause, change=change)
+
+CAUSAL_WINDOW = 100000 # records
+
+class CausalIndex:
+    """
+        Records what caused what for a bounded window of recent events and changes to event properties (see event_property), 
+        so that chains such as click -> pump state change -> transfer -> tank fuel change can be walked without the events 
+        themselves. Events and changes are identified by id (see Event.name), only those that have a cause are recorded.
+
+    Args:
+        window (int, optional): maximum number of records, the oldest are forgotten first. Defaults to CAUSAL_WINDOW.
+    """
+
+    def __init__(self, window=CAUSAL_WINDOW):
+        super(CausalIndex, self).__init__()
+        self.window = window
+        self.__records = {} # id -> (cause, src, label, attr, value)
+        self.__effects = {} # cause -> deque of ids
+        self.__order = deque()
+
+    def __len__(self):
+        return len(self.__records)
+
+    def add(self, id, cause, src, label, attr=None, value=None):
+        """ Record that an event or change was caused by another.
+
+        Args:
+            id (int): id of the event or change.
+            cause (int): id of the cause.
+            src (str): source of the event (component of the change).
+            label (str): label of the event ('change' for a change).
+            attr (str, optional): attribute of a change. Defaults to None.
+            value (object, optional): value of a change. Defaults to None.
+        """
+        self.__records[id] = (cause, src, label, attr, value)
+        effects = self.__effects.get(cause)
+        if effects is None:
+            effects = self.__effects[cause] = deque()
+        effects.append(id)
+        order = self.__order
+        order.append(id)
+        if len(order) > self.window:
+            old = order.popleft()
+            cause = self.__records.pop(old)[0]
+            effects = self.__effects[cause]
+            effects.popleft() # effects are in order, the oldest record is the oldest effect of its cause
+            if not effects:
+                del self.__effects[cause]
+
+    def add_event(self, event):
+        """ Record an event if it has a cause (see add). """
+        data = event.data
+        cause = data.get('cause', None)
+        if cause is not None:
+            self.add(event.name, cause, event.src, data.get('label', None), attr=data.get('attr', None), value=data.get('value', None))
+
+    def record(self, id):
+        """ The record of an event or change.
+
+        Returns:
+            dict: id, cause, src, label, attr, value. None if there is no record.
+        """
+        record = self.__records.get(id)
+        if record is None:
+            return None
+        return dict(zip(('id', 'cause', 'src', 'label', 'attr', 'value'), (id,) + record))
+
+    def cause(self, id):
+        """ The id of the cause of an event or change, None if it is unknown. """
+        record = self.__records.get(id)
+        return record[0] if record is not None else None
+
+    def effects(self, id):
+        """ The ids of the events and changes directly caused by an event or change (in order). """
+        return list(self.__effects.get(id, ()))
+
+    def chain(self, id):
+        """ The chain of causes that led to an event or change.
+
+        Returns:
+            list: ids, the first cause first and id last.
+        """
+        chain = [id]
+        cause = self.cause(id)
+        while cause is not None:
+            chain.append(cause)
+            cause = self.cause(cause)
+        chain.reverse()
+        return chain
+
+    def consequences(self, id):
+        """ All events and changes caused directly or indirectly by an event or change (breadth first).
+
+        Returns:
+            list: ids.
+        """
+        result = []
+        frontier = deque(self.__effects.get(id, ()))
+        while frontier:
+            effect = frontier.popleft()
+            result.append(effect)
+            frontier.extend(self.__effects.get(effect, ()))
+        return result
+
+# how changes to event properties are published (see ChangeBuffer)
+CHANGE_DELTA = 'delta'              # one 'delta' event per frame with the latest value of each (component, attr) that changed
+CHANGE_EVERY_WRITE = 'every-write'  # one 'change' event per write
+CHANGE_MODES = (CHANGE_DELTA, CHANGE_EVERY_WRITE)
+
+CHANGE_FRAME = 100 # ms
+
+class ChangeBuffer:
+    """
+        Publishes changes made to event properties (see event_property) to Global. 
+        
+        In 'delta' mode writes are buffered for a frame, repeated writes to the same (component, attr) are merged keeping the 
+        latest value and a count of the writes. At the end of the frame a single 'delta' event is published with data:
+            changes (dict): component -> {attr : value}
+            counts (dict): component -> {attr : number of writes}
+            ids (dict): component -> {attr : id of the latest write} (see CausalIndex)
+            causes (dict): component -> {attr : id of the cause of the latest write}, only writes that have a cause
+        In 'every-write' mode a 'change' event (attr, value, cause) is published by the component on every write, for raw logging, 
+        its id is the id of the change.
+
+    Args:
+        mode (str, optional): see CHANGE_MODES. Defaults to 'delta'.
+        frame (int, optional): length of a frame (ms). Defaults to CHANGE_FRAME.
+    """
+
+    def __init__(self, mode=CHANGE_DELTA, frame=CHANGE_FRAME):
+        super(ChangeBuffer, self).__init__()
+        if mode not in CHANGE_MODES:
+            raise ValueError("Invalid change mode: {0}, must be one of {1}".format(mode, CHANGE_MODES))
+        self.mode = mode
+        self.frame = frame
+        self.__changes = {}
+        self.__counts = {}
+        self.__ids = {}
+        self.__causes = {}
+        self.__scheduled = False
+
+    def write(self, obj, attr, value, cause=None, change=None):
+        """ Record a write to an event property.
+
+        Args:
+            obj (EventCallback): component.
+            attr (str): name of the property.
+            value (object): new value.
+            cause (int, optional): id of the event (or change) that caused the change. Defaults to None.
+            change (int, optional): id of the change. Defaults to None (a new id).
+        """
+        if change is None:
+            change = next_name()
+        if self.mode == CHANGE_EVERY_WRITE:
+            event = Event(obj.name, "Global", label="change", attr=attr, value=value, cause=cause)
+            event.name = change
+            _session.schedular.push(event)
+            return
+        name = obj.name
+        if cause is not None:
+            _session.bus.causes.add(change, cause, name, 'change', attr=attr, value=value)
+        changes = self.__changes.get(name)
+        if changes is None:
+            changes = self.__changes[name] = {}
+            counts = self.__counts[name] = {}
+            ids = self.__ids[name] = {}
+            causes = self.__causes[name] = {}
+        else:
+            counts, ids, causes = self.__counts[name], self.__ids[name], self.__causes[name]
+        changes[attr] = value
+        counts[attr] = counts.get(attr, 0) + 1
+        ids[attr] = change
+        if cause is not None:
+            causes[attr] = cause
+        else:
+            causes.pop(attr, None)
+        if not self.__scheduled:
+            self.__scheduled = True
+            _session.schedular.after(self.frame, self.flush)
+
+    def take(self):
+        """ Take the changes buffered in the current frame.
+
+        Returns:
+            Event: a 'delta' event, None if nothing has changed.
+        """
+        self.__scheduled = False
+        if not self.__changes:
+            return None
+        causes = {name:attrs for name, attrs in self.__causes.items() if attrs}
+        event = Event("Global", "Global", label="delta", changes=self.__changes, counts=self.__counts, ids=self.__ids, causes=causes)
+        self.__changes, self.__counts, self.__ids, self.__causes = {}, {}, {}, {}
+        return event
+
+    def flush(self):
+        """ Publish the changes buffered in the current frame. """
+        event = self.take()
+        if event is not None:
+            _session.schedular.push(event)
+
+class EventData:
+    """
+        Event data. Items are stored in the dict given on construction (no copy is made) and may be accessed 
+        as attributes (e.g. event.data.label) or as a mapping (e.g. event.data['label']).
+    """
+    __slots__ = ('__dict__',) # no weakref
+
+    def __init__(self, data):
+        self.__dict__ = data
+
+    def __getitem__(self, key):
+        return self.__dict__[key]
+
+    def __setitem__(self, key, value):
+        self.__dict__[key] = value
+
+    def __contains__(self, key):
+        return key in self.__dict__
+
+    def __iter__(self):
+        return iter(self.__dict__)
+
+    def __len__(self):
+        return len(self.__dict__)
+
+    def __eq__(self, other):
+        return isinstance(other, EventData) and self.__dict__ == other.__dict__
+
+    def get(self, key, default=None):
+        return self.__dict__.get(key, default)
+
+    def keys(self):
+        return self.__dict__.keys()
+
+    def values(self):
+        return self.__dict__.values()
+
+    def items(self):
+        return self.__dict__.items()
+
+    def __repr__(self):
+        return repr(self.__dict__)
 
 class Event:
+    """
+        An event. Events are stamped with wall-clock time (timestamp, seconds since the epoch) and high resolution 
+        monotonic time (monotonic, ns, see Session.monotonic_clock), use the monotonic stamp for latencies and reaction 
+        times and to_wall to convert it.
+    """
+
+    __slots__ = ('name', 'src', 'dst', 'data', 'timestamp', 'monotonic', 'pool')
 
-    def __init__(self, src, dst, timestamp=None, **data):
-        super(Event, self).__init__()
+    def __init__(self, src, dst, timestamp=None, monotonic=None, **data):
         self.name = next_name()
         self.dst = dst
         self.src = src
-        self.data = SimpleNamespace(**data)
-        self.timestamp = timestamp
-        if timestamp is None:
-            self.timestamp = time()
+        self.data = EventData(data)
+        self.timestamp = _session.clock() if timestamp is None else timestamp
+        self.monotonic = _session.monotonic_clock() if monotonic is None else monotonic
+        self.pool = None
+
+    def __getstate__(self):
+        return (self.name, self.src, self.dst, self.data, self.timestamp, self.monotonic)
+
+    def __setstate__(self, state):
+        self.name, self.src, self.dst, self.data, self.timestamp, self.monotonic = state
+        self.pool = None
+
+    def detach(self):
+        """ Detach this event from its pool (see EventPool), it will not be reused. Sinks that keep a pooled event after 
+            it has been triggered must detach it. """
+        self.pool = None
 
     def __str__(self):
-        return "{0}:{1} - ({2}->{3}): {4}".format(self.name, self.timestamp, self.src, self.dst, self.data.__dict__)
+        return "{0}:{1}:{2} - ({3}->{4}): {5}".format(self.name, self.timestamp, self.monotonic, self.src, self.dst, self.data)
     
     def __repr__(self):
         return str(self)
 
 
+    def copy(self, dst=None):
+        """ A shallow copy of this event, the copy shares the same id and data.
+
+        Args:
+            dst (str, optional): destination of the copy. Defaults to None (same destination).
+        """
+        e = type(self).__new__(type(self))
+        e.name = self.name
+        e.src = self.src
+        e.dst = self.dst if dst is None else dst
+        e.data = self.data
+        e.timestamp = self.timestamp
+        e.monotonic = self.monotonic
+        e.pool = None
+        return e
+
     def to_tuple(self):
-        return (self.timestamp, self.name, (self.src, self.dst), copy.deepcopy(self.data.__dict__))
+        return (self.timestamp, self.name, (self.src, self.dst), copy.deepcopy(dict(self.data)))
 
     def serialise(self) -> dict:
         return {
             "src": self.src,
             "dst": self.dst,
-            "data": self.data.__dict__,
+            "data": dict(self.data),
             "name": self.name,
             "timestamp": self.timestamp,
+            "monotonic": self.monotonic,
         }
 
     def serialise_to_str(self) -> str:
@@ -74,21 +393,101 @@ class Event:
         return Event(src="empty", dst="empty")
 
 
+POOL_SIZE = 256 # free events
+
+class EventPool:
+    """
+        A pool of reusable events for high frequency event generators (see pooled), reduces allocation and garbage 
+        collection in long sessions. A pooled event returns to the pool once it has been triggered (see GlobalEventCallback) 
+        and is then reused with a new id, data and stamps. The lifetime rules are:
+            - a sink that keeps a pooled event (or its data) after sink() returns must detach it (see Event.detach),
+            - causes are kept by id (see event_property), events given as causes do not need to be detached,
+            - events that are never triggered (e.g. merged, see merge_events) are not reused, they are garbage collected.
+
+    Args:
+        size (int, optional): maximum number of free events kept by the pool. Defaults to POOL_SIZE.
+    """
+
+    def __init__(self, size=POOL_SIZE):
+        super(EventPool, self).__init__()
+        self.size = size
+        self.created = 0
+        self.reused = 0
+        self.__free = []
+
+    def event(self, src, dst, timestamp=None, monotonic=None, **data):
+        """ Get an event from the pool (see Event). """
+        if self.__free:
+            e = self.__free.pop()
+            e.name = next_name()
+            e.src = src
+            e.dst = dst
+            e.data.__dict__ = data
+            e.timestamp = _session.clock() if timestamp is None else timestamp
+            e.monotonic = _session.monotonic_clock() if monotonic is None else monotonic
+            self.reused += 1
+        else:
+            e = Event(src, dst, timestamp=timestamp, monotonic=monotonic, **data)
+            self.created += 1
+        e.pool = self
+        return e
+
+    def release(self, event):
+        """ Return an event to the pool, it must no longer be used. """
+        event.pool = None
+        if len(self.__free) < self.size:
+            self.__free.append(event)
+
+    def __len__(self):
+        return len(self.__free)
+
+def enable_event_pool(size=POOL_SIZE):
+    """ Enable (or disable if size is None) the event pool of the current session used by pooled.
+
+    Returns:
+        EventPool: the event pool.
+    """
+    _session.event_pool = EventPool(size) if size is not None else None
+    return _session.event_pool
+
+def pooled(src, dst, timestamp=None, monotonic=None, **data):
+    """ A new event taken from the event pool of the current session if it is enabled (see enable_event_pool), use for 
+        high frequency events that are not kept after they have been triggered (see EventPool). """
+    event_pool = _session.event_pool
+    if event_pool is None:
+        return Event(src, dst, timestamp=timestamp, monotonic=monotonic, **data)
+    return event_pool.event(src, dst, timestamp=timestamp, monotonic=monotonic, **data)
+
+WAKEUP_TIMEOUT = 0.1 # seconds to wait for a signalled event to arrive (see ExternalEventSource)
+
+def encode(event):
+    """ Encode an event as an immutable byte payload (see decode). """
+    return dumps_pickle(event, HIGHEST_PROTOCOL)
+
+def decode(payload):
+    """ Decode an event from a byte payload (see encode). """
+    return loads_pickle(payload)
+
 class ExternalEventSource: 
     """ 
         A thread-safe event source to be used externally as a
         mechanism for sending events to the ICU system.
+
+        Events are sent through a transport, a multiprocessing.Queue by default, see icu.transport 
+        (e.g. transport='ring' for a shared memory RingBuffer, a single producer thread is then required).
+        Each event also signals a Wakeup so that ICU dispatches it as soon as it arrives rather than polling.
     """
     __NAME = 0
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, transport=None, **kwargs):
         super(ExternalEventSource, self).__init__(*args, **kwargs)
-        self.__buffer = Queue()
+        self.__buffer = make_transport(transport)
+        self.__wakeup = make_wakeup()
         ExternalEventSource.__NAME += 1
         self.__name =  "{0}:{1}".format(type(self).__name__, ExternalEventSource.__NAME)
     
     
-    def source(self, src, dst, timestamp=None, **data):
+    def source(self, src, dst, timestamp=None, monotonic=None, **data):
         """
             Send a new event to the ICU system.
         
@@ -96,18 +495,64 @@ class ExternalEventSource:
             src (str): the name of the source object (a unique ID)
             dst (str): the name of the destination (sink) object (a unique ID), see get_event_sources() for a list of source IDs.
             timestamp (float, optional): floating point number expressed in seconds since the epoch, in UTC (see time.time()). Defaults to the current time (on event instantiation).
+            monotonic (int, optional): monotonic time (ns, see time.perf_counter_ns) e.g. when the event was observed by the agent. Defaults to the current time (on event instantiation).
+        """
+        event = Event(src, dst, timestamp=timestamp, monotonic=monotonic, **data)
+        self._send(encode(event))
+
+    def source_many(self, events):
+        """
+            Send many new events to the ICU system as a single message.
+
+        Args:
+            events (iterable): the events, each a dict of the arguments to source (src, dst, timestamp and monotonic (optional) and data), or an Event.
         """
-        event = Event(src, dst, timestamp=timestamp, **data)
-        #print("EXTERNAL-{0}: {1}".format(os.getpid(), event))
-        self.__buffer.put(event)
+        events = [e if isinstance(e, Event) else Event(**e) for e in events]
+        if events:
+            self._send(encode(events))
+
+    def _send(self, payload, block=True):
+        # raises queue.Full if block is False and there is no space (see icu.aio)
+        self.__buffer.put(payload, block=block)
+        if self.__wakeup is not None:
+            self.__wakeup.signal()
+
+    def _drain(self):
+        # all events that have arrived, in order. There is one wakeup signal per message (event or batch), a message may 
+        # be signalled before it can be read from a multiprocessing.Queue (its feeder thread is yet to write it) so wait for it
+        events = []
+        if self.__wakeup is None:
+            while not self.__buffer.empty():
+                ExternalEventSource.__unpack(decode(self.__buffer.get()), events)
+            return events
+        for _ in range(self.__wakeup.consume()):
+            try:
+                ExternalEventSource.__unpack(decode(self.__buffer.get(timeout=WAKEUP_TIMEOUT)), events)
+            except Empty:
+                break # the buffer was read elsewhere
+        return events
+
+    def __unpack(message, events):
+        if isinstance(message, list): # a batch (see source_many)
+            events.extend(message)
+        else:
+            events.append(message)
+
+    @property
+    def wakeup(self):
+        """ The Wakeup signalled when an event is sent, None if the source must be polled. """
+        return self.__wakeup
 
     def empty(self):
         return self.__buffer.empty()
 
     def size(self):
+        """ The number of messages (events or batches of events) waiting to be received by ICU. """
         return self.__buffer.qsize()
 
     def close(self):
+        if self.__wakeup is not None:
+            self.__wakeup.close()
         return self.__buffer.close()
 
     @property
@@ -120,37 +565,309 @@ class ExternalEventSource:
     def __repr__(self):
         return str(self)
 
+class Subscription:
+    """
+        Declares the events that an external sink is interested in, events that do not match are never sent to the sink.
+
+        Args:
+            src (str, list, optional): source name pattern(s) (see fnmatch, e.g. 'Pump:*'). Defaults to None (any source).
+            dst (str, list, optional): destination name pattern(s). Defaults to None (any destination).
+            labels (iterable, optional): event labels. Defaults to None (any label).
+            attrs (iterable, optional): attributes of 'change' events. Defaults to None (any attribute).
+
+        A 'delta' event (see ChangeBuffer) is subscribed to as if it were the 'change' events it replaces, src and attrs 
+        select the components and attributes it contains (see select).
+    """
+
+    def __init__(self, src=None, dst=None, labels=None, attrs=None):
+        super(Subscription, self).__init__()
+        self.src = Subscription.__patterns(src)
+        self.dst = Subscription.__patterns(dst)
+        self.labels = frozenset(labels) if labels is not None else None
+        self.attrs = frozenset(attrs) if attrs is not None else None
+
+    def __patterns(patterns):
+        if patterns is None:
+            return None
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        return re.compile("|".join(fnmatch.translate(p) for p in patterns))
+
+    def matches(self, src, dst, label, attr):
+        if self.labels is not None and label not in self.labels:
+            return False
+        if self.attrs is not None and label == 'change' and attr not in self.attrs:
+            return False
+        if self.src is not None and not self.src.match(str(src)):
+            return False
+        if self.dst is not None and not any(self.dst.match(str(d)) for d in (dst if isinstance(dst, (list, tuple)) else (dst,))):
+            return False
+        return True
+
+    def select(self, dst, changes):
+        """ The part of a 'delta' event that is subscribed to.
+
+        Args:
+            dst (str): destination of the event.
+            changes (dict): changes of the event, component -> {attr : value}.
+
+        Returns:
+            dict: the subscribed changes (changes itself if all of them are subscribed to), None if there are none.
+        """
+        if self.labels is not None and 'delta' not in self.labels and 'change' not in self.labels:
+            return None
+        if self.dst is not None and not self.dst.match(str(dst)):
+            return None
+        if self.src is None and self.attrs is None:
+            return changes
+        selected = {}
+        for component, attrs in changes.items():
+            if self.src is not None and not self.src.match(str(component)):
+                continue
+            if self.attrs is not None:
+                attrs = {attr:value for attr, value in attrs.items() if attr in self.attrs}
+                if not attrs:
+                    continue
+            selected[component] = attrs
+        return selected if selected else None
+
+# overflow policies of external sinks, what to do with an event when a sink is full (see ExternalEventSink)
+OVERFLOW_DROP_OLDEST = 'drop-oldest' # discard the oldest event in the sink
+OVERFLOW_DROP_NEWEST = 'drop-newest' # discard the new event
+OVERFLOW_COALESCE = 'coalesce'       # hold back 'change' and 'delta' events, keeping the latest value of each (component, attr), until there is space
+OVERFLOW_BLOCK = 'block'             # wait (at most timeout seconds) for space, then discard the new event
+OVERFLOW = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_COALESCE, OVERFLOW_BLOCK)
+
+SINK_CAPACITY = 10000 # events
+SINK_TIMEOUT = 0.05   # seconds
+
+# shared counters of an external sink (see ExternalEventSink.stats)
+_SENT, _RECEIVED, _EVICTED, _DROPPED, _COALESCED, _MAX_LAG = range(6)
+
 class ExternalEventSink:
     """
         A thread-safe event sink to be used externally as a 
         mechanism for receiving events from the ICU system.
+
+        By default the sink receives every event, see Subscription for the keyword arguments that 
+        restrict this. The subscription must be given before the sink is added to ICU.
+
+        Events are received through a transport, a multiprocessing.Queue by default, see icu.transport 
+        (e.g. transport='ring' for a shared memory RingBuffer, a single consumer thread is then required).
+
+        A sink holds at most `capacity` events that have not been received, when it is full new events are 
+        handled according to the overflow policy (see OVERFLOW), by default 'drop-oldest', or 'drop-newest' for a 
+        RingBuffer (it has a single consumer). The sink is also full when its transport is. Counters (see stats) are 
+        kept in shared memory so they can be queried from any process.
+
+        If wakeup is True a Wakeup is signalled whenever an event is put in the sink, so that the receiver can 
+        wait for events without polling (see icu.aio.AsyncEventSink).
     """
     __NAME = 0
 
+    _encode = staticmethod(encode) # events are sent pickled (see FanOut)
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, src=None, dst=None, labels=None, attrs=None, transport=None, 
+                 capacity=SINK_CAPACITY, overflow=None, timeout=SINK_TIMEOUT, wakeup=False, **kwargs):
         super(ExternalEventSink, self).__init__(*args, **kwargs)
-        self.__buffer = Queue()
+        if overflow is not None and overflow not in OVERFLOW:
+            raise ValueError("Invalid overflow policy: {0}, must be one of {1}".format(overflow, OVERFLOW))
+        # a ring buffer holds as many events as the sink (see RingBuffer.capacity)
+        self.__buffer = make_transport(transport, capacity=capacity) if transport == 'ring' else make_transport(transport)
+        if isinstance(self.__buffer, RingBuffer):
+            capacity = min(capacity, self.__buffer.capacity)
+            if overflow is None:
+                overflow = OVERFLOW_DROP_NEWEST
+            elif overflow == OVERFLOW_DROP_OLDEST:
+                self.__buffer.close()
+                raise ValueError("Overflow policy: {0} requires a transport with multiple consumers, e.g. 'queue'".format(overflow))
+        elif overflow is None:
+            overflow = OVERFLOW_DROP_OLDEST
         ExternalEventSink.__NAME += 1
         self.__name =  "{0}:{1}".format(type(self).__name__, ExternalEventSink.__NAME)
+        self.subscription = Subscription(src=src, dst=dst, labels=labels, attrs=attrs)
+        self.capacity = capacity
+        self.overflow = overflow
+        self.timeout = timeout
+        self.__counters = Array('Q', 6, lock=False) # each counter is written by one process only
+        self.__pending = {} # coalesced 'change' events waiting for space (src, attr) -> payload
+        self.__delta = None # coalesced 'delta' events waiting for space, merged into one (see __coalesce)
+        self.__oversized = 0 # events that did not fit in the transport
+        self.__wakeup = make_wakeup(block=False) if wakeup else None # ICU never waits for the receiver
     
     def get(self):
         '''
             Pop from event buffer.
         '''
-        event = self.__buffer.get()
-        return event
+        payload = self.__buffer.get()
+        self.__counters[_RECEIVED] += 1
+        return decode(payload)
+
+    def get_many(self, max_n=None, timeout=None):
+        """ Pop all events that are available from the event buffer, waiting for the first.
+
+        Args:
+            max_n (int, optional): maximum number of events. Defaults to None (no limit).
+            timeout (float, optional): maximum time (seconds) to wait for the first event. Defaults to None (no limit).
+
+        Returns:
+            list: events in the order they were sent, empty if the timeout expired.
+        """
+        return [decode(payload) for payload in self._get_payloads(max_n=max_n, timeout=timeout)]
+
+    def _get_payloads(self, max_n=None, timeout=None):
+        # as get_many, the events are not decoded (see icu.broker)
+        buffer = self.__buffer
+        try:
+            payloads = [buffer.get(timeout=timeout)]
+        except Empty:
+            return []
+        try:
+            while max_n is None or len(payloads) < max_n:
+                payloads.append(buffer.get_nowait())
+        except Empty:
+            pass
+        self.__counters[_RECEIVED] += len(payloads)
+        return payloads
+
+    def drain(self):
+        """ Pop all events that are available from the event buffer without waiting.
+
+        Returns:
+            list: events in the order they were sent.
+        """
+        return self.get_many(timeout=0)
+
+    def _put(self, payload, event):
+        # payload is an encoded event (see encode), shared by all sinks
+        if self.__pending or self.__delta is not None:
+            self._flush()
+        if self.size() < self.capacity and self.__send(payload):
+            return
+
+        counters = self.__counters
+        overflow = self.overflow
+        if overflow == OVERFLOW_DROP_OLDEST:
+            try:
+                self.__buffer.get_nowait()
+                counters[_EVICTED] += 1
+            except Empty: # still on its way (see multiprocessing.Queue), cannot make space
+                counters[_DROPPED] += 1
+                return
+            if not self.__send(payload):
+                counters[_DROPPED] += 1
+        elif overflow == OVERFLOW_COALESCE and event.data.get('label', None) == 'change':
+            key = (event.src, event.data.get('attr', None))
+            if key in self.__pending:
+                counters[_COALESCED] += 1
+            self.__pending[key] = payload
+        elif overflow == OVERFLOW_COALESCE and event.data.get('label', None) == 'delta':
+            self.__coalesce(event)
+        elif overflow == OVERFLOW_BLOCK:
+            end = monotonic() + self.timeout
+            while self.size() >= self.capacity or not self.__send(payload):
+                if monotonic() > end:
+                    counters[_DROPPED] += 1
+                    return
+                pause(0.001)
+        else:
+            counters[_DROPPED] += 1
+
+    def __coalesce(self, event):
+        # merge a 'delta' event into the pending delta, the latest value, id and cause of each (component, attr) 
+        # are kept and the writes are counted (see ChangeBuffer)
+        data = event.data
+        delta = self.__delta
+        if delta is None:
+            delta = self.__delta = event.copy()
+            delta.data = EventData(dict(label='delta', changes={}, counts={}, ids={}, causes={}))
+        else:
+            self.__counters[_COALESCED] += 1
+            delta.name, delta.timestamp, delta.monotonic = event.name, event.timestamp, event.monotonic
+        merged = delta.data
+        ids, causes = data.get('ids', {}), data.get('causes', {})
+        for component, attrs in data.changes.items():
+            merged.changes.setdefault(component, {}).update(attrs)
+            counts = merged.counts.setdefault(component, {})
+            for attr, n in data.counts.get(component, {}).items():
+                counts[attr] = counts.get(attr, 0) + n
+            merged.ids.setdefault(component, {}).update(ids.get(component, {}))
+            caused, merged_causes = causes.get(component, {}), merged.causes.setdefault(component, {})
+            for attr in attrs:
+                if attr in caused:
+                    merged_causes[attr] = caused[attr]
+                else:
+                    merged_causes.pop(attr, None)
+
+    def __send(self, payload):
+        # False if the transport is full (see _put), ICU never waits for the receiver here
+        counters = self.__counters
+        try:
+            self.__buffer.put(payload, block=False)
+        except Full:
+            return False
+        except ValueError as e: # the payload does not fit in the transport (see RingBuffer), errors stay in the sink
+            if not self.__oversized: # reported once
+                print("{0}: event dropped, {1}".format(self.name, e))
+            self.__oversized += 1
+            counters[_DROPPED] += 1
+            return True
+        counters[_SENT] += 1
+        lag = self.size()
+        if lag > counters[_MAX_LAG]:
+            counters[_MAX_LAG] = lag
+        if self.__wakeup is not None:
+            self.__wakeup.signal()
+        return True
+
+    def _flush(self):
+        # send coalesced events while there is space
+        pending = self.__pending
+        while pending and self.size() < self.capacity:
+            key = next(iter(pending))
+            if not self.__send(pending[key]):
+                break
+            del pending[key]
+        delta = self.__delta
+        if delta is not None and self.size() < self.capacity:
+            causes = delta.data.causes
+            delta.data.causes = {component:attrs for component, attrs in causes.items() if attrs}
+            if self.__send(self._encode(delta)):
+                self.__delta = None
+            else:
+                delta.data.causes = causes
+
+    def stats(self):
+        """ Counters of this sink, may be called from any process.
+
+        Returns:
+            dict: sent (events put in the sink), received (events got from the sink), dropped (events discarded by the overflow 
+                policy), coalesced (change and delta events replaced by a later one), lag (events waiting to be received), 
+                max_lag (largest lag so far), pending (coalesced events waiting for space, ICU process only).
+        """
+        counters = self.__counters
+        return dict(sent=counters[_SENT], received=counters[_RECEIVED], dropped=counters[_DROPPED] + counters[_EVICTED],
+                    coalesced=counters[_COALESCED], lag=self.size(), max_lag=counters[_MAX_LAG], 
+                    pending=len(self.__pending) + (self.__delta is not None))
         
     def full(self):
-        return self.__buffer.full()
+        return self.size() >= self.capacity
 
     def empty(self):
         return self.__buffer.empty()
 
     def size(self):
-        return self.__buffer.qsize()
+        counters = self.__counters
+        return counters[_SENT] - counters[_RECEIVED] - counters[_EVICTED]
+
+    @property
+    def wakeup(self):
+        """ The Wakeup signalled when an event is put in the sink, None unless the sink was created with wakeup=True. """
+        return self.__wakeup
 
     def close(self):
+        if self.__wakeup is not None:
+            self.__wakeup.close()
         return self.__buffer.close()
 
     @property
@@ -163,6 +880,97 @@ class ExternalEventSink:
     def __repr__(self):
         return str(self)
 
+def _select(values, selected):
+    # the values (component -> {attr : value}) of the selected attrs of a delta (see Subscription.select)
+    result = {}
+    for component, attrs in selected.items():
+        found = values.get(component)
+        if found is not None:
+            found = {attr:found[attr] for attr in attrs if attr in found}
+            if found:
+                result[component] = found
+    return result
+
+class FanOut:
+    """
+        Sends events to external sinks, each sink is sent the events it subscribes to (see Subscription). An event 
+        is encoded once, sinks that are sent the same event share its payload. Routes are computed once for each 
+        (src, dst, label, attr) and must be cleared when the sinks change (see clear).
+
+    Args:
+        sinks (dict): name -> external sink, the dict is shared (not copied).
+    """
+
+    def __init__(self, sinks):
+        super(FanOut, self).__init__()
+        self.sinks = sinks
+        self.__routes = {} # (src, dst, label, attr) -> external sinks (see route)
+
+    def clear(self):
+        self.__routes.clear()
+
+    def send(self, event, payload=None):
+        """ Send an event to the sinks that subscribe to it. Each sink is given the event encoded by its _encode, 
+            the pickled payload (see encode) is made at most once, and only if a sink uses it.
+
+        Args:
+            event (Event): the event.
+            payload (bytes, optional): the encoded event (see encode) if it has been encoded already. Defaults to None.
+        """
+        if self.sinks:
+            if event.data.get('label', None) == 'delta':
+                return self.__send_delta(event, payload)
+            for sink in self.route(event):
+                encoder = sink._encode
+                if encoder is encode:
+                    if payload is None:
+                        payload = encode(event) # once, the (immutable) payload is shared by all sinks
+                    sink._put(payload, event)
+                else:
+                    sink._put(encoder(event), event) # e.g. a bridge connection (see icu.bridge.Bridge.encode)
+
+    def __send_delta(self, event, payload):
+        # each sink receives the part of a delta it subscribes to (see Subscription.select), sinks that subscribe 
+        # to the same part share a payload
+        data = event.data
+        changes = data.changes
+        deltas = {None : (event, payload)} # key -> (delta, pickled payload)
+        for sink in self.sinks.values():
+            selected = sink.subscription.select(event.dst, changes)
+            if selected is None:
+                continue
+            key = None if selected is changes else tuple((component, tuple(attrs)) for component, attrs in selected.items())
+            delta, payload = deltas.get(key, (None, None))
+            if delta is None:
+                delta = event.copy()
+                delta.data = EventData(dict(label='delta', changes=selected, counts=_select(data.counts, selected), 
+                                            ids=_select(data.get('ids', {}), selected), causes=_select(data.get('causes', {}), selected)))
+            encoder = sink._encode
+            if encoder is encode:
+                if payload is None:
+                    payload = encode(delta)
+                sink._put(payload, delta)
+            else:
+                sink._put(encoder(delta), delta)
+            deltas[key] = (delta, payload)
+
+    def route(self, event):
+        """ The external sinks subscribed to an event (other than a 'delta' event, see Subscription.select).
+
+        Returns:
+            tuple: sinks.
+        """
+        label = event.data.get('label', None)
+        attr = event.data.get('attr', None) if label == 'change' else None
+        dst = tuple(event.dst) if isinstance(event.dst, list) else event.dst
+        key = (event.src, dst, label, attr)
+        try:
+            return self.__routes[key]
+        except KeyError:
+            sinks = tuple(sink for sink in self.sinks.values() if sink.subscription.matches(*key))
+            self.__routes[key] = sinks
+            return sinks
+
 #EVENT_SINKS = {}
 #EVENT_SOURCES = {}
     
@@ -170,18 +978,56 @@ class GlobalEventCallback:
 
     def __init__(self, logger):
         if logger is None:
-            self.logger = lambda _: None
+            self.logger = NullLogger()
         else:
             self.logger = logger
 
         self.external_sinks = {}
         self.external_sources = {}
+        self.__fanout = FanOut(self.external_sinks)
 
         self.sinks = {}
         self.sources = {}
+        self.__handlers = {} # (dst, label) -> handler (see __resolve)
+        self.unhandled = {} # (dst, label) -> number of events that no handler accepted (see EventCallback.sink)
         self.__closed = False
+        self.changes = ChangeBuffer()
+        self.causes = CausalIndex()
+        self.__polled = None # external sources that are polled (see schedule_external)
+        self.__watched = [] # file descriptors watched by the event schedular
+        self.profiler = None
+
+    def profile(self, enable=True):
+        """ Enable (or disable) profiling of event dispatch (see Profiler). There is no overhead when disabled, 
+            the profiled halves of dispatch replace _apply and _publish, so events that are applied and published 
+            separately (merged catch up, see Periodic) are profiled too.
+
+        Args:
+            enable (bool, optional): enable or disable. Defaults to True.
+
+        Returns:
+            Profiler: the profiler, None if disabled.
+        """
+        if enable:
+            if self.profiler is None:
+                self.profiler = Profiler()
+            self._apply = self.__apply_profiled
+            self._publish = self.__publish_profiled
+        else:
+            self.profiler = None
+            self.__dict__.pop('_apply', None)
+            self.__dict__.pop('_publish', None)
+        return self.profiler
 
     def close(self):
+        self._trigger(self.changes.take()) # changes in the last frame
+        if self.profiler is not None:
+            print(self.profiler.table())
+            for (dst, label), n in self.unhandled.items():
+                print("unhandled: {0} {1} x {2}".format(dst, label, n))
+        for fd in self.__watched:
+            _session.schedular.unwatch(fd)
+        self.__watched.clear()
         for sink in self.external_sinks.values():
             sink.close()
         for source in self.external_sources.values():
@@ -195,25 +1041,73 @@ class GlobalEventCallback:
         return self.__closed
 
     def _trigger(self, event):
-        if event is not None:
-            if event.dst in self.sinks:
-                self.sinks[event.dst].sink(event)
-            self.__sink_external(event) #send to all external sinks
-            self.logger.log(event)
+        self._apply(event)
+        self._publish(event)
 
     def trigger(self, *events): 
         for event in events:
             self._trigger(event)
 
-    def __sink_external(self, event): # TODO this could be changed at some point... a more advanced event system is needed
-        if "Pump" in event.src:
-            pass #print("EXTERNAL: ", event)
-        
-        for sink in self.external_sinks.values():
-            sink._ExternalEventSink__buffer.put(copy.deepcopy(event))
+    def _apply(self, event):
+        # the event is handled by its sink but not published (see _publish, Periodic)
+        if event is not None:
+            data = event.data.__dict__
+            if 'cause' in data:
+                self.causes.add_event(event)
+            key = (event.dst, data.get('label', None))
+            try:
+                handler = self.__handlers[key]
+            except KeyError:
+                handler = self.__resolve(key)
+            if handler is not None:
+                handler(event)
+
+    def _publish(self, event):
+        # the event is sent to external sinks and logged (see _apply)
+        if event is not None:
+            self.__fanout.send(event)
+            self.logger.log(event)
+            pool = getattr(event, 'pool', None) # events of other classes may have no pool
+            if pool is not None:
+                pool.release(event)
+
+    def __apply_profiled(self, event):
+        # _apply, timing the handler
+        if event is not None:
+            start = perf_counter()
+            GlobalEventCallback._apply(self, event)
+            if event.dst in self.sinks: # events that no sink handles are not counted
+                self.profiler.add((event.dst, event.data.get('label', None)), perf_counter() - start)
+
+    def __publish_profiled(self, event):
+        # _publish, timing external sinks and logging
+        if event is not None:
+            profiler = self.profiler
+            start = perf_counter()
+            self.__fanout.send(event)
+            logging = perf_counter()
+            self.logger.log(event)
+            end = perf_counter()
+            profiler.add(PROFILE_EXTERNAL, logging - start)
+            profiler.add(PROFILE_LOGGING, end - logging)
+            pool = getattr(event, 'pool', None)
+            if pool is not None:
+                pool.release(event)
+
+    def __resolve(self, key):
+        # the handler of events sent to dst with label, None if there is no such sink. Sinks that register handlers 
+        # (see handles) are called directly, sink() handles the rest (and counts unhandled labels, see EventCallback.sink)
+        dst, label = key
+        sink = self.sinks.get(dst)
+        handler = None
+        if sink is not None:
+            handler = getattr(sink, 'handlers', {}).get(label, sink.sink)
+        self.__handlers[key] = handler
+        return handler
 
     def register_sink(self, name, sink):
         self.sinks[name] = sink
+        self.__handlers.clear()
     
     def register_source(self, name, source):
         self.sources[name] = source
@@ -221,95 +1115,358 @@ class GlobalEventCallback:
     def register_external_source(self, name, source):
         assert isinstance(source, ExternalEventSource)
         self.external_sources[name] = source
+        if self.__polled is not None: # already dispatching external events
+            self.__schedule_external(source)
 
     def register_external_sink(self, name, sink):
-        assert isinstance(sink, ExternalEventSink)
+        assert hasattr(sink, '_put') and hasattr(sink, '_encode') # an ExternalEventSink, or another sink with the same interface (e.g. icu.bridge.Connection)
         self.external_sinks[name] = sink
+        self.__fanout.clear()
+        if self.__polled is not None: # already dispatching external events
+            self.__schedule_flush()
+
+    def remove_external_sink(self, name):
+        """ Remove an external sink, it receives no more events (it is not closed). """
+        self.external_sinks.pop(name, None)
+        self.__fanout.clear()
 
     def schedule_external(self, sleep=50):
-        def _event_iterator(source):
-            while not source.empty():
-                event =  source._ExternalEventSource__buffer.get()
-                if isinstance(event.dst, (list, tuple)): #if multiple destinations
-                    for dst in event.dst:
-                        e = copy.deepcopy(event) #not efficient... oh well
-                        e.dst = dst
-                        yield e
-                else:
-                    yield event
+        """ Dispatch events from external sources as soon as they arrive. Each source is watched by the 
+            event schedular (see Schedular.watch), sources that cannot be watched are polled every `sleep` ms.
+
+        Args:
+            sleep (int, optional): polling period (ms). Defaults to 50.
+        """
+        self.__poll_sleep = sleep
+        self.__polled = []
+        self.__watched = []
+        self.__flushing = False
+        for source in self.external_sources.values():
+            self.__schedule_external(source)
+        self.__schedule_flush()
+
+    def __schedule_flush(self):
+        # coalescing sinks hold back events when they are full, these are sent every `sleep` ms as space becomes available
+        if not self.__flushing and any(sink.overflow == OVERFLOW_COALESCE for sink in self.external_sinks.values()):
+            self.__flushing = True
+            _session.schedular.after(self.__poll_sleep, self.__flush_external)
+
+    def __flush_external(self):
+        for sink in self.external_sinks.values():
+            sink._flush()
+        _session.schedular.after(self.__poll_sleep, self.__flush_external)
+
+    def __schedule_external(self, source):
+        wakeup = source.wakeup
+        if wakeup is not None and _session.schedular.watch(wakeup.fileno(), self.__dispatch_external, source):
+            self.__watched.append(wakeup.fileno())
+            return
+        self.__polled.append(source)
+        if len(self.__polled) == 1:
+            _session.schedular.after(self.__poll_sleep, self.__poll_external)
+
+    def __poll_external(self):
+        for source in self.__polled:
+            self.__dispatch_external(source)
+        _session.schedular.after(self.__poll_sleep, self.__poll_external)
+
+    def __dispatch_external(self, source):
+        # all events that have arrived are dispatched together
+        self._dispatch(source._drain())
+
+    def _dispatch(self, events):
+        # events from outside ICU (external sources, see also icu.bridge) are dispatched immediately
+        handlers = self.__handlers
+        for event in events:
+            label = event.data.get('label', None)
+            for dst in (event.dst if isinstance(event.dst, (list, tuple)) else (event.dst,)): #if multiple destinations
+                key = (dst, label)
+                handler = handlers[key] if key in handlers else self.__resolve(key)
+                if handler is not None:
+                    handler(event if dst is event.dst else event.copy(dst=dst))
+
+from .log import AsyncEventLogger, NullLogger #TODO MOVE
+
+class Session:
+    """
+        The state of one ICU session: the event bus (see GlobalEventCallback), the event schedular, the clocks that 
+        stamp new events, the event pool and the registries of components (see registry). Sessions are independent, 
+        several may run in one process (e.g. headless sessions with VirtualSchedulars, see event_schedular).
+
+        New events, components and the module functions use the current session (see activate). Schedulars and 
+        event callbacks belong to the session that was current when they were created, they activate it again before 
+        running callbacks or sourcing events, so interleaved sessions do not see each other's events.
+
+            with Session(log=None) as session:
+                schedular = event_schedular('virtual')
+                ...
+            schedular.run()
+
+    Args:
+        log (str, EventLogger, optional): event log file (written on a background thread, see AsyncEventLogger) or logger, 
+            each session needs its own. Defaults to None (no logging).
+    """
 
-        def _trigger():
-            for source in self.external_sources.values():
-                for event in _event_iterator(source):
-                    #print(" -- EXTERNAL:", event)
-                    if event is not None and event.dst in self.sinks:
-                        self.sinks[event.dst].sink(event)
-            event_scheduler.after(sleep, _trigger)
+    def __init__(self, log=None):
+        super(Session, self).__init__()
+        if isinstance(log, str):
+            log = AsyncEventLogger(log)
+        self.bus = GlobalEventCallback(log)
+        self.schedular = None
+        self.clock = time                      # time source for new events (seconds since the epoch)
+        self.monotonic_clock = perf_counter_ns # high resolution monotonic time source for new events (ns)
+        self.anchor = (time(), perf_counter_ns()) # (wall-clock time, monotonic time) taken together (see to_wall)
+        self.event_pool = None
+        self.__registries = {}
+        self.__previous = []
+
+    def registry(self, name, factory=dict):
+        """ A registry of this session (e.g. the components of a widget class), created on first use.
 
-        event_scheduler.after(sleep, _trigger)
+        Args:
+            name (str): registry name.
+            factory (callable, optional): creates the registry. Defaults to dict.
+        """
+        registry = self.__registries.get(name)
+        if registry is None:
+            registry = self.__registries[name] = factory()
+        return registry
+
+    def activate(self):
+        """ Make this the current session (until deactivate).
+
+        Returns:
+            Session: the previous current session.
+        """
+        global _session
+        previous, _session = _session, self
+        self.__previous.append(previous)
+        return previous
+
+    def deactivate(self):
+        """ Make the session that was current before the last activate the current session again. """
+        global _session
+        if self.__previous:
+            _session = self.__previous.pop()
+
+    def __enter__(self):
+        self.activate()
+        return self
+
+    def __exit__(self, *args):
+        self.deactivate()
+
+    def close(self):
+        """ Close the event bus and schedular, the session that was current before it was activated is restored. """
+        with self:
+            self.bus.close()
+            if self.schedular is not None:
+                self.schedular.close()
+        while _session is self and self.__previous:
+            self.deactivate()
+
+    def __str__(self):
+        return "{0}({1})".format(type(self).__name__, self.schedular)
+
+    def __repr__(self):
+        return str(self)
 
-from .log import EventLogger #TODO MOVE
 # ===  GLOBAL === #
-GLOBAL_EVENT_CALLBACK = GlobalEventCallback(EventLogger('event_log.txt'))
-global event_scheduler
-event_scheduler = None
+_session = Session() # the current session (see Session.activate)
+
+def session():
+    """ The current session. """
+    return _session
+
+_SESSION_ATTRIBUTES = {'GLOBAL_EVENT_CALLBACK' : 'bus', 'event_scheduler' : 'schedular', 'clock' : 'clock', 
+                       'monotonic_clock' : 'monotonic_clock', 'anchor' : 'anchor', 'event_pool' : 'event_pool'}
+
+def __getattr__(name):
+    # the former module globals are attributes of the current session
+    if name in _SESSION_ATTRIBUTES:
+        return getattr(_session, _SESSION_ATTRIBUTES[name])
+    raise AttributeError("module {0} has no attribute {1}".format(__name__, name))
 
 def get_event_sources():
-    return list(GLOBAL_EVENT_CALLBACK.sources.keys())
+    return list(_session.bus.sources.keys())
 
 def get_event_sinks():
-    return list(GLOBAL_EVENT_CALLBACK.sinks.keys())
+    return list(_session.bus.sinks.keys())
 
 def get_external_event_sinks():
-    return list(GLOBAL_EVENT_CALLBACK.external_sinks.keys())
+    return list(_session.bus.external_sinks.keys())
 
 def get_external_event_sources():
-    return list(GLOBAL_EVENT_CALLBACK.external_sources.keys())
+    return list(_session.bus.external_sources.keys())
 
 def add_event_source(source):
     '''
         Add an external event source to ICU. Any events generated by 
         this source will be propagated to an ICU event sink.
     '''
-    GLOBAL_EVENT_CALLBACK.register_external_source(source.name, source)
+    _session.bus.register_external_source(source.name, source)
 
 def add_event_sink(sink):
     '''
         Add an external event sink to ICU. This event sink will receive 
         all events that are generated by the ICU system.
     '''
-    GLOBAL_EVENT_CALLBACK.register_external_sink(sink.name, sink)
+    _session.bus.register_external_sink(sink.name, sink)
+
+def remove_event_sink(sink):
+    '''
+        Remove an external event sink from ICU, it will receive no more events.
+    '''
+    _session.bus.remove_external_sink(sink.name)
 
-#TODO function for removing external event_source/sink? 
+#TODO function for removing external event_source? 
 
 # ============ INTERNAL ============ #
 
+def handles(*labels):
+    """ Register an EventCallback method as the handler of events with the given labels (see EventCallback.sink).
+
+        Example:
+            @handles(EVENT_LABEL_CLICK)
+            def click_callback(self, event):
+                ...
+
+    Args:
+        labels (str): event labels.
+    """
+    def decorator(fun):
+        fun.__handles__ = labels
+        return fun
+    return decorator
+
 class EventCallback:
     '''
-        Used internally by widgets that can receive and generate events.
+        Used internally by widgets that can receive and generate events. Events are handled by the methods 
+        registered for their label (see handles), or by overriding sink. A class that overrides sink receives 
+        the events of the handlers registered by its base classes, only its own handlers (and those of its 
+        subclasses) are called directly.
     '''
 
+    __handlers__ = {} # label -> method name, collected for each subclass (see handles)
+
+    def __init_subclass__(cls, **kwargs):
+        super(EventCallback, cls).__init_subclass__(**kwargs)
+        handlers = {}
+        for base in reversed(cls.__mro__): # subclasses may register other methods for the same labels
+            attrs = vars(base)
+            if 'sink' in attrs and base is not EventCallback: # sink overrides the handlers of the classes above it
+                handlers.clear()
+            for name, attr in attrs.items():
+                for label in getattr(attr, '__handles__', ()):
+                    handlers[label] = name
+        cls.__handlers__ = handlers
+
     def __init__(self, *args, **kwargs):
         super(EventCallback, self).__init__(*args, **kwargs)
 
 
     def register(self, name):
         self.__name = name
-        GLOBAL_EVENT_CALLBACK.register_sink(self.__name, self)
-        GLOBAL_EVENT_CALLBACK.register_source(self.__name, self)
-
-    def source(self, dst, timestamp=None, **data):
-        e = Event(self.name, dst, timestamp=timestamp, **data)
-        global event_scheduler
-        event_scheduler.schedule(e, sleep=0)
-
-    def sink(self, event): #override this method
-        pass
+        self.session = _session # callbacks belong to the current session (see Session)
+        self.handlers = {label:getattr(self, attr) for label, attr in type(self).__handlers__.items()}
+        self.session.bus.register_sink(self.__name, self)
+        self.session.bus.register_source(self.__name, self)
+
+    def source(self, dst, timestamp=None, priority=None, monotonic=None, **data):
+        global _session
+        _session = self.session # e.g. from a tk binding
+        e = Event(self.name, dst, timestamp=timestamp, monotonic=monotonic, **data)
+        self.session.schedular.push(e, priority=priority)
+
+    def sink(self, event): 
+        # events without a handler, they are counted (see GlobalEventCallback.unhandled)
+        handler = self.handlers.get(event.data.get('label', None))
+        if handler is not None:
+            return handler(event)
+        key = (self.__name, event.data.get('label', None))
+        unhandled = self.session.bus.unhandled
+        unhandled[key] = unhandled.get(key, 0) + 1
 
     @property
     def name(self):
         return self.__name
 
+PROFILE_EXTERNAL = ('*', 'external') # time spent sending events to external sinks
+PROFILE_LOGGING = ('*', 'logging')   # time spent logging events
+
+class Profiler(EventCallback):
+    """
+        Dispatch statistics (see GlobalEventCallback.profile), the number of calls, total and max time of sink() 
+        for each (dst, label) and of logging and sending to external sinks (see PROFILE_LOGGING, PROFILE_EXTERNAL).
+
+        The statistics are printed as a table when ICU closes and can be queried with an event: 
+        send label='profile' to 'Profiler' and a 'profile' event with the statistics (see stats) is sent to Global, 
+        label='reset' clears them.
+    """
+
+    def __init__(self):
+        super(Profiler, self).__init__()
+        self.__stats = {} # (dst, label) -> [count, total, max]
+        self.register(type(self).__name__)
+
+    def add(self, key, elapsed):
+        """ Record a call (seconds). """
+        stat = self.__stats.get(key)
+        if stat is None:
+            self.__stats[key] = [1, elapsed, elapsed]
+        else:
+            stat[0] += 1
+            stat[1] += elapsed
+            if elapsed > stat[2]:
+                stat[2] = elapsed
+
+    def stats(self):
+        """ The statistics.
+
+        Returns:
+            dict: (dst, label) -> dict(count, total, mean, max), times are in seconds.
+        """
+        return {key:dict(count=count, total=total, mean=total / count, max=max) for key, (count, total, max) in self.__stats.items()}
+
+    def reset(self):
+        self.__stats.clear()
+
+    def table(self):
+        """ The statistics as a table, slowest (total time) first. """
+        rows = ["{0:<32} {1:<12} {2:>10} {3:>12} {4:>10} {5:>10}".format("dst", "label", "count", "total (ms)", "mean (us)", "max (ms)")]
+        for (dst, label), stat in sorted(self.stats().items(), key=lambda item: -item[1]['total']):
+            rows.append("{0:<32} {1:<12} {2:>10} {3:>12.2f} {4:>10.1f} {5:>10.3f}".format(str(dst), str(label), stat['count'], 
+                        stat['total'] * 1000, stat['mean'] * 1000000, stat['max'] * 1000))
+        return "\n".join(rows)
+
+    @handles('profile')
+    def profile_callback(self, event):
+        self.source('Global', label='profile', stats=self.stats(), unhandled=dict(self.session.bus.unhandled))
+
+    @handles('reset')
+    def reset_callback(self, event):
+        self.reset()
+
+CAUSAL_QUERIES = ('record', 'cause', 'effects', 'chain', 'consequences') # see CausalIndex
+
+class CausalQuery(EventCallback):
+    """
+        Queries of the causal index of the session (see CausalIndex) from outside the ICU process: send an event with 
+        one of the CAUSAL_QUERIES as label and id=<event or change id> to 'CausalIndex', an event with the same label, 
+        the id and the result is sent to Global. Ids of changes are given by 'change' events and by 'delta' events 
+        (see ChangeBuffer).
+    """
+
+    def __init__(self, causes):
+        super(CausalQuery, self).__init__()
+        self.causes = causes
+        self.register('CausalIndex')
+
+    @handles(*CAUSAL_QUERIES)
+    def query_callback(self, event):
+        label, id = event.data.label, event.data.id
+        self.source('Global', label=label, id=id, result=getattr(self.causes, label)(id))
+
 def sleep_repeat_int(sleep):
     while True:
         yield sleep
@@ -331,54 +1488,693 @@ class EGen:
         else:
             return e
 
-class TKSchedular: #might be better to detach events from the GUI? quick and dirty for now...
+# catch up policies for periodic events that have missed their deadline (see Periodic)
+CATCHUP_REPLAY = 'replay' # trigger the events of every missed tick
+CATCHUP_MERGE = 'merge'   # apply the events of every missed tick, publish them merged into one (see merge_events)
+CATCHUP = (CATCHUP_REPLAY, CATCHUP_MERGE)
 
-    def __init__(self, tk_root):
-        self.tk_root = tk_root
+MERGE_FIELDS = ('value', 'dx', 'dy') # numeric event data that is summed when events are merged
+
+def merge_events(*ticks):
+    """ Merge the events of several ticks into one event per (src, dst, label), the MERGE_FIELDS of merged events are summed.
+        The events must already have been applied in order (see Periodic), so the sums are the amounts that were applied.
+
+    Args:
+        ticks (tuple): events (e1, ...) generated at each tick.
+
+    Returns:
+        tuple: merged events (e1, ...).
+    """
+    merged = {}
+    for events in ticks:
+        for e in events:
+            if e is None:
+                continue
+            key = (e.src, e.dst, e.data.get('label', None))
+            m = merged.get(key)
+            if m is None:
+                merged[key] = e
+            else:
+                for field in MERGE_FIELDS:
+                    if field in e.data and field in m.data:
+                        m.data[field] += e.data[field]
+    return tuple(merged.values())
+
+class Drift:
+    """
+        Drift statistics of a periodic event generator, how late (ms) each tick was triggered relative to its deadline.
+    """
+
+    def __init__(self):
+        super(Drift, self).__init__()
+        self.count = 0      # number of times the generator was triggered
+        self.missed = 0     # ticks that were caught up (see CATCHUP)
+        self.total = 0.     # total lateness
+        self.max = 0.       # max lateness
+
+    def update(self, late, missed):
+        self.count += 1
+        self.missed += missed
+        self.total += late
+        self.max = max(self.max, late)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count > 0 else 0.
+
+    def to_dict(self):
+        return dict(count=self.count, missed=self.missed, mean=self.mean, max=self.max)
+
+    def __str__(self):
+        return "Drift(count={0}, missed={1}, mean={2:.2f}ms, max={3:.2f}ms)".format(self.count, self.missed, self.mean, self.max)
+
+    def __repr__(self):
+        return str(self)
+
+class Handle:
+    """
+        A handle to a scheduled callback (see Schedular.schedule) that can be cancelled or rescheduled while it is alive.
+    """
+
+    def __init__(self, schedular, key, fun, *args):
+        super(Handle, self).__init__()
+        self.schedular = schedular
+        self.key = key
+        self.fun = fun
+        self.args = args
+        self._alive = True
+        self._generation = 0 # callbacks scheduled before a cancel/reschedule are ignored
+
+    @property
+    def alive(self):
+        return self._alive
+
+    def start(self, sleep):
+        self.schedular.after(sleep, self._trigger, self._generation)
+
+    def _trigger(self, generation):
+        if self._alive and generation == self._generation:
+            self._done()
+            self.fun(*self.args)
+
+    def _done(self):
+        self._alive = False
+        self.schedular._release(self)
+
+    def cancel(self):
+        """ Cancel the callback, it will not be called. """
+        if self._alive:
+            self._generation += 1
+            self._done()
+
+    def reschedule(self, sleep):
+        """ Reschedule the callback to be called after sleep ms (from now).
+
+        Args:
+            sleep (int): new delay (ms).
+        """
+        if not self._alive:
+            raise ValueError("Cannot reschedule {0}, it is no longer alive.".format(self))
+        self._generation += 1
+        self.start(sleep)
+
+    def __str__(self):
+        return "{0}({1})".format(type(self).__name__, self.key)
+
+    def __repr__(self):
+        return str(self)
+
+class Periodic(Handle):
+    """
+        A repeating event generator scheduled against absolute deadlines. Each deadline is computed from the time the 
+        generator was scheduled rather than the time the previous tick was triggered, so callback cost and schedular 
+        latency do not accumulate. Ticks whose deadline passed while waiting are caught up according to the catchup policy.
+    """
+
+    def __init__(self, schedular, key, generator, sleep, catchup=CATCHUP_REPLAY):
+        super(Periodic, self).__init__(schedular, key, schedular.session.bus.trigger)
+        if catchup not in CATCHUP:
+            raise ValueError("Invalid catchup policy: {0}, must be one of {1}".format(catchup, CATCHUP))
+        self.generator = EGen(generator)
+        self.sleep = sleep
+        self.catchup = catchup
+        self.drift = Drift()
+        self.deadline = None
+
+    def start(self):
+        self.deadline = self.schedular.elapsed
+        try:
+            self.deadline += next(self.sleep)
+        except StopIteration:
+            return self._done()
+        self.schedular.after(max(0, self.deadline - self.schedular.elapsed), self._trigger, self._generation)
+
+    def _trigger(self, generation):
+        if not self._alive or generation != self._generation:
+            return
+        now = self.schedular.elapsed
+        late = now - self.deadline
+        bus = self.schedular.session.bus
+        merge = self.catchup == CATCHUP_MERGE
+        ticks = [] # applied events (merge)
+        n = 0
+        try:
+            while True:
+                # each tick is applied before the next is generated, missed ticks see the effects of the ones before them
+                events = next(self.generator)
+                n += 1
+                if merge:
+                    for e in events:
+                        bus._apply(e)
+                    ticks.append(events)
+                else:
+                    self.fun(*events)
+                if not self._alive or generation != self._generation: # cancelled by one of the events
+                    break
+                try:
+                    self.deadline += next(self.sleep)
+                except StopIteration:
+                    self.deadline = None
+                    break
+                if self.deadline > now:
+                    break
+        except StopIteration:
+            self.deadline = None
+        if self.deadline is None:
+            self._done()
+        if n > 0:
+            self.drift.update(late, n - 1)
+        if ticks: # the events that were applied, published as one per (src, dst, label)
+            for e in merge_events(*ticks):
+                bus._publish(e)
+        if self._alive and generation == self._generation: # may have been cancelled by one of the events
+            self.schedular.after(max(0, self.deadline - now), self._trigger, generation)
+
+    def cancel(self):
+        """ Cancel the generator, it will not be triggered again. """
+        if self._alive:
+            super(Periodic, self).cancel()
+            close = getattr(self.generator.gen, 'close', None)
+            if close is not None:
+                close()
+
+    def reschedule(self, sleep):
+        """ Reschedule the generator, deadlines are computed from now.
+
+        Args:
+            sleep (int, iterable): new delay (ms) or iterable of delays.
+        """
+        if not self._alive:
+            raise ValueError("Cannot reschedule {0}, it is no longer alive.".format(self))
+        self._generation += 1
+        self.sleep = iter(sleep) if not isinstance(sleep, (int, float)) else sleep_repeat_int(sleep)
+        self.start()
+
+# priority classes of immediate events, lower is more urgent (see Schedular.push)
+PRIORITY_INPUT = 0      # user input, clicks and key presses
+PRIORITY_STATE = 1      # task state, burn, transfer, change notifications etc.
+PRIORITY_TELEMETRY = 2  # high rate sensor data, eye tracking
+PRIORITIES = (PRIORITY_INPUT, PRIORITY_STATE, PRIORITY_TELEMETRY)
+
+PRIORITY_LABELS = {EVENT_LABEL_CLICK : PRIORITY_INPUT, 
+                   EVENT_LABEL_KEY : PRIORITY_INPUT, 
+                   'gaze' : PRIORITY_TELEMETRY, 
+                   'saccade' : PRIORITY_TELEMETRY, 
+                   'place' : PRIORITY_TELEMETRY} # everything else is PRIORITY_STATE
+
+FRAME_BUDGET = 10 # ms of immediate events to trigger before yielding to the GUI
+
+def priority_of(event):
+    """ The priority class of an event, derived from its label (see PRIORITY_LABELS). """
+    return PRIORITY_LABELS.get(event.data.get('label', None), PRIORITY_STATE)
+
+class Schedular:
+    """
+        Base class for event schedulars. Events (or event generators) are triggered after some delay (ms),
+        subclasses decide how time passes by implementing after(), time() and elapsed.
+
+        Immediate events are queued in priority lanes (see PRIORITIES) which are drained most urgent first, 
+        for at most frame_budget ms at a time, so that user input is not held up behind a flood of telemetry.
+
+        A schedular belongs to the session that is current when it is created (see Session), callbacks are run in 
+        that session (see _call).
+    """
+
+    def __init__(self, frame_budget=FRAME_BUDGET):
+        super(Schedular, self).__init__()
+        self.session = _session
+        self.frame_budget = frame_budget
+        self.__created = monotonic()
+        self.__drift = {}
+        self.__live = {}
+        self.__count = count()
+        self.__lanes = tuple(deque() for _ in PRIORITIES)
+        self.__draining = False
+        self.__lock = Lock() # events may be pushed from other threads (e.g. an eye tracker)
+
+    def schedule(self, generator, sleep=0, catchup=CATCHUP_REPLAY, key=None, priority=None):
+        """ Schedule an event or event generator.
+
+        Args:
+            generator (Event, generator): an event or an event generator (yields an event or a tuple of events).
+            sleep (int, iterable, optional): delay (ms) or an iterable of delays for a repeating generator. Defaults to 0.
+            catchup (str, optional): catch up policy for repeating generators that miss a deadline, see CATCHUP. Defaults to 'replay'.
+            key (hashable, optional): identifies the schedule, if a live schedule with the same key exists it is returned 
+                instead of scheduling a duplicate. Also used to report drift statistics (see drift()).
+            priority (int, optional): priority class of an immediate event, see PRIORITIES. Defaults to None (derived from the event label).
+
+        Returns:
+            Handle: a handle to the schedule, None for immediate events (they cannot be cancelled).
+        """
+        if key is not None:
+            handle = self.__live.get(key)
+            if handle is not None:
+                return handle
 
-    def schedule(self, generator, sleep=0):
         if isinstance(sleep, float):
             sleep = int(sleep)
 
+        if isinstance(generator, Event) and sleep == 0:
+            self.push(generator, priority=priority)
+            return None
+
+        if key is None:
+            key = "{0}:{1}".format(getattr(generator, '__qualname__', type(generator).__name__), next(self.__count))
+
         if isinstance(generator, Event):
             assert isinstance(sleep, int)
-            self.after(sleep, GLOBAL_EVENT_CALLBACK.trigger, generator)
-            return
-        
-        generator = EGen(generator) # always yields (e1, ...)
+            handle = Handle(self, key, self.session.bus.trigger, generator)
+        elif isinstance(sleep, int):
+            handle = Handle(self, key, self.session.bus.trigger, *next(EGen(generator)))
+        else:
+            #repeated event - sleep is a generator (or iterable)
+            handle = Periodic(self, key, generator, iter(sleep), catchup=catchup)
+            self.__drift[key] = handle.drift
+            self.__live[key] = handle
+            handle.start()
+            return handle
 
-        if isinstance(sleep, int):
-            self.after(sleep, GLOBAL_EVENT_CALLBACK.trigger, *next(generator))
-            return
+        self.__live[key] = handle
+        handle.start(sleep)
+        return handle
 
-        try:
-            #repeated event - sleep is a generator (or iterable)
-            self.after(next(sleep), self.__trigger_repeat, generator, sleep)
-        except StopIteration:
-            pass
+    def _release(self, handle):
+        if self.__live.get(handle.key) is handle:
+            del self.__live[handle.key]
+
+    def live(self):
+        """ All live schedules (that have not yet finished or been cancelled).
+
+        Returns:
+            list: live Handles.
+        """
+        return list(self.__live.values())
+
+    def push(self, event, priority=None):
+        """ Queue an event to be triggered immediately (as soon as more urgent events have been triggered).
 
-    def __trigger_repeat(self, generator, sleep):
+        Args:
+            event (Event): event to trigger.
+            priority (int, optional): priority class, see PRIORITIES. Defaults to None (derived from the event label).
+        """
+        if priority is None:
+            priority = priority_of(event)
+        with self.__lock: # a drain that is finishing sees the event, or a new drain is started
+            self.__lanes[priority].append(event)
+            if self.__draining:
+                return
+            self.__draining = True
+        self.after(0, self.__drain)
+
+    def __drain(self):
+        lanes = self.__lanes
+        trigger = self.session.bus._trigger
+        end = monotonic() + self.frame_budget / 1000
         try:
-            GLOBAL_EVENT_CALLBACK.trigger(*next(generator))
-        except StopIteration:
+            while True:
+                for lane in lanes:
+                    if lane:
+                        trigger(lane.popleft())
+                        break
+                else:
+                    return # all lanes are empty
+                if monotonic() > end:
+                    break
+        finally:
+            with self.__lock:
+                draining = self.__draining = any(lanes)
+            if draining: # out of budget, yield to the GUI and continue later
+                self.after(0, self.__drain)
+
+    def pending(self):
+        """ Number of immediate events waiting in each priority lane.
+
+        Returns:
+            tuple: (input, state, telemetry)
+        """
+        return tuple(len(lane) for lane in self.__lanes)
+
+    def drift(self):
+        """ Drift statistics of all repeating generators that have been scheduled.
+
+        Returns:
+            dict: key -> Drift
+        """
+        return dict(self.__drift)
+
+    def after(self, sleep, fun, *args): #override this method
+        raise NotImplementedError()
+
+    def _call(self, fun, *args):
+        # run a callback in the session of this schedular
+        global _session
+        _session = self.session
+        fun(*args)
+
+    def watch(self, fd, fun, *args):
+        """ Call fun(*args) whenever the file descriptor fd becomes readable.
+
+        Args:
+            fd (int): file descriptor.
+            fun (callable): callback.
+
+        Returns:
+            bool: False if the schedular cannot watch file descriptors (the caller should poll instead).
+        """
+        return False
+
+    def unwatch(self, fd):
+        """ Stop watching a file descriptor (see watch). """
+        pass
+
+    def time(self):
+        """ The current time of this schedular, seconds since the epoch (see time.time()). """
+        return time()
+
+    def monotonic_ns(self):
+        """ The current monotonic time of this schedular (ns, see time.perf_counter_ns()). """
+        return perf_counter_ns()
+
+    @property
+    def elapsed(self):
+        """ Monotonic time (ms) since the schedular was created, used for deadlines. """
+        return (monotonic() - self.__created) * 1000
+
+    def close(self):
+        pass
+
+class TKSchedular(Schedular): #might be better to detach events from the GUI? quick and dirty for now...
+
+    def __init__(self, tk_root):
+        super(TKSchedular, self).__init__()
+        self.tk_root = tk_root
+
+    def after(self, sleep, fun, *args):
+        self.tk_root.after(int(sleep), self._call, fun, *args)
+
+    def watch(self, fd, fun, *args):
+        createfilehandler = getattr(self.tk_root.tk, 'createfilehandler', None)
+        if createfilehandler is None: # not available on windows
+            return False
+        from tkinter import READABLE
+        createfilehandler(fd, READABLE, lambda *_: self._call(fun, *args))
+        return True
+
+    def unwatch(self, fd):
+        self.tk_root.tk.deletefilehandler(fd)
+
+    def close(self):
+        pass #TODO
+
+class TimerWheel:
+    """
+        A hashed timer wheel. Timers are hashed into one of `size` slots by the tick at which they expire (a tick is 
+        `resolution` ms), advancing the wheel only inspects the slots of the ticks that have passed.
+    """
+
+    def __init__(self, resolution=10, size=256):
+        super(TimerWheel, self).__init__()
+        self.resolution = resolution
+        self.size = size
+        self.tick = 0
+        self.__slots = [[] for _ in range(size)]
+        self.__pending = 0
+
+    def __len__(self):
+        return self.__pending
+
+    def add(self, sleep, fun, *args, now=None):
+        """ Add a timer that expires after sleep ms (rounded up to the next tick).
+
+        Args:
+            sleep (int): delay (ms).
+            fun (callable): callback.
+            now (float, optional): the current time (ms, tick t starts at t * resolution), timers added between ticks 
+                expire sleep ms after now, not after the last tick. Defaults to None (the time of the last tick).
+        """
+        if now is None:
+            now = self.tick * self.resolution
+        expire = max(self.tick + 1, -(-int(math.ceil(now + sleep)) // self.resolution))
+        self.__slots[expire % self.size].append((expire, fun, args))
+        self.__pending += 1
+
+    def advance(self, tick):
+        """ Advance the wheel to the given tick.
+
+        Returns:
+            list: all timers (expire, fun, args) that expired, in order of expiry.
+        """
+        expired = []
+        while self.tick < tick:
+            self.tick += 1
+            slot = self.__slots[self.tick % self.size]
+            if slot:
+                due = [t for t in slot if t[0] <= self.tick]
+                if due: # others are due on a later rotation of the wheel
+                    slot[:] = [t for t in slot if t[0] > self.tick]
+                    expired.extend(due)
+        self.__pending -= len(expired)
+        return expired
+
+class TKWheelSchedular(TKSchedular):
+    """
+        A TKSchedular that drives all delayed callbacks from a single tk timer using a TimerWheel, rather than 
+        re-creating a tk timer for every callback (every repeating generator). Immediate callbacks are passed straight to tk.
+    """
+
+    def __init__(self, tk_root, resolution=10, size=256):
+        super(TKWheelSchedular, self).__init__(tk_root)
+        self.wheel = TimerWheel(resolution=resolution, size=size)
+        self.__created = monotonic()
+        self.__start = self.__created
+        self.__running = False
+        self.__closed = False
+        self.__ticks = 0 # tk callbacks made by the wheel
+        self.__fired = 0 # callbacks fired by the wheel
+
+    def after(self, sleep, fun, *args):
+        if sleep <= 0:
+            return super(TKWheelSchedular, self).after(0, fun, *args)
+        if not self.__running and not self.__closed:
+            self.__running = True
+            self.__start = monotonic() - self.wheel.tick * self.wheel.resolution / 1000 # keep ticks aligned with real time
+            self.tk_root.after(self.wheel.resolution, self.__tick)
+        self.wheel.add(sleep, fun, *args, now=(monotonic() - self.__start) * 1000)
+
+    def __tick(self):
+        if self.__closed:
             return
-        try:
-            self.after(next(sleep), self.__trigger_repeat, generator, sleep)
-        except StopIteration:
+        global _session
+        _session = self.session
+        self.__ticks += 1
+        # the tick that has started (catch up if tk was late, wait if it was early)
+        tick = int((monotonic() - self.__start) * 1000 / self.wheel.resolution)
+        for _, fun, args in self.wheel.advance(tick):
+            self.__fired += 1
+            try:
+                fun(*args)
+            except:
+                traceback.print_exc()
+        if len(self.wheel) > 0:
+            self.tk_root.after(self.wheel.resolution, self.__tick)
+        else:
+            self.__running = False
+
+    def stats(self):
+        """ Timer statistics, the number of tk timer callbacks saved by using the wheel.
+
+        Returns:
+            dict: ticks (tk callbacks made), fired (callbacks run by the wheel), saved (fired - ticks), saved_per_second.
+        """
+        elapsed = monotonic() - self.__created
+        saved = self.__fired - self.__ticks
+        return dict(ticks=self.__ticks, fired=self.__fired, saved=saved, saved_per_second=saved / elapsed if elapsed > 0 else 0.)
+
+    def close(self):
+        self.__closed = True
+
+class VirtualSchedular(Schedular):
+    """
+        A headless schedular driven by a virtual clock. Callbacks are kept in a heap and are run in time order as 
+        fast as possible, tkinter is not required. Useful for simulating long sessions (regression tests, schedule calibration).
+    """
+
+    def __init__(self, start=None):
+        super(VirtualSchedular, self).__init__()
+        self.__start = time() if start is None else start
+        self.__start_ns = perf_counter_ns()
+        self.__now = 0 # ms since start
+        self.__heap = []
+        self.__count = count() # preserves insertion order for callbacks at the same time
+        self.__closed = False
+
+    def after(self, sleep, fun, *args):
+        heapq.heappush(self.__heap, (self.__now + max(sleep, 0), next(self.__count), fun, args))
+
+    def time(self):
+        return self.__start + self.__now / 1000
+
+    def monotonic_ns(self):
+        return self.__start_ns + self.__now * 1000000
+
+    @property
+    def elapsed(self):
+        """ Virtual time (ms) since the schedular was created. """
+        return self.__now
+
+    @property
+    def is_closed(self):
+        return self.__closed
+
+    def step(self):
+        """ Run the next callback, advancing the virtual clock to its time.
+
+        Returns:
+            bool: False if there was nothing to run.
+        """
+        if self.__closed or not self.__heap:
+            return False
+        self.__now, _, fun, args = heapq.heappop(self.__heap)
+        self._call(fun, *args)
+        return True
+
+    def run(self, until=None):
+        """ Run callbacks until the schedular is closed, there is nothing left to run or the virtual clock passes `until`.
+
+        Args:
+            until (int, optional): virtual time (ms since start) at which to stop. Defaults to None (never).
+        """
+        while self.__heap and not self.__closed:
+            if until is not None and self.__heap[0][0] > until:
+                self.__now = until
+                break
+            self.step()
+
+    def close(self):
+        self.__closed = True
+        self.__heap.clear()
+
+TK_PUMP = 5 # ms between processing pending tk events (see AsyncioSchedular)
+
+class AsyncioSchedular(Schedular):
+    """
+        A schedular that runs in an asyncio event loop, callbacks are scheduled with loop.call_later and file 
+        descriptors (e.g. the wakeups of external sources) are watched with loop.add_reader. If a tk root is given, 
+        pending tk events are processed from the loop every `tk_pump` ms, otherwise the schedular is headless.
+
+        The schedular uses the running event loop (if created from a coroutine), or creates one. Other coroutines 
+        (e.g. agents, see icu.aio) can share the loop. run() runs the loop until the schedular is closed, a coroutine 
+        that hosts the schedular should await wait_closed() instead.
+    """
+
+    def __init__(self, tk_root=None, loop=None, tk_pump=TK_PUMP):
+        super(AsyncioSchedular, self).__init__()
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+        self.loop = loop
+        self.tk_root = tk_root
+        self.tk_pump = tk_pump
+        self.__closed = loop.create_future()
+        if tk_root is not None:
+            from _tkinter import DONT_WAIT
+            self.__dont_wait = DONT_WAIT
+            loop.call_soon(self.__pump)
+
+    def __pump(self):
+        if self.__closed.done():
+            return
+        dooneevent, dont_wait = self.tk_root.tk.dooneevent, self.__dont_wait
+        while dooneevent(dont_wait): # all pending tk events (input, redraws, tk timers)
             pass
+        self.loop.call_later(self.tk_pump / 1000, self.__pump)
 
     def after(self, sleep, fun, *args):
-        self.tk_root.after(int(sleep), fun, *args)
+        if sleep <= 0:
+            self.loop.call_soon(self._call, fun, *args)
+        else:
+            self.loop.call_later(sleep / 1000, self._call, fun, *args)
+
+    def watch(self, fd, fun, *args):
+        try:
+            self.loop.add_reader(fd, self._call, fun, *args)
+        except NotImplementedError: # e.g. the proactor event loop (windows)
+            return False
+        return True
+
+    def unwatch(self, fd):
+        self.loop.remove_reader(fd)
+
+    @property
+    def is_closed(self):
+        return self.__closed.done()
+
+    async def wait_closed(self):
+        """ Wait until the schedular is closed (e.g. at shutdown, see icu.event.close). """
+        await asyncio.shield(self.__closed)
+
+    def run(self):
+        """ Run the event loop until the schedular is closed. """
+        self.loop.run_until_complete(self.wait_closed())
 
     def close(self):
-        pass #TODO
+        if not self.__closed.done():
+            self.__closed.set_result(None)
 
 def tk_event_schedular(root):
-    global event_scheduler
-    event_scheduler = TKSchedular(root)
+    return event_schedular('tk', root)
+
+def virtual_event_schedular(root=None):
+    return event_schedular('virtual', root)
+
+SCHEDULARS = {'tk' : TKSchedular, 'wheel' : TKWheelSchedular, 'virtual' : lambda root: VirtualSchedular(), 'asyncio' : AsyncioSchedular}
 
-    GLOBAL_EVENT_CALLBACK.schedule_external()
+def event_schedular(backend='tk', root=None):
+    """ Initialise the event schedular of the current session (see Session).
+
+    Args:
+        backend (str, optional): schedular backend, one of SCHEDULARS ('tk', 'wheel', 'virtual', 'asyncio'). Defaults to 'tk'.
+        root (tk, optional): tk root window, required by the 'tk' and 'wheel' backends, optional for 'asyncio'.
+
+    Returns:
+        Schedular: the new event schedular.
+    """
+    if backend not in SCHEDULARS:
+        raise ValueError("Invalid schedular backend: {0}, must be one of {1}".format(backend, tuple(SCHEDULARS.keys())))
+    session = _session
+    schedular = session.schedular = SCHEDULARS[backend](root)
+    session.clock = schedular.time
+    session.monotonic_clock = schedular.monotonic_ns
+    session.anchor = (schedular.time(), schedular.monotonic_ns())
+    session.bus.logger.log(Event("Global", "Global", timestamp=session.anchor[0], monotonic=session.anchor[1], label="session"))
+    CausalQuery(session.bus.causes)
+
+    session.bus.schedule_external()
+    return schedular
 
 def close():
-    GLOBAL_EVENT_CALLBACK.close()
-    event_scheduler.close()
\ No newline at end of file
+    """ Close the current session. """
+    _session.close()
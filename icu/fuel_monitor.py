@@ -17,7 +17,7 @@ from .constants import EVENT_LABEL_TRANSFER, EVENT_LABEL_FAIL, EVENT_LABEL_REPAI
 
 from . import event
 
-from .event import Event, EventCallback, event_property, etuple
+from .event import EventCallback, event_property, etuple, handles, session
 
 from .component import Component, CanvasWidget, SimpleComponent, BoxComponent, LineComponent, TextComponent, BaseComponent
 from .highlight import Highlight
@@ -28,10 +28,8 @@ from itertools import cycle
 
 class FuelTank(EventCallback, Component, CanvasWidget):
 
-    __components__ = {} #just names
-
-    def all_components():
-        return {k:v for k,v in FuelTank.__components__.items()}
+    def all_components(): # of the current session
+        return {k:v for k,v in session().registry('FuelTank').items()}
 
     def __init__(self, canvas, x, y, width, height,  name, highlight, capacity=1000, fuel=100, 
                  background_colour=BACKGROUND_COLOUR, outline_thickness=OUTLINE_THICKESS, outline_colour=OUTLINE_COLOUR,
@@ -53,8 +51,9 @@ class FuelTank(EventCallback, Component, CanvasWidget):
         self.highlight = Highlight(canvas, self, **highlight)
         self.components['text'] = TextComponent(canvas, x + width/2, y + height *11/10, self.fuel)
 
-        assert self.name not in FuelTank.__components__
-        FuelTank.__components__[self.name] = self
+        components = self.session.registry('FuelTank')
+        assert self.name not in components
+        components[self.name] = self
         
     @event_property
     def fuel(self):
@@ -69,12 +68,9 @@ class FuelTank(EventCallback, Component, CanvasWidget):
         self.components['fuel'].y = self.y + self.height - fh
         self.components['fuel'].height = fh
 
-    def sink(self, event):
-        if event.data.label == EVENT_LABEL_BURN:
-            self.fuel = etuple(self.fuel + event.data.value, event)
-        if event.data.label == EVENT_LABEL_TRANSFER:
-            #print(event)
-            self.fuel = etuple(self.fuel + event.data.value, event)
+    @handles(EVENT_LABEL_BURN, EVENT_LABEL_TRANSFER)
+    def transfer_callback(self, event):
+        self.fuel = etuple(self.fuel + event.data.value, event)
 
     def update(self, dfuel, event=None):
         self.fuel = etuple(self.fuel + dfuel, event)
@@ -109,14 +105,15 @@ class FuelTankMain(FuelTank):
         self.__trigger_enter = self.fuel > lim[0] and self.fuel < lim[1]
         self.__trigger_leave = not self.__trigger_enter
 
-        event.event_scheduler.schedule(self.__burn(), sleep=cycle([int(1000/self.event_rate)])) #start burning fuel
+        #start burning fuel, missed ticks are merged so that the burn rate is kept under load
+        self.session.schedular.schedule(self.__burn(), sleep=cycle([int(1000/self.event_rate)]), catchup=event.CATCHUP_MERGE, key="{0}.burn".format(self.name))
 
     def __burn(self):
         while True:
             dfuel = self.burn_rate / self.event_rate
             dfuel = min(dfuel, self.fuel)
             if self.fuel > 0:
-                yield event.Event(self.name, self.name, label=EVENT_LABEL_BURN, value=-dfuel)
+                yield event.pooled(self.name, self.name, label=EVENT_LABEL_BURN, value=-dfuel)
             else:
                 yield None
 
@@ -157,10 +154,8 @@ class FuelTankInfinite(FuelTank):
 
 class Pump(EventCallback, Component, CanvasWidget):
 
-    __components__ = {} #just names
-
-    def all_components():
-        return {k:v for k,v in Pump.__components__.items()}
+    def all_components(): # of the current session
+        return {k:v for k,v in session().registry('Pump').items()}
 
     ON_COLOUR = COLOUR_GREEN
     OFF_COLOUR = BACKGROUND_COLOUR
@@ -172,6 +167,7 @@ class Pump(EventCallback, Component, CanvasWidget):
         name = "{0}{1}".format(tank1.name.split(':')[1], tank2.name.split(':')[1])
         name = "{0}:{1}".format(Pump.__name__, name)
         self.__state = options[name]['state']
+        self.__transfering = None
         super(Pump, self).__init__(canvas, x=x, y=y, width=width, height=height, background_colour=Pump.COLOURS[self.__state], outline_thickness=OUTLINE_WIDTH)
 
       
@@ -200,8 +196,9 @@ class Pump(EventCallback, Component, CanvasWidget):
 
         self.highlight = Highlight(canvas, self, **highlight)
 
-        assert self.name not in Pump.__components__
-        Pump.__components__[self.name] = self
+        components = self.session.registry('Pump')
+        assert self.name not in components
+        components[self.name] = self
 
     def right(x, y, width, height):
         n,d = 2,3
@@ -216,7 +213,15 @@ class Pump(EventCallback, Component, CanvasWidget):
         return (x + width/d, y + height*n/d), (x + width/2, y + height/d), (x + width*n/d, y + height*n/d)
     
     def start(self):
-        event.event_scheduler.schedule(self.__transfer(), sleep=cycle([int(1000/self.event_rate)]))
+        self.__cause = event.changing() # the state change that started the pump causes its transfers
+        # keyed, a pump that is already transfering is not started again
+        self.__transfering = self.session.schedular.schedule(self.__transfer(), sleep=cycle([int(1000/self.event_rate)]), 
+                                        catchup=event.CATCHUP_MERGE, key="{0}.transfer".format(self.name))
+
+    def stop(self):
+        if self.__transfering is not None:
+            self.__transfering.cancel()
+            self.__transfering = None
 
     def __transfer(self):
         while self.state == 0: #on
@@ -235,8 +240,8 @@ class Pump(EventCallback, Component, CanvasWidget):
         #self.tank1.update(-flow, event=event)
         #self.tank2.update(flow, event=event)
 
-        e1 = Event(self.name, self.tank1.name, label=EVENT_LABEL_TRANSFER, value=-flow)
-        e2 = Event(self.name, self.tank2.name, label=EVENT_LABEL_TRANSFER, value=flow)
+        e1 = event.pooled(self.name, self.tank1.name, label=EVENT_LABEL_TRANSFER, value=-flow, cause=self.__cause)
+        e2 = event.pooled(self.name, self.tank2.name, label=EVENT_LABEL_TRANSFER, value=flow, cause=self.__cause)
         return e1, e2
     
     def to_dict(self):
@@ -256,21 +261,26 @@ class Pump(EventCallback, Component, CanvasWidget):
         self.background_colour = Pump.COLOURS[value]
         if value == 0:
             self.start()
+        else:
+            self.stop()
 
+    @handles(EVENT_LABEL_CLICK)
     def click_callback(self, event):
         if self.state != 2: #the pump has failed
             self.state = etuple(abs(self.__state - 1), cause=event)
 
-    def sink(self, event):
-        if event.data.label == EVENT_LABEL_TRANSFER: #this may never happen... the event generator is now internal TODO refactor
-            self.tank1.update(-event.data.value)
-            self.tank2.update(event.data.value)
-        elif event.data.label == EVENT_LABEL_FAIL:
-            self.state = etuple(2, cause=event) # failed (unusable)
-        elif event.data.label == EVENT_LABEL_REPAIR:
-            self.state = etuple(1, cause=event) # not transfering (useable)
-        elif event.data.label == EVENT_LABEL_CLICK:
-            self.click_callback(event)
+    @handles(EVENT_LABEL_TRANSFER) #this may never happen... the event generator is now internal TODO refactor
+    def transfer_callback(self, event):
+        self.tank1.update(-event.data.value)
+        self.tank2.update(event.data.value)
+
+    @handles(EVENT_LABEL_FAIL)
+    def fail_callback(self, event):
+        self.state = etuple(2, cause=event) # failed (unusable)
+
+    @handles(EVENT_LABEL_REPAIR)
+    def repair_callback(self, event):
+        self.state = etuple(1, cause=event) # not transfering (useable)
 
 class Wing(CanvasWidget):
     
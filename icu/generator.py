@@ -5,7 +5,7 @@ from sys import version_info
 from time import time
 
 from . import constants as C
-from .event import Event, EventCallback
+from .event import Event, EventCallback, pooled
 
 
 from .tracking import Tracking
@@ -66,7 +66,7 @@ class TargetEventGenerator(EventGenerator):
         
     def __next__(self):
         v = self.unit_vector() 
-        return Event(self.__class__.__name__, self.__target, label=C.EVENT_LABEL_MOVE, dx=v[0]*self.__step, dy=v[1]*self.__step)
+        return pooled(self.__class__.__name__, self.__target, label=C.EVENT_LABEL_MOVE, dx=v[0]*self.__step, dy=v[1]*self.__step)
 
 class TargetEventGenerator2(EventGenerator):
     """ 
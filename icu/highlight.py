@@ -1,14 +1,12 @@
 
-from .event import EventCallback
+from .event import EventCallback, session
 from .component import BaseComponent, BoxComponent
 
-def all_highlights():
-    return Highlight.__all_highlights__
+def all_highlights(): # of the current session
+    return session().registry('Highlight')
 
 class Highlight(EventCallback):
 
-    __all_highlights__ = {}
-
     def __init__(self, canvas, component, state=False, highlight_thickness=4, highlight_colour='red', outline=True, transparent=False, **kwargs):
         assert isinstance(component, BaseComponent)
         super(Highlight, self).__init__()
@@ -33,10 +31,10 @@ class Highlight(EventCallback):
             if not state:
                 self.off()
 
-            Highlight.__all_highlights__[self.name] = self
+            self.session.registry('Highlight')[self.name] = self
 
     def sink(self, event):
-        if "value" in event.data.__dict__: #if no value is given, flip the highlight on/off
+        if "value" in event.data: #if no value is given, flip the highlight on/off
             (self.off, self.on)[int(event.data.value)]() #love it
         else:
             self.flip()
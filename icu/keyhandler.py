@@ -2,8 +2,7 @@ from itertools import cycle
 from threading import Timer
 
 from collections import defaultdict
-from . import event
-from .event import Event, EventCallback
+from .event import EventCallback, pooled
 
 from .component import BaseComponent
 from .constants import EVENT_LABEL_KEY
@@ -33,7 +32,7 @@ class KeyHandler(EventCallback):
 
         self.keys = defaultdict(lambda: False)
         self.timers = defaultdict(lambda: None)
-        self.holds = defaultdict(lambda: None)
+        self.holds = {} # (sink, key) -> hold schedule
     
     def __db_release_timer(self, event): #debounce
         self.keys[event.keysym] = False
@@ -61,7 +60,7 @@ class KeyHandler(EventCallback):
         """
         #print("press", event)
         sym = "<{0}>".format(event.keysym)
-        for v in BaseComponent.bound(sym).values():
+        for v in BaseComponent.bound(sym, self.session).values():
             self.source(v.name, label=EVENT_LABEL_KEY, key=event.keysym, keycode=event.keycode, action='press')
             self.hold(v.name, label=EVENT_LABEL_KEY, key=event.keysym, keycode=event.keycode, action='hold')
 
@@ -72,8 +71,10 @@ class KeyHandler(EventCallback):
         """
         #print("release", event)
         sym = "<{0}>".format(event.keysym)
-        for v in BaseComponent.bound(sym).values():
-            self.holds[event.keysym].released() #stop generating hold events
+        for v in BaseComponent.bound(sym, self.session).values():
+            hold = self.holds.pop((v.name, event.keysym), None)
+            if hold is not None:
+                hold.cancel() #stop generating hold events
             self.source(v.name, label=EVENT_LABEL_KEY, key=event.keysym, keycode=event.keycode, action='release')
 
     def isPressed(self, key):
@@ -96,11 +97,12 @@ class KeyHandler(EventCallback):
             data (str): any additional event data to be sent...
 
         Returns:
-            KeyHoldGenerator: event generator.
+            Handle: schedule handle of the event generator (see KeyHoldGenerator).
         """
         generator = KeyHoldGenerator(self, sink, key=key, label=label, **data)
-        event.event_scheduler.schedule(generator, sleep=cycle([1000/HOLD_FREQUENCY]))
-        self.holds[key] = generator
+        hold = self.session.schedular.schedule(generator, sleep=cycle([1000/HOLD_FREQUENCY]), key="{0}.hold.{1}".format(sink, key))
+        self.holds[(sink, key)] = hold
+        return hold
 
 class KeyHoldGenerator(EventGenerator):
     """ 
@@ -116,7 +118,7 @@ class KeyHoldGenerator(EventGenerator):
 
     def __next__(self):
         if not self.stop:
-            return Event(KeyHandler.__name__, self.component, **self.data)
+            return pooled(KeyHandler.__name__, self.component, **self.data)
         else:
             raise StopIteration()
 
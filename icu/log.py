@@ -1,3 +1,14 @@
+import os
+import atexit
+import weakref
+import traceback
+
+from collections import deque
+from threading import Thread, Event as Flag
+
+LOG_INTERVAL = 0.1     # seconds between writes (see AsyncEventLogger)
+LOG_BUFFER = 1 << 20   # bytes buffered by the log file
+
 class EventLogger:
 
     def __init__(self, file):
@@ -8,4 +19,146 @@ class EventLogger:
 
     def close(self):
         self.file.close()
-        
\ No newline at end of file
+
+class NullLogger:
+
+    def log(self, event):
+        pass
+
+    def close(self):
+        pass
+
+def format_record(name, timestamp, monotonic, src, dst, data):
+    """ A log record as a line of text, the same as str(event). """
+    return "{0}:{1}:{2} - ({3}->{4}): {5}\n".format(name, timestamp, monotonic, src, dst, data)
+
+class AsyncEventLogger:
+    """
+        An event logger that writes on a background thread. log() appends a record (the fields of the event, not the
+        event itself, pooled events are reused once they have been triggered, see event.EventPool) to a queue, the writer
+        formats and writes all queued records every `interval` seconds. The log has the same format as EventLogger.
+
+        No events are lost at shutdown, close() (also called at exit) waits for the writer to write every record that
+        was logged before it. Event data must not be changed once it has been logged.
+
+        The writer is started by the first log(). A logger may be created before a fork (e.g. icu.start), in the child 
+        the records of the parent are discarded and a new writer is started by the next log(), the child must close 
+        the logger (atexit does not run in multiprocessing children).
+
+        Subclasses write other formats by overriding _open (called by the constructor), _write, _sync and _close (called
+        on the writer thread).
+
+    Args:
+        file (str): log file.
+        interval (float, optional): seconds between writes, the file is flushed after each write. Defaults to LOG_INTERVAL.
+        fsync (float, optional): seconds between fsyncs of the file (0 after every write). Defaults to None (never, the
+            operating system decides when the log reaches the disk).
+    """
+
+    def __init__(self, file, interval=LOG_INTERVAL, fsync=None):
+        super(AsyncEventLogger, self).__init__()
+        self.path = file
+        self.interval = interval
+        self.fsync = fsync
+        self.written = 0 # records
+        self.__records = deque() # appended by log, popped by the writer (deque is thread safe, no lock is needed)
+        self.__append = self.__records.append
+        self.__closed = Flag()
+        self.__writer = None # started by the first log
+        self._open(file)
+        _loggers.add(self)
+        atexit.register(self.close)
+
+    def log(self, event):
+        self.__append((event.name, event.timestamp, event.monotonic, event.src, event.dst, event.data.__dict__))
+        if self.__writer is None:
+            self.__start()
+
+    def __start(self):
+        if self.__closed.is_set():
+            return
+        self.__writer = Thread(target=self.__write_loop, name=type(self).__name__, daemon=True)
+        self.__writer.start()
+
+    def _after_fork(self):
+        # in the child of a fork, the writer thread does not exist
+        if self.__closed.is_set():
+            return
+        self.__records.clear() # written by the parent
+        self.__closed = Flag()
+        self.__writer = None
+
+    def _open(self, file):
+        self.file = open(file, 'w', buffering=LOG_BUFFER)
+
+    def _write(self, records):
+        """ Write a batch of records (name, timestamp, monotonic, src, dst, data). """
+        self.file.write("".join([format_record(*record) for record in records]))
+        self.file.flush()
+
+    def _sync(self):
+        os.fsync(self.file.fileno())
+
+    def _close(self):
+        self.file.close()
+
+    def __write_loop(self):
+        elapsed = 0.
+        while not self.__closed.wait(self.interval):
+            elapsed += self.interval
+            self.__write()
+            if self.fsync is not None and elapsed >= self.fsync:
+                self.__sync()
+                elapsed = 0.
+        self.__finish()
+
+    def __finish(self):
+        self.__write() # records logged before close
+        if self.fsync is not None:
+            self.__sync()
+        try:
+            self._close()
+        except Exception:
+            traceback.print_exc()
+
+    def __write(self):
+        records = self.__records
+        n = len(records)
+        if n == 0:
+            return
+        batch = [records.popleft() for _ in range(n)]
+        try:
+            self._write(batch)
+        except Exception:
+            traceback.print_exc()
+        self.written += n
+
+    def __sync(self):
+        try:
+            self._sync()
+        except OSError:
+            traceback.print_exc()
+
+    def pending(self):
+        """ Number of records waiting to be written. """
+        return len(self.__records)
+
+    def close(self):
+        """ Write all records that have been logged and close the file. """
+        if self.__closed.is_set():
+            return
+        self.__closed.set()
+        if self.__writer is not None:
+            self.__writer.join()
+        else: # nothing has been logged (since a fork)
+            self.__finish()
+        atexit.unregister(self.close)
+
+_loggers = weakref.WeakSet() # AsyncEventLoggers (see _after_fork)
+
+def _after_fork():
+    for logger in list(_loggers):
+        logger._after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -58,7 +58,7 @@ class MainPanel(tk.Canvas, EventCallback):
 
     def on_click(self, event):
         overlapping = self.find_overlapping(event.x, event.y, event.x, event.y)
-        bound = BaseComponent.bound(MOUSE_BIND)
+        bound = BaseComponent.bound(MOUSE_BIND, self.session)
         for overlap in overlapping:
             if overlap in bound:
                 #print("BOUND: ", bound[overlap])
@@ -5,7 +5,7 @@
     @Date: 2020-04-02 21:57:11
 """
 
-from .event import Event, EventCallback
+from .event import Event, EventCallback, handles
 from .component import Component, PolyComponent, BaseComponent
 
 
@@ -22,25 +22,31 @@ class Overlay(EventCallback, Component, PolyComponent):
         Component.register(self, name) 
 
 
-    def sink(self, event):
-        if event.data.label == 'place':
-            self.x = event.data.x 
-            self.y = event.data.y 
-        elif event.data.label == 'move':
-            self.x += event.data.dx
-            self.y += event.data.dy
-        elif event.data.label == 'rotate':
-            self.rotate(event.data.angle)
-        elif event.data.label == 'saccade':
-            self.x = event.data.x - self.width/2
-            self.y = event.data.y - self.height/2
-            self.hide()
-        elif event.data.label == 'gaze':
-            self.x = event.data.x - self.width/2
-            self.y = event.data.y - self.height/2
-            self.show()
-        
-        #self.source('Global', label='highlight', value=self.is_on) # emit a global event (for external systems)
+    @handles('place')
+    def place_callback(self, event):
+        self.x = event.data.x 
+        self.y = event.data.y 
+
+    @handles('move')
+    def move_callback(self, event):
+        self.x += event.data.dx
+        self.y += event.data.dy
+
+    @handles('rotate')
+    def rotate_callback(self, event):
+        self.rotate(event.data.angle)
+
+    @handles('saccade')
+    def saccade_callback(self, event):
+        self.x = event.data.x - self.width/2
+        self.y = event.data.y - self.height/2
+        self.hide()
+
+    @handles('gaze')
+    def gaze_callback(self, event):
+        self.x = event.data.x - self.width/2
+        self.y = event.data.y - self.height/2
+        self.show()
 
 
 
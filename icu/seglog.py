@@ -0,0 +1,216 @@
+"""
+    Segmented, compressed event logs. SegmentedEventLogger writes the text log (see log.EventLogger) as compressed
+    chunks (gzip or lzma, on the writer thread, see log.AsyncEventLogger) to a series of segment files, a new segment
+    is started when the current one is too large or spans too long. Each chunk is a complete gzip member/xz stream,
+    so a segment can be read with zcat/xzcat.
+
+    An index (<path>.index, a JSON line for each chunk) records the segment, byte offset and size, time range and
+    number of events of every chunk, SegmentedEventLog uses it to read any part of a session without decompressing
+    what comes before it:
+
+        log = SegmentedEventLog('event_log')
+        for record in log.records(log.start + 30 * 60, log.start + 31 * 60): # minute 30
+            ...
+
+    Times are those of the session clock: chunks are split and indexed on the monotonic stamp of each event converted
+    to wall-clock time with the anchor of the session (see event.to_wall), taken from the 'session' event that starts
+    the session (see event.event_schedular). The timestamp of an event may come from another clock (e.g. an eye
+    tracker), it is not used.
+"""
+import os
+import gzip
+import lzma
+import json
+
+from time import time, perf_counter_ns
+
+from .log import AsyncEventLogger, LOG_INTERVAL, format_record
+
+CHUNK_BYTES = 1 << 18     # uncompressed bytes in a chunk
+CHUNK_SECONDS = 10        # maximum time spanned by a chunk (seconds of session time)
+SEGMENT_BYTES = 64 << 20  # compressed bytes in a segment
+
+CODECS = {'gzip' : ('.gz', lambda data, level: gzip.compress(data, 6 if level is None else level), gzip.decompress),
+          'lzma' : ('.xz', lambda data, level: lzma.compress(data, preset=level), lzma.decompress)}
+
+def _codec(segment):
+    for codec, (extension, _, decompress) in CODECS.items():
+        if segment.endswith(extension):
+            return decompress
+    raise ValueError("Unknown codec of segment: {0}".format(segment))
+
+def _time(line, anchor):
+    # session time of a line, id:timestamp:monotonic - ... (see Event.__str__, SegmentedEventLogger._write)
+    return anchor[0] + (int(line.split(':', 3)[2].split(' ', 1)[0]) - anchor[1]) / 1e9
+
+class SegmentedEventLogger(AsyncEventLogger):
+    """
+        An event logger that writes compressed chunks to a series of segment files with an index (see module doc).
+        Segments are named <path>.<n>.txt.gz (or .xz). Events are kept in memory until their chunk is written (at most
+        chunk_bytes or chunk_seconds of events), close() writes the last chunk. Until a 'session' event is logged, 
+        times are converted with an anchor taken when the logger is created.
+
+    Args:
+        path (str): path of the log, without extension.
+        codec (str, optional): compression, one of CODECS ('gzip', 'lzma'). Defaults to 'gzip'.
+        level (int, optional): compression level (gzip) or preset (lzma). Defaults to None (6 for both).
+        chunk_bytes (int, optional): uncompressed bytes in a chunk. Defaults to CHUNK_BYTES.
+        chunk_seconds (float, optional): maximum time spanned by a chunk, the resolution of the index. Defaults to CHUNK_SECONDS.
+        segment_bytes (int, optional): maximum compressed bytes in a segment, None for no limit. Defaults to SEGMENT_BYTES.
+        segment_seconds (float, optional): maximum time spanned by a segment, None for no limit. Defaults to None.
+        interval (float, optional): seconds between writes (see AsyncEventLogger). Defaults to LOG_INTERVAL.
+        fsync (float, optional): seconds between fsyncs (see AsyncEventLogger). Defaults to None.
+    """
+
+    def __init__(self, path, codec='gzip', level=None, chunk_bytes=CHUNK_BYTES, chunk_seconds=CHUNK_SECONDS,
+                 segment_bytes=SEGMENT_BYTES, segment_seconds=None, interval=LOG_INTERVAL, fsync=None):
+        if codec not in CODECS:
+            raise ValueError("Invalid codec: {0}, must be one of {1}".format(codec, tuple(CODECS.keys())))
+        self.codec = codec
+        self.level = level
+        self.chunk_bytes = chunk_bytes
+        self.chunk_seconds = chunk_seconds
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        super(SegmentedEventLogger, self).__init__(path, interval=interval, fsync=fsync)
+
+    def _open(self, path):
+        self.index = open(path + '.index', 'w')
+        self.segment = None
+        self.segments = 0
+        self.__segment_start = None
+        self.__chunk = []    # formatted records
+        self.__size = 0      # bytes in the chunk
+        self.__range = None  # (first, last) session time of the chunk
+        self.__rows = 0
+        self.__anchor = (time(), perf_counter_ns()) # (wall-clock time, monotonic time), see event.to_wall
+        self.__chunk_anchor = None # the anchor of the chunk
+
+    def _write(self, records):
+        first, last = self.__range if self.__range is not None else (None, None)
+        for record in records:
+            name, timestamp, monotonic, src, dst, data = record
+            if src == 'Global' and data.get('label', None) == 'session': # a new anchor (see event.event_schedular)
+                self.__anchor = (timestamp, monotonic)
+                if self.__chunk:
+                    self.__range = (first, last)
+                    self.__write_chunk()
+            anchor = self.__anchor
+            t = anchor[0] + (monotonic - anchor[1]) / 1e9
+            if self.__chunk and (self.__size >= self.chunk_bytes or t - first >= self.chunk_seconds):
+                self.__range = (first, last)
+                self.__write_chunk()
+            if not self.__chunk:
+                first = last = t
+                self.__chunk_anchor = anchor
+            line = format_record(*record)
+            self.__chunk.append(line)
+            self.__size += len(line)
+            self.__rows += 1
+            first, last = min(first, t), max(last, t)
+        self.__range = (first, last)
+
+    def __write_chunk(self):
+        if not self.__chunk:
+            return
+        extension, compress, _ = CODECS[self.codec]
+        data = compress("".join(self.__chunk).encode('utf-8'), self.level)
+        first, last = self.__range
+        if self.segment is None or (self.segment.tell() > 0 and (
+                (self.segment_bytes is not None and self.segment.tell() + len(data) > self.segment_bytes) or
+                (self.segment_seconds is not None and last - self.__segment_start >= self.segment_seconds))):
+            self.__roll(extension, first)
+        offset = self.segment.tell()
+        self.segment.write(data)
+        self.segment.flush()
+        self.index.write(json.dumps(dict(segment=os.path.basename(self.segment.name), offset=offset, size=len(data),
+                                         start=first, end=last, rows=self.__rows, anchor=self.__chunk_anchor)) + "\n")
+        self.index.flush()
+        self.__chunk.clear()
+        self.__size = 0
+        self.__range = None
+        self.__rows = 0
+
+    def __roll(self, extension, start):
+        if self.segment is not None:
+            self.segment.close()
+        self.segment = open("{0}.{1:04d}.txt{2}".format(self.path, self.segments, extension), 'wb')
+        self.segments += 1
+        self.__segment_start = start
+
+    def _sync(self):
+        if self.segment is not None:
+            os.fsync(self.segment.fileno())
+        os.fsync(self.index.fileno())
+
+    def _close(self):
+        self.__write_chunk()
+        if self.segment is not None:
+            self.segment.close()
+        self.index.close()
+
+class SegmentedEventLog:
+    """
+        Reads a segmented event log (see SegmentedEventLogger) through its index, only the chunks that are needed
+        are decompressed.
+
+    Args:
+        path (str): path of the log, without extension (the index is <path>.index).
+    """
+
+    def __init__(self, path):
+        super(SegmentedEventLog, self).__init__()
+        self.path = path
+        self.directory = os.path.dirname(path)
+        self.chunks = [] # index entries
+        with open(path + '.index') as index:
+            for line in index:
+                try:
+                    self.chunks.append(json.loads(line))
+                except ValueError: # the log was not closed, the last entry is incomplete
+                    break
+        self.start = min((chunk['start'] for chunk in self.chunks), default=None) # time of the first event
+        self.end = max((chunk['end'] for chunk in self.chunks), default=None)     # time of the last event
+
+    def __len__(self):
+        return sum(chunk['rows'] for chunk in self.chunks)
+
+    def find(self, start=None, end=None):
+        """ The chunks that have events in a time range.
+
+        Args:
+            start (float, optional): start time (seconds since the epoch, session time, see module doc). Defaults to None (the first event).
+            end (float, optional): end time (exclusive). Defaults to None (after the last event).
+
+        Returns:
+            list: index entries.
+        """
+        return [chunk for chunk in self.chunks if (start is None or chunk['end'] >= start) and (end is None or chunk['start'] < end)]
+
+    def read(self, chunk):
+        """ The text of a chunk (see find). """
+        segment = chunk['segment']
+        with open(os.path.join(self.directory, segment), 'rb') as f:
+            f.seek(chunk['offset'])
+            data = f.read(chunk['size'])
+        return _codec(segment)(data).decode('utf-8')
+
+    def lines(self, start=None, end=None):
+        """ The lines of the text log (see Event.__str__) of the events in a time range (see find). """
+        for chunk in self.find(start, end):
+            bounded = (start is not None and chunk['start'] < start) or (end is not None and chunk['end'] >= end)
+            anchor = chunk['anchor']
+            for line in self.read(chunk).splitlines(True):
+                if bounded:
+                    t = _time(line, anchor)
+                    if (start is not None and t < start) or (end is not None and t >= end):
+                        continue
+                yield line
+
+    def records(self, start=None, end=None):
+        """ The records (name, timestamp, monotonic, src, dst, data) of the events in a time range (see find, binlog.parse_line). """
+        from .binlog import parse_line
+        for line in self.lines(start, end):
+            record = parse_line(line)
+            if record is not None:
+                yield record
@@ -1,7 +1,6 @@
 import tkinter as tk
 import random
 import copy
-import time
 from types import SimpleNamespace
 
 from . import panel
@@ -16,7 +15,7 @@ from .constants import EVENT_LABEL_CLICK, EVENT_LABEL_KEY
 
 #from .constants import WARNING_LIGHT_MIN_HEIGHT, WARNING_LIGHT_MIN_WIDTH
 
-from .event import Event, EventCallback, get_event_sinks, event_property, etuple
+from .event import Event, EventCallback, get_event_sinks, event_property, etuple, now, handles, session
 
 from .component import Component, CanvasWidget, SimpleComponent, BoxComponent, LineComponent
 from .highlight import Highlight
@@ -32,10 +31,8 @@ PADDING = 20
 
 class Scale(EventCallback, Component, CanvasWidget):
 
-    __scale_components__ = [] #just names
-
-    def all_components():
-        return copy.deepcopy(Scale.__scale_components__)
+    def all_components(): # names, of the current session
+        return copy.deepcopy(session().registry('Scale', list))
 
     def __init__(self, canvas, name, width=1., height=1., size=11, position=None, highlight={}, key=None,
                     background_colour=COLOUR_LIGHT_BLUE, outline_thickness=OUTLINE_WIDTH, outline_colour=OUTLINE_COLOUR, 
@@ -68,7 +65,7 @@ class Scale(EventCallback, Component, CanvasWidget):
             self.components['line-' + str(i)] = line
 
         self.highlight = Highlight(canvas, self, **highlight)
-        Scale.__scale_components__.append(self.name)
+        self.session.registry('Scale', list).append(self.name)
 
         self.slide(position)
     
@@ -85,24 +82,24 @@ class Scale(EventCallback, Component, CanvasWidget):
     def slide(self, y, cause=None):
         self.state = etuple(max(0, min(self.__size-1, self.__state + y)), cause=cause)
 
-    def sink(self, event):
-        if event.data.label == EVENT_LABEL_CLICK:
-            self.click_callback(event)
-        elif event.data.label == EVENT_LABEL_KEY and event.data.action == 'press':
+    @handles(EVENT_NAME_SLIDE)
+    def slide_callback(self, event):
+        self.slide(event.data.slide, cause=event)
+
+    @handles(EVENT_LABEL_KEY)
+    def key_callback(self, event):
+        if event.data.action == 'press':
             self.click_callback(event)
-        elif event.data.label == EVENT_NAME_SLIDE:
-            self.slide(event.data.slide, cause=event)
 
+    @handles(EVENT_LABEL_CLICK)
     def click_callback(self, event):
         self.slide(self.__size // 2 - self.__state, cause=event)
 
 
 class WarningLight(EventCallback, Component, BoxComponent):
 
-    __all_components__ = []
-    
-    def all_components():
-        return WarningLight.__all_components__
+    def all_components(): # names, of the current session
+        return session().registry('WarningLight', list)
 
     def __init__(self, canvas, name, width=1., height=1., state=0, prefered_state=0, key=None, 
                 on_colour=COLOUR_GREEN, off_colour=COLOUR_RED, outline_thickness=OUTLINE_WIDTH,
@@ -124,7 +121,7 @@ class WarningLight(EventCallback, Component, BoxComponent):
             self.bind(key)
 
         self.highlight = Highlight(canvas, self, **highlight)
-        WarningLight.__all_components__.append(self.name)
+        self.session.registry('WarningLight', list).append(self.name)
 
         self.grace = grace # the light will wait atleast 1 second before switching off after the user interacts
         self.last_interacted = 0
@@ -138,16 +135,22 @@ class WarningLight(EventCallback, Component, BoxComponent):
         self.__state = value
         self.colour = self.__state_colours[self.__state]
 
-    def sink(self, event):
-        if event.data.label == EVENT_LABEL_CLICK or (event.data.label == EVENT_LABEL_KEY and event.data.action == 'press'):
-            if self.__state != self.__prefered_state:
-                self.state = etuple(self.__prefered_state, cause=event)
+    @handles(EVENT_LABEL_CLICK)
+    def click_callback(self, event):
+        if self.__state != self.__prefered_state:
+            self.state = etuple(self.__prefered_state, cause=event)
+
+            self.last_interacted = now()
 
-                self.last_interacted = time.time()
+    @handles(EVENT_LABEL_KEY)
+    def key_callback(self, event):
+        if event.data.action == 'press':
+            self.click_callback(event)
 
-        elif event.data.label == EVENT_NAME_SWITCH:
-            if time.time() - self.grace > self.last_interacted: #only switch the light off if the user hasnt just turned it on!
-                self.state = etuple(int(not bool(self.__prefered_state)), cause=event)
+    @handles(EVENT_NAME_SWITCH)
+    def switch_callback(self, event):
+        if now() - self.grace > self.last_interacted: #only switch the light off if the user hasnt just turned it on!
+            self.state = etuple(int(not bool(self.__prefered_state)), cause=event)
 
 class SystemMonitorWidget(CanvasWidget):
 
@@ -0,0 +1,83 @@
+"""
+    Throughput of the event bridge (see icu.bridge) with 1, 4 and 16 clients. A headless ICU (asyncio schedular)
+    triggers N events as fast as it can, each client (a separate process) subscribes to them and counts them as they
+    arrive. Events dropped because a client's outbox was full are reported.
+"""
+import os
+import tempfile
+import multiprocessing as mp
+
+from time import perf_counter
+
+from icu import event
+from icu.event import Event
+from icu.bridge import Bridge, BridgeClient
+from icu.log import NullLogger
+
+N = 50000
+BATCH = 500 # events triggered before yielding to the event loop (so that outboxes are flushed)
+CLIENTS = [1, 4, 16]
+PATH = os.path.join(tempfile.gettempdir(), 'icu-benchmark.sock')
+
+def client(results):
+    client = BridgeClient(PATH)
+    client.subscribe(labels=['bench', 'end'])
+    received, start = 0, None
+    while True:
+        for e in client.get_many():
+            if start is None:
+                start = perf_counter()
+            if e.data.label == 'end':
+                results.put((received, perf_counter() - start))
+                client.close()
+                return
+            received += 1
+
+def benchmark(n_clients):
+    event.GLOBAL_EVENT_CALLBACK.logger = NullLogger()
+    schedular = event.event_schedular('asyncio')
+    bridge = Bridge(PATH, capacity=1 << 24)
+    bridge.start()
+
+    results = mp.Queue()
+    clients = [mp.Process(target=client, args=(results,)) for _ in range(n_clients)]
+    for p in clients:
+        p.start()
+
+    def subscribed():
+        if len(event.GLOBAL_EVENT_CALLBACK.external_sinks) < n_clients:
+            return schedular.after(10, subscribed)
+        schedular.after(0, trigger, 0)
+
+    def trigger(i):
+        for j in range(i, min(i + BATCH, N)):
+            event.GLOBAL_EVENT_CALLBACK.trigger(Event('Benchmark', 'Global', label='bench', value=j, x=0.5, y=-0.5))
+        if i + BATCH < N:
+            schedular.after(0, trigger, i + BATCH)
+        else:
+            event.GLOBAL_EVENT_CALLBACK.trigger(Event('Benchmark', 'Global', label='end'))
+            schedular.after(0, done)
+
+    def done():
+        if any(p.is_alive() for p in clients):
+            return schedular.after(10, done)
+        bridge_stats = [c.stats() for c in bridge.connections.values()]
+        schedular.close()
+        stats.extend(bridge_stats)
+
+    stats = []
+    schedular.after(0, subscribed)
+    schedular.run()
+    received = [results.get() for _ in clients]
+    bridge.close()
+    return received, stats
+
+if __name__ == '__main__':
+    print("{0:<8} {1:>14} {2:>18} {3:>18} {4:>10}".format("clients", "events/sec", "per client/sec", "delivered/sec", "dropped"))
+    for n in CLIENTS:
+        received, stats = benchmark(n)
+        per_client = [r / t for r, t in received]
+        delivered = sum(r for r, _ in received) / max(t for _, t in received)
+        dropped = sum(s['dropped'] for s in stats)
+        print("{0:<8} {1:>14.0f} {2:>18.0f} {3:>18.0f} {4:>10}".format(n, N / max(t for _, t in received),
+                sum(per_client) / n, delivered, dropped))
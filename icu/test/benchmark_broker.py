@@ -0,0 +1,75 @@
+"""
+    GUI frame time against the number of external sinks (subscribers), with the sinks attached to ICU directly and
+    through a broker process (see icu.broker). A frame is the events of 100 ms of a default session (tank burn, pump
+    transfer, target move, key hold and a delta of the changes), the frame time is the time ICU spends triggering them.
+    Each sink is drained by its own process.
+"""
+import multiprocessing as mp
+
+from time import perf_counter, sleep
+
+from icu import event
+from icu.event import Event, ExternalEventSink
+from icu.broker import Broker
+from icu.log import NullLogger
+
+FRAMES = 300
+SUBSCRIBERS = [1, 4, 16, 32]
+PUMPS = ['EA', 'FB', 'CA', 'DB', 'AB', 'BA', 'EC', 'FD']
+
+def frame():
+    events = [Event('FuelTank:' + name, 'FuelTank:' + name, label='burn', value=-0.5) for name in 'AB']
+    for pump in PUMPS:
+        events.append(Event('Pump:' + pump, 'FuelTank:' + pump[0], label='transfer', value=-1))
+        events.append(Event('Pump:' + pump, 'FuelTank:' + pump[1], label='transfer', value=1))
+    for _ in range(2):
+        events.append(Event('TargetEventGenerator', 'Target:0', label='move', dx=1, dy=1))
+        events.append(Event('KeyHandler', 'Target:0', label='key', key='Left', action='hold'))
+    changes = {'FuelTank:' + name : {'fuel' : 1000.} for name in 'ABCDEF'}
+    counts = {'FuelTank:' + name : {'fuel' : 3} for name in 'ABCDEF'}
+    events.append(Event('Global', 'Global', label='delta', changes=changes, counts=counts))
+    return events
+
+def consume(sink, closed):
+    while not closed.is_set():
+        sink.get_many(timeout=0.05)
+
+def benchmark(n, brokered):
+    callback = event.GlobalEventCallback(NullLogger())
+    sinks = [ExternalEventSink() for _ in range(n)]
+    closed = mp.Event()
+    consumers = [mp.Process(target=consume, args=(sink, closed)) for sink in sinks]
+    for p in consumers:
+        p.start()
+    broker = None
+    if brokered:
+        broker = Broker(sinks)
+        broker.start()
+        callback.register_external_sink(broker.sink.name, broker.sink)
+    else:
+        for sink in sinks:
+            callback.register_external_sink(sink.name, sink)
+
+    times = []
+    for _ in range(FRAMES):
+        events = frame()
+        start = perf_counter()
+        for e in events:
+            callback._trigger(e)
+        times.append(perf_counter() - start)
+        sleep(0.005)
+
+    if broker is not None:
+        broker.close()
+    closed.set()
+    for p in consumers:
+        p.join()
+    times.sort()
+    return sum(times) / len(times), times[int(len(times) * 0.99)]
+
+if __name__ == '__main__':
+    print("{0:<12} {1:>10} {2:>14} {3:>14}".format("subscribers", "broker", "mean (ms)", "p99 (ms)"))
+    for n in SUBSCRIBERS:
+        for brokered in [False, True]:
+            mean, p99 = benchmark(n, brokered)
+            print("{0:<12} {1:>10} {2:>14.3f} {3:>14.3f}".format(n, str(brokered), mean * 1000, p99 * 1000))
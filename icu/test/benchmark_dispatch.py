@@ -0,0 +1,170 @@
+"""
+    Micro-benchmark of event dispatch to the default widget set (see icu/config.json), compares handlers
+    registered per label (see icu.event.handles) with the previous if/elif chains in sink. The widgets are
+    stand-ins with the same labels and (no-op) handlers, the mix of events is that of one second of a default
+    run (tank burn, pump transfer, target move, key hold, scale slide, warning light switch and clicks).
+
+    Both are run alternately for a number of rounds so that they see the same machine load, the median (and range)
+    of the rounds is reported. The difference is small and varies from run to run, compare medians of several runs.
+"""
+import timeit
+
+from statistics import median
+
+from icu.event import Event, EventCallback, GlobalEventCallback, handles
+from icu.constants import EVENT_LABEL_CLICK, EVENT_LABEL_KEY, EVENT_LABEL_MOVE, EVENT_LABEL_BURN
+from icu.constants import EVENT_LABEL_TRANSFER, EVENT_LABEL_FAIL, EVENT_LABEL_REPAIR, EVENT_LABEL_SLIDE, EVENT_LABEL_SWITCH
+from icu.log import NullLogger
+
+N = 100     # seconds of events
+ROUNDS = 15 # runs of each sink
+
+# ========= if/elif ========= #
+
+class LegacyTank:
+
+    def sink(self, event):
+        if event.data.label == EVENT_LABEL_BURN:
+            pass
+        if event.data.label == EVENT_LABEL_TRANSFER:
+            pass
+
+class LegacyPump:
+
+    def sink(self, event):
+        if event.data.label == EVENT_LABEL_TRANSFER:
+            pass
+        elif event.data.label == EVENT_LABEL_FAIL:
+            pass
+        elif event.data.label == EVENT_LABEL_REPAIR:
+            pass
+        elif event.data.label == EVENT_LABEL_CLICK:
+            pass
+
+class LegacyScale:
+
+    def sink(self, event):
+        if event.data.label == EVENT_LABEL_CLICK:
+            pass
+        elif event.data.label == EVENT_LABEL_KEY and event.data.action == 'press':
+            pass
+        elif event.data.label == EVENT_LABEL_SLIDE:
+            pass
+
+class LegacyWarningLight:
+
+    def sink(self, event):
+        if event.data.label == EVENT_LABEL_CLICK or (event.data.label == EVENT_LABEL_KEY and event.data.action == 'press'):
+            pass
+        elif event.data.label == EVENT_LABEL_SWITCH:
+            pass
+
+class LegacyTracking:
+
+    def sink(self, event):
+        if event.data.label == EVENT_LABEL_KEY:
+            pass
+        else:
+            pass
+
+# ========= handlers ========= #
+
+class Tank(EventCallback):
+
+    @handles(EVENT_LABEL_BURN, EVENT_LABEL_TRANSFER)
+    def transfer_callback(self, event):
+        pass
+
+class Pump(EventCallback):
+
+    @handles(EVENT_LABEL_TRANSFER, EVENT_LABEL_FAIL, EVENT_LABEL_REPAIR, EVENT_LABEL_CLICK)
+    def callback(self, event):
+        pass
+
+class Scale(EventCallback):
+
+    @handles(EVENT_LABEL_CLICK, EVENT_LABEL_SLIDE)
+    def callback(self, event):
+        pass
+
+    @handles(EVENT_LABEL_KEY)
+    def key_callback(self, event):
+        if event.data.action == 'press':
+            pass
+
+class WarningLight(Scale):
+
+    @handles(EVENT_LABEL_SWITCH)
+    def switch_callback(self, event):
+        pass
+
+class Tracking(EventCallback):
+
+    @handles(EVENT_LABEL_KEY, EVENT_LABEL_MOVE)
+    def callback(self, event):
+        pass
+
+PUMPS = ['EA', 'FB', 'CA', 'DB', 'AB', 'BA', 'EC', 'FD']
+
+def widgets(legacy):
+    widgets = {'FuelTank:' + name : (LegacyTank, Tank) for name in 'ABCDEF'}
+    widgets.update({'Pump:' + name : (LegacyPump, Pump) for name in PUMPS})
+    widgets.update({'Scale:' + str(i) : (LegacyScale, Scale) for i in range(4)})
+    widgets.update({'WarningLight:' + str(i) : (LegacyWarningLight, WarningLight) for i in range(2)})
+    widgets['Target:0'] = (LegacyTracking, Tracking)
+    callback = GlobalEventCallback(NullLogger())
+    for name, (legacy_cls, cls) in widgets.items():
+        if legacy:
+            callback.register_sink(name, legacy_cls())
+        else:
+            sink = cls()
+            sink.register(name) # binds the handlers
+            callback.register_sink(name, sink)
+    return callback
+
+def second():
+    events = []
+    for _ in range(10):
+        events.extend(Event('FuelTank:' + name, 'FuelTank:' + name, label=EVENT_LABEL_BURN, value=-0.5) for name in 'AB')
+        for pump in PUMPS:
+            events.append(Event('Pump:' + pump, 'FuelTank:' + pump[0], label=EVENT_LABEL_TRANSFER, value=-1))
+            events.append(Event('Pump:' + pump, 'FuelTank:' + pump[1], label=EVENT_LABEL_TRANSFER, value=1))
+    for _ in range(20):
+        events.append(Event('TargetEventGenerator', 'Target:0', label=EVENT_LABEL_MOVE, dx=1, dy=1))
+        events.append(Event('KeyHandler', 'Target:0', label=EVENT_LABEL_KEY, key='Left', action='hold'))
+    events.extend(Event('ScaleEventGenerator', 'Scale:' + str(i), label=EVENT_LABEL_SLIDE, slide=1) for i in range(4))
+    events.append(Event('WarningLightEventGenerator', 'WarningLight:0', label=EVENT_LABEL_SWITCH))
+    events.append(Event('Canvas', 'Pump:EA', label=EVENT_LABEL_CLICK, x=0, y=0))
+    events.append(Event('KeyHandler', 'Scale:0', label=EVENT_LABEL_KEY, key='F1', action='press'))
+    return events
+
+def dispatcher(legacy):
+    callback = widgets(legacy)
+    events = second() * N
+    def _dispatch():
+        for event in events:
+            callback._trigger(event)
+    return len(events), _dispatch
+
+def dispatch(rounds=ROUNDS):
+    """ Dispatch rates (events/sec) of each round, if/elif and handlers alternately.
+
+    Returns:
+        dict: legacy (bool) -> [rate, ...]
+    """
+    dispatchers = {legacy:dispatcher(legacy) for legacy in (True, False)}
+    rates = {legacy:[] for legacy in dispatchers}
+    for _ in range(rounds):
+        for legacy, (n, fun) in dispatchers.items():
+            rates[legacy].append(n / timeit.timeit(fun, number=1))
+    return rates
+
+if __name__ == '__main__':
+    rates = dispatch()
+    print("{0:<10} {1:>16} {2:>12} {3:>12}".format("sink", "median/sec", "min/sec", "max/sec"))
+    for legacy in [True, False]:
+        r = rates[legacy]
+        print("{0:<10} {1:>16.0f} {2:>12.0f} {3:>12.0f}".format(("handlers", "if/elif")[int(legacy)], median(r), min(r), max(r)))
+    ratios = [h / l for h, l in zip(rates[False], rates[True])]
+    print("handlers / if/elif: median {0:.2f} (rounds {1:.2f} - {2:.2f}, {3} of {4} faster)".format(
+          median(ratios), min(ratios), max(ratios), sum(ratio > 1 for ratio in ratios), len(ratios)))
@@ -0,0 +1,69 @@
+"""
+    Micro-benchmark of Event allocation and dispatch, compares icu.event.Event with the
+    previous SimpleNamespace based event class.
+"""
+import gc
+import timeit
+import tracemalloc
+
+from time import time
+from types import SimpleNamespace
+
+from icu.event import Event, GlobalEventCallback
+from icu.log import NullLogger
+
+N = 100000
+
+EVENT_NAME = 0
+def next_name():
+    global EVENT_NAME
+    EVENT_NAME += 1
+    return str(EVENT_NAME)
+
+class LegacyEvent:
+
+    def __init__(self, src, dst, timestamp=None, **data):
+        super(LegacyEvent, self).__init__()
+        self.name = next_name()
+        self.dst = dst
+        self.src = src
+        self.data = SimpleNamespace(**data)
+        self.timestamp = timestamp
+        if timestamp is None:
+            self.timestamp = time()
+
+class Sink:
+
+    def __init__(self):
+        self.total = 0
+
+    def sink(self, event):
+        if event.data.label == 'burn':
+            self.total += event.data.value
+
+def allocation(cls):
+    gc.collect()
+    tracemalloc.start()
+    snapshot = tracemalloc.take_snapshot()
+    events = [cls('FuelTank:A', 'FuelTank:A', label='burn', value=-0.5) for _ in range(N)]
+    stats = tracemalloc.take_snapshot().compare_to(snapshot, 'filename')
+    tracemalloc.stop()
+    blocks = sum(s.count_diff for s in stats)
+    size = sum(s.size_diff for s in stats)
+    del events
+    return blocks / N, size / N
+
+def dispatch(cls, repeat=5):
+    callback = GlobalEventCallback(NullLogger())
+    callback.register_sink('FuelTank:A', Sink())
+    def _dispatch():
+        callback.trigger(cls('FuelTank:A', 'FuelTank:A', label='burn', value=-0.5))
+    return N / min(timeit.repeat(_dispatch, number=N, repeat=repeat))
+
+if __name__ == '__main__':
+    classes = [LegacyEvent, Event]
+    throughput = {cls:dispatch(cls) for cls in classes} # before tracemalloc, which slows everything down
+    print("{0:<12} {1:>14} {2:>14} {3:>16}".format("class", "blocks/event", "bytes/event", "dispatch/sec"))
+    for cls in classes:
+        blocks, size = allocation(cls)
+        print("{0:<12} {1:>14.2f} {2:>14.1f} {3:>16.0f}".format(cls.__name__, blocks, size, throughput[cls]))
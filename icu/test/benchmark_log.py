@@ -0,0 +1,45 @@
+"""
+    Cost of logging on the GUI thread, EventLogger (format and write each event) against AsyncEventLogger (append a
+    record, see icu.log). N high rate events (gaze, burn and transfer) are logged as fast as possible, the time spent
+    in log() is reported, then the time close() waits for the writer. Every event must be in the log.
+"""
+import os
+import tempfile
+
+from time import perf_counter
+
+from icu.event import Event
+from icu.log import EventLogger, AsyncEventLogger
+
+N = 200000
+
+def events():
+    for i in range(N):
+        if i % 3 == 0:
+            yield Event('EyeTracker', 'Overlay:0', label='gaze', x=512.25 + i % 7, y=384.5, valid=True)
+        elif i % 3 == 1:
+            yield Event('FuelTank:A', 'FuelTank:A', label='burn', value=-0.5)
+        else:
+            yield Event('Pump:AB', 'FuelTank:B', label='transfer', value=1.25, cause=i)
+
+def benchmark(logger_type):
+    path = os.path.join(tempfile.mkdtemp(), 'event_log.txt')
+    logger = logger_type(path)
+    batch = list(events())
+    start = perf_counter()
+    for e in batch:
+        logger.log(e)
+    logged = perf_counter() - start
+    start = perf_counter()
+    logger.close()
+    closed = perf_counter() - start
+    with open(path) as f:
+        lines = sum(1 for _ in f)
+    assert lines == N, "{0} events were lost".format(N - lines)
+    return logged, closed
+
+if __name__ == '__main__':
+    print("{0:<18} {1:>14} {2:>12} {3:>12}".format("logger", "log() (us)", "log (ms)", "close (ms)"))
+    for logger_type in [EventLogger, AsyncEventLogger]:
+        logged, closed = benchmark(logger_type)
+        print("{0:<18} {1:>14.3f} {2:>12.1f} {3:>12.1f}".format(logger_type.__name__, logged / N * 1e6, logged * 1000, closed * 1000))
@@ -0,0 +1,109 @@
+"""
+    Garbage collection over a simulated hour (virtual schedular) of the high frequency periodic events 
+    (tank burn, pump transfer, target move, key hold), with and without the event pool (see icu.event.EventPool).
+    Collections and their pauses are measured with gc.callbacks.
+"""
+import gc
+
+from itertools import cycle
+from time import perf_counter
+
+from icu import event
+from icu.event import EventCallback, event_property, etuple, pooled
+from icu.log import NullLogger
+
+DURATION = 60 * 60 * 1000 # ms
+
+class Tank(EventCallback):
+
+    def __init__(self, name):
+        super(Tank, self).__init__()
+        self.register(name)
+        self.__fuel = 1000
+
+    @event_property
+    def fuel(self):
+        return self.__fuel
+
+    @fuel.setter
+    def fuel(self, value):
+        self.__fuel = min(max(value, 0), 2000)
+
+    def sink(self, event):
+        self.fuel = etuple(self.fuel + event.data.value, event)
+
+class Target(EventCallback):
+
+    def __init__(self, name):
+        super(Target, self).__init__()
+        self.register(name)
+        self.x = self.y = 0
+
+    def sink(self, event):
+        if event.data.label == 'move':
+            self.x += event.data.dx
+            self.y += event.data.dy
+
+def burn(tank):
+    while True:
+        yield pooled(tank, tank, label='burn', value=-0.6)
+
+def transfer(pump, tank1, tank2):
+    while True:
+        yield pooled(pump, tank1, label='transfer', value=-10), pooled(pump, tank2, label='transfer', value=10)
+
+def move(target):
+    while True:
+        yield pooled('TargetEventGenerator', target, label='move', dx=1., dy=-1.)
+
+def hold(target):
+    while True:
+        yield pooled('KeyHandler', target, label='key', key='Left', action='hold')
+
+class GCMonitor:
+
+    def __init__(self):
+        self.collections = [0, 0, 0]
+        self.pauses = []
+        self.__start = None
+
+    def __call__(self, phase, info):
+        if phase == 'start':
+            self.__start = perf_counter()
+        else:
+            self.collections[info['generation']] += 1
+            self.pauses.append(perf_counter() - self.__start)
+
+def simulate(pool):
+    event.GLOBAL_EVENT_CALLBACK.logger = NullLogger()
+    schedular = event.event_schedular('virtual')
+    pool = event.enable_event_pool(event.POOL_SIZE if pool else None)
+
+    tanks = {name:Tank(name) for name in 'ABCDEF'}
+    Target('Target:0')
+    for name in 'AB':
+        schedular.schedule(burn(name), sleep=cycle([100]), catchup=event.CATCHUP_MERGE)
+    for pump in ['EA', 'FB', 'CA', 'DB', 'AB', 'BA', 'EC', 'FD']:
+        schedular.schedule(transfer('Pump:' + pump, pump[0], pump[1]), sleep=cycle([100]), catchup=event.CATCHUP_MERGE)
+    schedular.schedule(move('Target:0'), sleep=cycle([50]))
+    schedular.schedule(hold('Target:0'), sleep=cycle([50]))
+
+    gc.collect()
+    monitor = GCMonitor()
+    gc.callbacks.append(monitor)
+    start = perf_counter()
+    schedular.run(until=DURATION)
+    elapsed = perf_counter() - start
+    gc.callbacks.remove(monitor)
+    schedular.close()
+    return monitor, elapsed, pool
+
+if __name__ == '__main__':
+    print("{0:<8} {1:>10} {2:>10} {3:>10} {4:>14} {5:>14} {6:>10}".format("pool", "gen0", "gen1", "gen2", "pause (ms)", "max pause (ms)", "run (s)"))
+    for use_pool in [False, True]:
+        monitor, elapsed, pool = simulate(use_pool)
+        print("{0:<8} {1:>10} {2:>10} {3:>10} {4:>14.1f} {5:>14.3f} {6:>10.2f}".format(str(use_pool), *monitor.collections, 
+                sum(monitor.pauses) * 1000, max(monitor.pauses, default=0) * 1000, elapsed))
+        if pool is not None:
+            print("  events created: {0}, reused: {1}".format(pool.created, pool.reused))
+    event.close()
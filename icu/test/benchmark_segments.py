@@ -0,0 +1,57 @@
+"""
+    Size and seek time of segmented, compressed event logs (see icu.seglog) against the text log. A 60 minute session
+    of high rate events (gaze at 60 Hz, tank burns and pump transfers at 10 Hz) is logged, then the events of minute 30
+    are read, through the index and by reading the whole text log.
+"""
+import os
+import glob
+import tempfile
+
+from time import perf_counter
+
+from icu.event import Event
+from icu.log import AsyncEventLogger
+from icu.seglog import SegmentedEventLogger, SegmentedEventLog
+
+MINUTES = 60
+START = 1600000000.
+
+def session(logger):
+    logger.log(Event('Global', 'Global', timestamp=START, monotonic=0, label='session')) # the anchor (see event.event_schedular)
+    for i in range(MINUTES * 60 * 60): # 60 Hz
+        t, m = START + i / 60, i * 10 ** 9 // 60
+        logger.log(Event('EyeTracker', 'Overlay:0', timestamp=t, monotonic=m, label='gaze', x=512.25 + i % 7, y=384.5))
+        if i % 6 == 0:
+            logger.log(Event('FuelTank:A', 'FuelTank:A', timestamp=t, monotonic=m, label='burn', value=-0.5))
+            logger.log(Event('Pump:AB', 'FuelTank:B', timestamp=t, monotonic=m, label='transfer', value=1.25, cause=i))
+    logger.close()
+
+def minute(m):
+    return START + m * 60, START + (m + 1) * 60
+
+def text(directory):
+    path = os.path.join(directory, 'event_log.txt')
+    session(AsyncEventLogger(path))
+    start, end = minute(MINUTES // 2)
+    begin = perf_counter()
+    with open(path) as f:
+        n = sum(1 for line in f if start <= float(line.split(':', 2)[1]) < end)
+    return os.path.getsize(path), perf_counter() - begin, n
+
+def segmented(directory, codec):
+    path = os.path.join(directory, 'event_log')
+    session(SegmentedEventLogger(path, codec=codec, segment_bytes=1 << 20))
+    size = sum(os.path.getsize(f) for f in glob.glob(path + '.*'))
+    begin = perf_counter()
+    log = SegmentedEventLog(path)
+    n = sum(1 for _ in log.lines(*minute(MINUTES // 2)))
+    return size, perf_counter() - begin, n
+
+if __name__ == '__main__':
+    print("{0:<10} {1:>12} {2:>18} {3:>10}".format("log", "size (MB)", "read minute (ms)", "events"))
+    size, elapsed, n = text(tempfile.mkdtemp())
+    print("{0:<10} {1:>12.1f} {2:>18.1f} {3:>10}".format("text", size / 1e6, elapsed * 1000, n))
+    for codec in ['gzip', 'lzma']:
+        size, elapsed, m = segmented(tempfile.mkdtemp(), codec)
+        assert m == n, "{0} events in minute 30, expected {1}".format(m, n)
+        print("{0:<10} {1:>12.1f} {2:>18.1f} {3:>10}".format(codec, size / 1e6, elapsed * 1000, m))
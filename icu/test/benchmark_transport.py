@@ -0,0 +1,41 @@
+"""
+    Benchmark of external event transports (see icu.transport), events/sec and latency of
+    encoded events sent from a child process, multiprocessing.Queue vs the shared memory RingBuffer.
+"""
+from multiprocessing import Process
+from time import sleep, monotonic_ns
+
+from icu.event import Event, encode, decode
+from icu.transport import transport
+
+N = 20000       # events for the throughput test
+M = 2000        # events for the latency test
+RATE = 1000     # events/sec in the latency test
+
+def produce(buffer, n, rate):
+    for i in range(n):
+        buffer.put(encode(Event('agent', 'Highlight:Pump:AB', label='highlight', value=True, sent=monotonic_ns())))
+        if rate is not None:
+            sleep(1. / rate)
+
+def run(name, n, rate=None):
+    buffer = transport(name)
+    p = Process(target=produce, args=(buffer, n, rate))
+    start = monotonic_ns()
+    p.start()
+    latency = []
+    for i in range(n):
+        event = decode(buffer.get())
+        latency.append(monotonic_ns() - event.data.sent)
+    elapsed = (monotonic_ns() - start) / 1e9
+    p.join()
+    buffer.close()
+    latency.sort()
+    return n / elapsed, latency[len(latency) // 2] / 1e3, latency[int(len(latency) * .99)] / 1e3
+
+if __name__ == '__main__':
+    print("{0:<8} {1:>14} {2:>18} {3:>18}".format("", "events/sec", "p50 latency (us)", "p99 latency (us)"))
+    for name in ['queue', 'ring']:
+        throughput, _, _ = run(name, N)
+        _, p50, p99 = run(name, M, rate=RATE)
+        print("{0:<8} {1:>14.0f} {2:>18.1f} {3:>18.1f}".format(name, throughput, p50, p99))
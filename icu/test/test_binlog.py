@@ -0,0 +1,168 @@
+"""
+    The binary event log (see icu.binlog): the writer, the converter (also run as python -m icu.binlog) and the
+    reader (requires numpy, skipped if it is not installed). Chunks are also decoded here without numpy.
+"""
+import os
+import sys
+import json
+import tempfile
+import subprocess
+
+from array import array
+
+import pytest
+
+from icu.event import Event
+from icu.log import AsyncEventLogger
+from icu.binlog import BinaryEventLogger, convert, parse_line, _HEADER, _CHUNK, _COUNT, _STR, _COLUMN, MAGIC, INT_NONE
+
+def events():
+    return [Event('Pump:AB', 'FuelTank:A', timestamp=100. + i, monotonic=1000 + i, label='transfer', value=-0.5 * i, cause=10 ** 12 + i)
+            for i in range(5)] + \
+           [Event('agent', ['Highlight:Pump:AB', 'Highlight:Pump:BA'], timestamp=200., monotonic=2000, label='highlight', value=1, text='on'),
+            Event('Global', 'Global', timestamp=300., monotonic=3000, label='delta', changes={'Pump:AB' : {'state' : 1}})]
+
+def record(e):
+    return (e.name, e.timestamp, e.monotonic, e.src, e.dst, dict(e.data))
+
+def read_chunks(path):
+    # the chunks of a binary log as [(rows, strings, {name: (type, bytes)})]
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert _HEADER.unpack_from(data, 0)[0] == MAGIC
+    offset, chunks = _HEADER.size, []
+    while offset < len(data):
+        magic, rows, size = _CHUNK.unpack_from(data, offset)
+        assert magic == b'CHNK'
+        start, position = offset, offset + _CHUNK.size
+        strings = []
+        n = _COUNT.unpack_from(data, position)[0]
+        position += _COUNT.size
+        for _ in range(n):
+            length = _STR.unpack_from(data, position)[0]
+            position += _STR.size
+            strings.append(data[position:position + length].decode('utf-8'))
+            position += length
+        columns = {}
+        for _ in range(_COUNT.unpack_from(data, position)[0]):
+            length = data[position + _COUNT.size]
+            name = data[position + _COUNT.size + 1:position + _COUNT.size + 1 + length].decode('utf-8')
+            kind, column, nbytes = _COLUMN.unpack_from(data, position + _COUNT.size + 1 + length)
+            columns[name] = (chr(kind), data[start + column:start + column + nbytes])
+            position += 1 + length + _COLUMN.size
+        chunks.append((rows, strings, columns))
+        offset += _CHUNK.size + size
+    return chunks
+
+def values(column):
+    kind, data = column
+    result = array(kind)
+    result.frombytes(data)
+    if sys.byteorder == 'big':
+        result.byteswap()
+    return list(result)
+
+def test_writer():
+    path = os.path.join(tempfile.mkdtemp(), 'log.icul')
+    logger = BinaryEventLogger(path)
+    logged = events()
+    for e in logged:
+        logger.log(e)
+    logger.close()
+    (rows, strings, columns), = read_chunks(path)
+    assert rows == len(logged)
+    assert values(columns['id']) == [e.name for e in logged]
+    assert columns['cause'][0] == 'q' # ids stay ints
+    assert values(columns['cause']) == [10 ** 12 + i for i in range(5)] + [INT_NONE, INT_NONE]
+    assert columns['value'][0] == 'd'
+    assert values(columns['value'])[:6] == [-0.5 * i for i in range(5)] + [1.]
+    assert strings[values(columns['label'])[5]] == 'highlight'
+    assert strings[values(columns['dst'])[5]] == 'Highlight:Pump:AB,Highlight:Pump:BA'
+    kind, extra = columns['extra']
+    offsets = values(('I', extra[:(rows + 1) * 4]))
+    assert json.loads(extra[(rows + 1) * 4 + offsets[5]:(rows + 1) * 4 + offsets[6]]) == {'text' : 'on'}
+
+def test_parse_line():
+    for e in events():
+        assert parse_line(str(e) + "\n") == record(e)
+    assert parse_line("not an event\n") is None
+
+def text_log(directory):
+    path = os.path.join(directory, 'event_log.txt')
+    logger = AsyncEventLogger(path)
+    for e in events():
+        logger.log(e)
+    logger.close()
+    with open(path, 'a') as f:
+        f.write("a line that is not an event\n")
+    return path
+
+def test_convert():
+    directory = tempfile.mkdtemp()
+    text = text_log(directory)
+    binary = os.path.join(directory, 'event_log.icul')
+    assert convert(text, binary, chunk=3) == (len(events()), 1)
+    chunks = read_chunks(binary)
+    assert [rows for rows, _, _ in chunks] == [3, 3, 1]
+    assert sum((values(columns['id']) for _, _, columns in chunks), []) == [parse_line(line)[0] for line in open(text) if parse_line(line)]
+
+def test_convert_command():
+    # the text log given to the converter must not be touched (importing icu used to truncate event_log.txt)
+    directory = tempfile.mkdtemp()
+    text = text_log(directory)
+    with open(text) as f:
+        before = f.read()
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    subprocess.check_call([sys.executable, '-m', 'icu.binlog', 'event_log.txt', 'event_log.icul'], cwd=directory, env=env,
+                          stdout=subprocess.DEVNULL)
+    with open(text) as f:
+        assert f.read() == before
+    assert sum(rows for rows, _, _ in read_chunks(os.path.join(directory, 'event_log.icul'))) == len(events())
+
+def test_reader():
+    np = pytest.importorskip('numpy')
+    from icu.binlog import BinaryEventLog
+    path = os.path.join(tempfile.mkdtemp(), 'log.icul')
+    logger = BinaryEventLogger(path)
+    logged = events()
+    for e in logged:
+        logger.log(e)
+    logger.close()
+    with BinaryEventLog(path) as log:
+        assert len(log) == len(logged)
+        assert log.column('id').dtype == np.int64 and log.column('cause').dtype == np.int64
+        expected = []
+        for e in logged:
+            name, timestamp, monotonic, src, dst, data = record(e)
+            expected.append((name, timestamp, monotonic, src, ','.join(dst) if isinstance(dst, list) else dst, data))
+        assert list(log.records()) == expected
+        transfer = log.label('transfer')
+        assert list(transfer['cause']) == [10 ** 12 + i for i in range(5)]
+        assert len(log.label('unknown')['id']) == 0
+
+def test_reader_converted():
+    pytest.importorskip('numpy')
+    from icu.binlog import BinaryEventLog
+    directory = tempfile.mkdtemp()
+    text = text_log(directory)
+    binary = os.path.join(directory, 'event_log.icul')
+    convert(text, binary, chunk=3)
+    with BinaryEventLog(binary) as log:
+        records = list(log.records())
+    parsed = [parse_line(line) for line in open(text) if parse_line(line)]
+    assert [r[0] for r in records] == [r[0] for r in parsed]
+    assert [r[5].get('cause') for r in records] == [r[5].get('cause') for r in parsed]
+
+if __name__ == '__main__':
+    test_writer()
+    test_parse_line()
+    test_convert()
+    test_convert_command()
+    try:
+        import numpy
+    except ImportError:
+        print("numpy is not installed, the reader is not tested")
+    else:
+        test_reader()
+        test_reader_converted()
+    print("OK")
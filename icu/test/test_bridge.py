@@ -0,0 +1,104 @@
+"""
+    The event bridge (see icu.bridge): a client subscribes, sends events to ICU and receives the events it subscribes
+    to, events sent only to bridge clients are never pickled, a live bridge is not replaced. Runs headless (asyncio
+    schedular), the client runs on a thread.
+"""
+import os
+import socket
+import tempfile
+
+from threading import Thread
+
+from icu import event
+from icu.event import EventCallback, Event, Session, handles
+from icu.bridge import Bridge, BridgeClient
+from icu.log import NullLogger
+
+PATH = os.path.join(tempfile.gettempdir(), 'icu-test-{0}.sock'.format(os.getpid()))
+
+class Unpicklable:
+
+    def __reduce__(self):
+        raise TypeError("pickled")
+
+    def __str__(self):
+        return "unpicklable"
+
+class Receiver(EventCallback):
+
+    def __init__(self, schedular):
+        super(Receiver, self).__init__()
+        self.schedular = schedular
+        self.received = []
+        self.register('Receiver')
+
+    @handles('hello')
+    def hello_callback(self, event):
+        self.received.append(event.data.value)
+        for i in range(3):
+            self.session.bus.trigger(Event('Receiver', 'Global', label='ping', value=i, other=Unpicklable()))
+        self.session.bus.trigger(Event('Receiver', 'Global', label='other'))
+
+    @handles('bye')
+    def bye_callback(self, event):
+        self.received.append('bye')
+        self.schedular.after(50, self.schedular.close)
+
+def client(results):
+    client = BridgeClient(PATH)
+    client.subscribe(labels=['ping'])
+    client.source('agent', 'Receiver', label='hello', value=42)
+    for _ in range(3):
+        e = client.get(timeout=5)
+        results.append((e.src, e.data.label, e.data.value, e.data.other))
+    client.source('agent', 'Receiver', label='bye')
+    client.close()
+
+def test_bridge():
+    results = []
+    with Session(NullLogger()) as session:
+        schedular = event.event_schedular('asyncio')
+        receiver = Receiver(schedular)
+        bridge = Bridge(PATH)
+        bridge.start()
+        thread = Thread(target=client, args=(results,))
+        thread.start()
+        schedular.after(10000, schedular.close) # in case of failure
+        schedular.run()
+        thread.join()
+        bridge.close()
+        session.close()
+    assert receiver.received == [42, 'bye']
+    assert results == [('Receiver', 'ping', i, 'unpicklable') for i in range(3)]
+    assert not os.path.exists(PATH)
+
+def test_live_path():
+    with Session(NullLogger()) as session:
+        event.event_schedular('asyncio')
+        bridge = Bridge(PATH)
+        bridge.start()
+        try:
+            Bridge(PATH).start()
+        except OSError:
+            pass
+        else:
+            assert False, "a live bridge was replaced"
+        bridge.close()
+        session.close()
+
+def test_stale_path():
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(PATH) # never listens, as if left by a session that crashed
+    stale.close()
+    with Session(NullLogger()) as session:
+        event.event_schedular('asyncio')
+        bridge = Bridge(PATH)
+        bridge.start()
+        bridge.close()
+        session.close()
+
+if __name__ == '__main__':
+    test_bridge()
+    test_live_path()
+    test_stale_path()
+    print("OK")
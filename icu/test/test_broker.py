@@ -0,0 +1,57 @@
+"""
+    The broker process (see icu.broker): each sink is sent the events it subscribes to, a slow sink does not hold up
+    the others, and the events it drops are reported (see Broker.stats).
+"""
+from time import monotonic
+
+from icu.event import Event, ExternalEventSink, GlobalEventCallback
+from icu.broker import Broker
+from icu.log import NullLogger
+
+N = 1000
+
+def test_slow_sink():
+    fast = ExternalEventSink()
+    clicks = ExternalEventSink(labels=['click'])
+    slow = ExternalEventSink(capacity=10, overflow='drop-newest') # never read
+    broker = Broker([fast, clicks, slow])
+    broker.start()
+    bus = GlobalEventCallback(NullLogger())
+    bus.register_external_sink(broker.sink.name, broker.sink)
+    for i in range(N):
+        bus.trigger(Event('agent', 'Global', label='click' if i % 10 == 0 else 'move', i=i))
+
+    received = []
+    end = monotonic() + 10
+    while len(received) < N and monotonic() < end:
+        received.extend(e.data.i for e in fast.get_many(timeout=0.1))
+    assert received == list(range(N)) # in order, none lost while the slow sink was full
+
+    assert [e.data.i for e in clicks.get_many(max_n=N // 10, timeout=1)] == list(range(0, N, 10))
+
+    broker.close(timeout=5)
+    assert not broker.process.is_alive()
+    stats = broker.stats()
+    assert stats[slow.name]['sent'] == 10 and stats[slow.name]['dropped'] == N - 10
+    assert stats[fast.name]['dropped'] == 0 and stats[fast.name]['received'] == N
+    assert stats[broker.sink.name]['sent'] == N
+    for sink in (fast, clicks, slow, broker.sink):
+        sink.close()
+
+def test_shutdown():
+    sink = ExternalEventSink()
+    broker = Broker([sink])
+    broker.start()
+    bus = GlobalEventCallback(NullLogger())
+    bus.register_external_sink(broker.sink.name, broker.sink)
+    bus.trigger(Event('Global', 'Global', label='system', command='shutdown'))
+    broker.process.join(5)
+    assert not broker.process.is_alive() # stops with ICU
+    assert sink.get().data.command == 'shutdown'
+    sink.close()
+    broker.sink.close()
+
+if __name__ == '__main__':
+    test_slow_sink()
+    test_shutdown()
+    print("OK")
@@ -0,0 +1,101 @@
+"""
+    Catch up of periodic event generators that missed their deadline (see event.Periodic). Each missed tick must be
+    applied before the next one is generated, a pump that empties a tank during catch up must not create fuel.
+    Runs headless (VirtualSchedular).
+"""
+from icu import event
+from itertools import repeat
+
+from icu.event import EventCallback, Session, VirtualSchedular, handles
+
+FLOW = 5 # fuel per tick
+
+class LateSchedular(VirtualSchedular):
+    # the first tick is `late` ms late, as if the schedular was busy
+    def __init__(self, late):
+        super(LateSchedular, self).__init__()
+        self.late = late
+
+    def after(self, sleep, fun, *args):
+        super(LateSchedular, self).after(sleep + self.late, fun, *args)
+        self.late = 0
+
+class Tank(EventCallback):
+
+    def __init__(self, name, fuel):
+        super(Tank, self).__init__()
+        self.fuel = fuel
+        self.register(name)
+
+    @handles('transfer')
+    def transfer_callback(self, event):
+        self.fuel = max(0, self.fuel + event.data.value)
+
+def transfer(tank1, tank2):
+    # the same guard as fuel_monitor.Pump.transfer
+    while True:
+        flow = min(FLOW, tank1.fuel)
+        if flow <= 0:
+            yield None
+        else:
+            yield (event.Event(tank1.name, tank1.name, label='transfer', value=-flow),
+                   event.Event(tank1.name, tank2.name, label='transfer', value=flow))
+
+class Log:
+
+    def __init__(self):
+        self.events = []
+
+    def log(self, e):
+        self.events.append((e.dst, e.data.value))
+
+    def close(self):
+        pass
+
+def run(catchup, fuel, late, profile=False):
+    log = Log()
+    with Session(log) as session:
+        schedular = LateSchedular(late)
+        session.schedular = schedular
+        profiler = session.bus.profile() if profile else None
+        a, b = Tank('A', fuel), Tank('B', 0)
+        handle = schedular.schedule(transfer(a, b), sleep=repeat(10), catchup=catchup)
+        schedular.run(until=100)
+        handle.cancel()
+        stats = profiler.stats() if profiler is not None else None
+        session.close()
+    return a.fuel, b.fuel, log.events, handle.drift, stats
+
+def test_replay_tank_runs_dry():
+    a, b, events, drift, _ = run(event.CATCHUP_REPLAY, 12, 40) # 5 ticks are due at the first trigger
+    assert (a, b) == (0, 12)
+    assert sum(value for dst, value in events if dst == 'B') == 12
+    assert drift.missed == 4
+
+def test_merge_tank_runs_dry():
+    a, b, events, drift, _ = run(event.CATCHUP_MERGE, 12, 40)
+    assert (a, b) == (0, 12)
+    assert events[:2] == [('A', -12), ('B', 12)] # the amounts that were transferred, published once
+    assert drift.missed == 4
+
+def test_merge_without_missed_ticks():
+    a, b, events, drift, _ = run(event.CATCHUP_MERGE, 12, 0)
+    assert (a, b) == (0, 12)
+    assert events == [('A', -5), ('B', 5), ('A', -5), ('B', 5), ('A', -2), ('B', 2)]
+    assert drift.missed == 0
+
+def test_profile_merge():
+    # every applied tick is counted by the profiler, every published event is logged and sent
+    for catchup in event.CATCHUP:
+        a, b, events, drift, stats = run(catchup, 1000, 40, profile=True)
+        assert b == 10 * FLOW
+        assert stats[('A', 'transfer')]['count'] == stats[('B', 'transfer')]['count'] == 10
+        assert stats[event.PROFILE_LOGGING]['count'] == stats[event.PROFILE_EXTERNAL]['count'] == len(events)
+        assert len(events) == (12 if catchup == event.CATCHUP_MERGE else 20)
+
+if __name__ == '__main__':
+    test_replay_tank_runs_dry()
+    test_merge_tank_runs_dry()
+    test_merge_without_missed_ticks()
+    test_profile_merge()
+    print("OK")
@@ -0,0 +1,80 @@
+"""
+    Causes of changes to event properties (see event.CausalIndex): ids and causes in 'delta' events, and causal
+    queries sent as events to 'CausalIndex' (see event.CausalQuery). Runs headless (VirtualSchedular).
+"""
+from icu import event
+from icu.event import EventCallback, Event, Session, etuple, event_property, handles
+
+class Pump(EventCallback):
+
+    def __init__(self, name):
+        super(Pump, self).__init__()
+        self.__state = 0
+        self.register(name)
+
+    @event_property
+    def state(self):
+        return self.__state
+
+    @state.setter
+    def state(self, value):
+        self.__state = value
+
+    @handles('click')
+    def click_callback(self, event):
+        self.state = etuple(1 - self.state, event)
+
+class Log:
+
+    def __init__(self):
+        self.events = []
+
+    def log(self, e):
+        self.events.append(e)
+
+    def close(self):
+        pass
+
+    def labelled(self, label, dst='Global'):
+        return [e for e in self.events if e.data.get('label', None) == label and e.dst == dst]
+
+def run(*queries):
+    log = Log()
+    with Session(log) as session:
+        schedular = event.event_schedular('virtual')
+        pump = Pump('Pump:AB')
+        click = Event('agent', 'Pump:AB', label='click')
+        schedular.schedule(click, sleep=10)
+        schedular.run(until=500) # the change is published in a delta
+        for query in queries:
+            schedular.schedule(Event('agent', 'CausalIndex', **query(log, click)), sleep=10)
+        schedular.run(until=1000)
+        session.close()
+    return log, click
+
+def change_id(log):
+    delta, = log.labelled('delta')
+    return delta.data.ids['Pump:AB']['state']
+
+def test_delta_ids_and_causes():
+    log, click = run()
+    delta, = log.labelled('delta')
+    assert delta.data.changes == {'Pump:AB' : {'state' : 1}}
+    assert delta.data.causes == {'Pump:AB' : {'state' : click.name}}
+    assert delta.data.ids['Pump:AB']['state'] > click.name
+
+def test_queries():
+    log, click = run(lambda log, click: dict(label='cause', id=change_id(log)),
+                     lambda log, click: dict(label='chain', id=change_id(log)),
+                     lambda log, click: dict(label='effects', id=click.name))
+    cause, = log.labelled('cause')
+    assert cause.data.id == change_id(log) and cause.data.result == click.name
+    chain, = log.labelled('chain')
+    assert chain.data.result == [click.name, change_id(log)]
+    effects, = log.labelled('effects')
+    assert effects.data.result == [change_id(log)]
+
+if __name__ == '__main__':
+    test_delta_ids_and_causes()
+    test_queries()
+    print("OK")
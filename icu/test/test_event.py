@@ -0,0 +1,58 @@
+"""
+    The slotted Event and EventData (see event.Event): integer ids, data shared with the dict it was created from,
+    copies and pickling.
+"""
+import pickle
+
+from icu.event import Event, EventData
+
+def test_slots():
+    e = Event('FuelTank:A', 'FuelTank:A', label='burn', value=-0.5)
+    assert not hasattr(e, '__dict__')
+    try:
+        e.other = 1
+    except AttributeError:
+        pass
+    else:
+        assert False, "Event has no __dict__"
+
+def test_ids():
+    e1, e2 = Event('A', 'B'), Event('A', 'B')
+    assert isinstance(e1.name, int)
+    assert e2.name > e1.name
+
+def test_data():
+    data = dict(label='burn', value=-0.5)
+    e = Event('FuelTank:A', 'FuelTank:A', **data)
+    assert e.data.label == 'burn' and e.data['value'] == -0.5
+    assert 'label' in e.data and 'dx' not in e.data
+    assert e.data.get('dx', 0) == 0
+    assert dict(e.data) == data
+    assert e.data == EventData(dict(data))
+    d = dict(x=1)
+    assert EventData(d).__dict__ is d # no copy
+
+def test_copy():
+    e = Event('A', 'B', label='click', x=1)
+    c = e.copy(dst='C')
+    assert (c.name, c.src, c.dst, c.timestamp, c.monotonic) == (e.name, 'A', 'C', e.timestamp, e.monotonic)
+    assert c.data is e.data
+
+def test_pickle():
+    e = Event('A', 'B', label='click', x=1)
+    p = pickle.loads(pickle.dumps(e))
+    assert (p.name, p.src, p.dst, p.data, p.timestamp, p.monotonic) == (e.name, e.src, e.dst, e.data, e.timestamp, e.monotonic)
+    assert p.pool is None
+
+def test_str():
+    e = Event('A', 'B', timestamp=1.5, monotonic=2, label='click')
+    assert str(e) == "{0}:1.5:2 - (A->B): {{'label': 'click'}}".format(e.name)
+
+if __name__ == '__main__':
+    test_slots()
+    test_ids()
+    test_data()
+    test_copy()
+    test_pickle()
+    test_str()
+    print("OK")
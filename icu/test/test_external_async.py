@@ -0,0 +1,74 @@
+"""
+    An asyncio agent (see icu.aio) talking to ICU running in another process (icu.start): the agent highlights
+    components until ICU shuts down and receives the events of the session. Skipped without a display (run it with
+    xvfb-run on a server).
+"""
+import icu
+
+import os
+import json
+import asyncio
+import random
+import tempfile
+from pprint import pprint
+
+import pytest
+
+from icu.aio import AsyncEventSink, AsyncEventSource
+
+SHUTDOWN = 3000 # ms
+
+def display():
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+    except Exception: # no tkinter or no display
+        return False
+    return True
+
+async def agent(p, sink, source, highlight):
+    sender = AsyncEventSource(source)
+    received = []
+
+    async def _sink():
+        async for event in AsyncEventSink(sink):
+            received.append(event)
+
+    receiving = asyncio.ensure_future(_sink())
+    while p.is_alive():
+        await sender.send('agent-1', random.choice(highlight), label='highlight', value=random.choice([True,False]))
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.1) # the last events
+    receiving.cancel()
+    return received
+
+def run(shutdown=0):
+    directory = tempfile.mkdtemp()
+    config = os.path.join(directory, 'config.json')
+    with open(config, 'w') as f:
+        json.dump(dict(shutdown=shutdown, input=dict(eyetracker=dict(enabled=False))), f)
+    sink = icu.ExternalEventSink(wakeup=True)
+    source = icu.ExternalEventSource()
+
+    p, m = icu.start(sinks=[sink], sources=[source], config=config, log=os.path.join(directory, 'event_log.txt'))
+
+    #all of the hightlightable sinks
+    highlight = [h for h in m.event_sinks if 'Highlight' in h]
+
+    received = asyncio.run(agent(p, sink, source, highlight))
+    p.join()
+    return m, highlight, received
+
+def test_agent():
+    if not display():
+        pytest.skip("requires a display")
+    m, highlight, received = run(shutdown=SHUTDOWN)
+    assert highlight
+    assert 'window' in m.window_properties
+    assert any(e.src == 'agent-1' and e.data.label == 'highlight' for e in received) # sent through ICU
+    assert any(e.data.get('command', None) == 'shutdown' for e in received)
+
+if __name__ == '__main__':
+    m, _, _ = run() # until the window is closed
+    pprint(m.window_properties)
+    print("DONE")
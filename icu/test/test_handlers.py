@@ -0,0 +1,62 @@
+"""
+    Per-label event handlers (see event.handles): handlers are called directly by the bus, a subclass that overrides
+    sink receives the events of the handlers of its base classes (e.g. fuel_monitor.FuelTankInfinite).
+"""
+from icu.event import EventCallback, Event, Session, handles
+from icu.log import NullLogger
+
+class Tank(EventCallback):
+
+    def __init__(self, name, fuel):
+        super(Tank, self).__init__()
+        self.fuel = fuel
+        self.register(name)
+
+    @handles('burn', 'transfer')
+    def transfer_callback(self, event):
+        self.fuel += event.data.value
+
+class InfiniteTank(Tank):
+
+    def sink(self, event): # receives no events
+        pass
+
+class RefillTank(InfiniteTank):
+
+    @handles('refill')
+    def refill_callback(self, event):
+        self.fuel = 100
+
+def trigger(session, name, label, value=0):
+    session.bus.trigger(Event(name, name, label=label, value=value))
+
+def test_handlers():
+    with Session(NullLogger()) as session:
+        tank = Tank('A', 10)
+        trigger(session, 'A', 'burn', -1)
+        trigger(session, 'A', 'transfer', 5)
+        trigger(session, 'A', 'other')
+        assert tank.fuel == 14
+        assert session.bus.unhandled == {('A', 'other') : 1}
+
+def test_sink_override():
+    with Session(NullLogger()) as session:
+        tank = InfiniteTank('A', 10)
+        trigger(session, 'A', 'burn', -1)
+        trigger(session, 'A', 'transfer', -5)
+        assert tank.fuel == 10
+        tank = RefillTank('B', 10)
+        trigger(session, 'B', 'burn', -1)
+        trigger(session, 'B', 'refill')
+        assert tank.fuel == 100
+
+def test_infinite_tank():
+    from icu.fuel_monitor import FuelTank, FuelTankInfinite
+    assert set(FuelTank.__handlers__) == {'burn', 'transfer'}
+    assert FuelTankInfinite.__handlers__ == {} # every event goes to its sink, the level never changes
+
+if __name__ == '__main__':
+    test_handlers()
+    test_sink_override()
+    test_infinite_tank()
+    print("OK")
@@ -0,0 +1,71 @@
+"""
+    The background event logger (see log.AsyncEventLogger): the same lines as EventLogger, the writer starts with the
+    first event, and a logger created before a fork logs in the child.
+"""
+import os
+import tempfile
+import threading
+import multiprocessing as mp
+
+from icu.event import Event
+from icu.log import AsyncEventLogger, EventLogger
+
+def events(n, src='A'):
+    return [Event(src, 'B', label='move', dx=i, dy=-i) for i in range(n)]
+
+def writers():
+    return [thread for thread in threading.enumerate() if thread.name == AsyncEventLogger.__name__]
+
+def test_lines():
+    directory = tempfile.mkdtemp()
+    logged = events(100)
+    for path, logger in ((os.path.join(directory, 'sync.txt'), EventLogger), (os.path.join(directory, 'async.txt'), AsyncEventLogger)):
+        logger = logger(path)
+        for e in logged:
+            logger.log(e)
+        logger.close()
+    with open(os.path.join(directory, 'sync.txt')) as sync, open(os.path.join(directory, 'async.txt')) as async_:
+        assert sync.read() == async_.read()
+
+def test_lazy_writer():
+    before = len(writers())
+    logger = AsyncEventLogger(os.path.join(tempfile.mkdtemp(), 'log.txt'))
+    assert len(writers()) == before # nothing logged
+    logger.log(events(1)[0])
+    assert len(writers()) == before + 1
+    logger.close()
+    assert logger.written == 1 and logger.pending() == 0
+
+def test_close_without_events():
+    path = os.path.join(tempfile.mkdtemp(), 'log.txt')
+    logger = AsyncEventLogger(path)
+    logger.close()
+    assert logger.file.closed
+    assert os.path.getsize(path) == 0
+
+def child(logger):
+    for e in events(50, src='child'):
+        logger.log(e)
+    logger.close()
+
+def test_fork():
+    path = os.path.join(tempfile.mkdtemp(), 'log.txt')
+    logger = AsyncEventLogger(path)
+    for e in events(10, src='parent'):
+        logger.log(e)
+    p = mp.get_context('fork').Process(target=child, args=(logger,))
+    p.start()
+    p.join(10)
+    assert p.exitcode == 0
+    logger.close()
+    with open(path) as f:
+        lines = f.readlines()
+    assert sum('(child->B)' in line for line in lines) == 50
+    assert sum('(parent->B)' in line for line in lines) == 10 # written once, by the parent
+
+if __name__ == '__main__':
+    test_lines()
+    test_lazy_writer()
+    test_close_without_events()
+    test_fork()
+    print("OK")
@@ -0,0 +1,88 @@
+"""
+    Coalescing external sinks (see event.OVERFLOW_COALESCE): a full sink holds back changes to event properties,
+    keeping the latest value of each (component, attr), so the receiver gets the final state once there is space,
+    whether changes are published as 'change' or as 'delta' events (see event.ChangeBuffer). Runs headless
+    (VirtualSchedular).
+"""
+from itertools import repeat
+
+from icu import event
+from icu.event import EventCallback, Event, ExternalEventSink, Session, event_property, handles
+from icu.log import NullLogger
+
+FRAMES = 10
+
+class Gauge(EventCallback):
+
+    def __init__(self, name):
+        super(Gauge, self).__init__()
+        self.__fuel = 0
+        self.register(name)
+
+    @event_property
+    def fuel(self):
+        return self.__fuel
+
+    @fuel.setter
+    def fuel(self, value):
+        self.__fuel = value
+
+    @handles('set')
+    def set_callback(self, event):
+        self.fuel = event.data.value
+
+def receive(sink, n):
+    # n events, waiting for them to arrive (see multiprocessing.Queue)
+    received = []
+    while len(received) < n:
+        events = sink.get_many(max_n=n - len(received), timeout=5)
+        assert events, "timeout"
+        received += events
+    return received
+
+def run(mode):
+    sink = ExternalEventSink(labels=['change', 'delta'], capacity=2, overflow='coalesce')
+    with Session(NullLogger()) as session:
+        schedular = event.event_schedular('virtual')
+        session.bus.changes = event.ChangeBuffer(mode=mode)
+        session.bus.register_external_sink(sink.name, sink)
+        Gauge('Gauge')
+        # one write per frame, the sink is never read while ICU runs
+        schedular.schedule((Event('agent', 'Gauge', label='set', value=i) for i in range(FRAMES)), sleep=repeat(event.CHANGE_FRAME))
+        schedular.run(until=(FRAMES + 2) * event.CHANGE_FRAME)
+        stats = sink.stats()
+        received = receive(sink, stats['sent'])
+        sink._flush() # as ICU does periodically (see GlobalEventCallback.schedule_external)
+        received += receive(sink, stats['pending'])
+        session.close()
+    return stats, received
+
+def values(received):
+    # the values of Gauge.fuel in the order they were received
+    result = []
+    for e in received:
+        if e.data.label == 'change' and e.src == 'Gauge':
+            result.append(e.data.value)
+        elif e.data.label == 'delta' and 'Gauge' in e.data.changes:
+            result.append(e.data.changes['Gauge']['fuel'])
+    return result
+
+def test_coalesce_changes():
+    stats, received = run(event.CHANGE_EVERY_WRITE)
+    assert (stats['sent'], stats['dropped'], stats['pending']) == (2, 0, 1)
+    assert stats['coalesced'] == FRAMES - 3
+    assert values(received) == [0, 1, FRAMES - 1]
+
+def test_coalesce_deltas():
+    stats, received = run(event.CHANGE_DELTA)
+    assert (stats['sent'], stats['dropped'], stats['pending']) == (2, 0, 1)
+    assert stats['coalesced'] == FRAMES - 3
+    assert values(received) == [0, 1, FRAMES - 1]
+    delta = received[-1].data
+    assert delta.counts['Gauge']['fuel'] == FRAMES - 2 # the writes that were merged
+    assert delta.ids['Gauge']['fuel'] is not None and delta.causes == {}
+
+if __name__ == '__main__':
+    test_coalesce_changes()
+    test_coalesce_deltas()
+    print("OK")
@@ -0,0 +1,78 @@
+"""
+    The event pool (see event.EventPool): pooled events return to the pool once they have been triggered and are
+    reused with a new id and data, detached events are not reused, events of other classes can still be triggered.
+"""
+from types import SimpleNamespace
+
+from icu import event
+from icu.event import EventCallback, Session, handles, pooled
+from icu.log import NullLogger
+
+class Sink(EventCallback):
+
+    def __init__(self, name):
+        super(Sink, self).__init__()
+        self.values = []
+        self.kept = []
+        self.register(name)
+
+    @handles('burn')
+    def burn_callback(self, event):
+        self.values.append(event.data.value)
+
+    @handles('keep')
+    def keep_callback(self, event):
+        event.detach()
+        self.kept.append(event)
+
+def test_reuse():
+    with Session(NullLogger()) as session:
+        pool = event.enable_event_pool(4)
+        sink = Sink('Tank')
+        e1 = pooled('Tank', 'Tank', label='burn', value=1)
+        name = e1.name
+        session.bus.trigger(e1)
+        assert len(pool) == 1
+        e2 = pooled('Tank', 'Tank', label='burn', value=2)
+        assert e2 is e1 and e2.name > name and dict(e2.data) == dict(label='burn', value=2)
+        session.bus.trigger(e2)
+        assert sink.values == [1, 2]
+        assert (pool.created, pool.reused) == (1, 1)
+
+def test_detach():
+    with Session(NullLogger()) as session:
+        pool = event.enable_event_pool(4)
+        sink = Sink('Tank')
+        e = pooled('Tank', 'Tank', label='keep', value=1)
+        session.bus.trigger(e)
+        assert len(pool) == 0
+        assert pooled('Tank', 'Tank', label='burn', value=2) is not e
+        assert sink.kept[0].data.value == 1
+
+def test_size():
+    with Session(NullLogger()) as session:
+        pool = event.enable_event_pool(2)
+        Sink('Tank')
+        session.bus.trigger(*[pooled('Tank', 'Tank', label='burn', value=i) for i in range(5)])
+        assert len(pool) == 2
+
+def test_disabled():
+    with Session(NullLogger()) as session:
+        event.enable_event_pool(None)
+        assert pooled('Tank', 'Tank', label='burn', value=1).pool is None
+
+def test_other_events():
+    # events without a pool attribute (e.g. from older code) are triggered as before
+    with Session(NullLogger()) as session:
+        sink = Sink('Tank')
+        session.bus.trigger(SimpleNamespace(name=1, src='Tank', dst='Tank', timestamp=0, monotonic=0,
+                                            data=event.EventData(dict(label='burn', value=3))))
+        assert sink.values == [3]
+
+if __name__ == '__main__':
+    test_reuse()
+    test_detach()
+    test_size()
+    test_disabled()
+    test_other_events()
+    print("OK")
@@ -0,0 +1,236 @@
+"""
+    Schedules and their handles (see event.Schedular.schedule, event.Handle): keyed schedules are not duplicated, a
+    pump toggled off and on again within a tick has a single transfer flow (see fuel_monitor.Pump), handles can be
+    cancelled and rescheduled. Immediate events (see event.Schedular.push) are triggered most urgent first, for at
+    most a frame budget at a time, and none are left behind when they are pushed from another thread. Runs headless
+    (VirtualSchedular).
+"""
+from time import monotonic, sleep
+from threading import Thread
+from collections import deque
+
+from icu import event
+from icu.event import EventCallback, Event, Session, handles
+from icu.fuel_monitor import Pump
+from icu.log import NullLogger
+
+class Tank(EventCallback):
+
+    def __init__(self, name, fuel, capacity=1000):
+        super(Tank, self).__init__()
+        self.fuel = fuel
+        self.capacity = capacity
+        self.register(name)
+
+    @handles('transfer')
+    def transfer_callback(self, event):
+        self.fuel += event.data.value
+
+class HeadlessPump(EventCallback):
+    # fuel_monitor.Pump without its widget, the state and transfer schedule are those of Pump
+    state = Pump.state
+    start = Pump.start
+    stop = Pump.stop
+    transfer = Pump.transfer
+    _Pump__transfer = Pump._Pump__transfer
+    click_callback = Pump.click_callback
+
+    def __init__(self, name, tank1, tank2, flow_rate=100, event_rate=10):
+        super(HeadlessPump, self).__init__()
+        self._Pump__state = 1 # off
+        self.tank1, self.tank2 = tank1, tank2
+        self.flow_rate, self.event_rate = flow_rate, event_rate
+        self.register(name)
+
+class Log:
+
+    def __init__(self):
+        self.events = []
+
+    def log(self, e):
+        self.events.append(e)
+
+    def close(self):
+        pass
+
+def click(schedular, at):
+    schedular.schedule(Event('agent', 'Pump:AB', label='click'), sleep=at)
+
+def test_pump_toggled_within_tick():
+    log = Log()
+    with Session(log) as session:
+        schedular = event.event_schedular('virtual')
+        a, b = Tank('FuelTank:A', 500), Tank('FuelTank:B', 0)
+        pump = HeadlessPump('Pump:AB', a, b)
+        click(schedular, 10)  # on
+        click(schedular, 250) # off and on again at the same time
+        click(schedular, 250)
+        schedular.run(until=1000)
+        assert [handle.key for handle in schedular.live()] == ['Pump:AB.transfer']
+        click(schedular, 10)  # off
+        schedular.run(until=2000)
+        assert schedular.live() == []
+        session.close()
+    # started at 10 (transfers at 110, 210) and again at 250 (transfers at 350 ... 950), 10 each
+    transfers = [e.monotonic for e in log.events if e.dst == 'FuelTank:B' and e.data.get('label', None) == 'transfer']
+    assert len(transfers) == 9
+    assert all(t2 - t1 >= 100 * 10 ** 6 for t1, t2 in zip(transfers, transfers[1:])) # one per period
+    assert (a.fuel, b.fuel) == (410, 90)
+
+def test_keyed():
+    with Session(NullLogger()):
+        schedular = event.event_schedular('virtual')
+        h1 = schedular.schedule(Event('agent', 'Global', label='tick'), sleep=100, key='tick')
+        h2 = schedular.schedule(Event('agent', 'Global', label='tick'), sleep=200, key='tick')
+        assert h1 is h2 and schedular.live() == [h1]
+        schedular.run(until=150)
+        assert not h1.alive and schedular.live() == []
+        h3 = schedular.schedule(Event('agent', 'Global', label='tick'), sleep=100, key='tick') # no longer live
+        assert h3 is not h1 and h3.alive
+
+class Counter(EventCallback):
+
+    def __init__(self, schedular):
+        super(Counter, self).__init__()
+        self.schedular = schedular
+        self.times = []
+        self.register('Counter')
+
+    @handles('tick')
+    def tick_callback(self, event):
+        self.times.append(self.schedular.elapsed)
+
+def test_cancel():
+    with Session(NullLogger()):
+        schedular = event.event_schedular('virtual')
+        counter = Counter(schedular)
+        handle = schedular.schedule(Event('agent', 'Counter', label='tick'), sleep=100, key='tick')
+        periodic = schedular.schedule((Event('agent', 'Counter', label='tick') for _ in range(10)), sleep=[50] * 10)
+        schedular.run(until=20)
+        handle.cancel()
+        handle.cancel() # no effect
+        schedular.run(until=120)
+        periodic.cancel()
+        schedular.run(until=1000)
+        assert counter.times == [50, 100]
+        assert not handle.alive and not periodic.alive and schedular.live() == []
+        try:
+            handle.reschedule(100)
+        except ValueError:
+            pass
+        else:
+            assert False, "a cancelled handle was rescheduled"
+
+def test_reschedule():
+    with Session(NullLogger()):
+        schedular = event.event_schedular('virtual')
+        counter = Counter(schedular)
+        handle = schedular.schedule(Event('agent', 'Counter', label='tick'), sleep=100)
+        periodic = schedular.schedule((Event('agent', 'Counter', label='tick') for _ in range(3)), sleep=[500] * 3)
+        schedular.run(until=50)
+        handle.reschedule(200) # from now
+        periodic.reschedule(300) # deadlines from now
+        schedular.run(until=2000)
+        assert counter.times == [250, 350, 650, 950]
+        assert schedular.live() == []
+
+class Recorder(EventCallback):
+
+    def __init__(self, delay=0):
+        super(Recorder, self).__init__()
+        self.delay = delay # seconds spent handling each event
+        self.received = []
+        self.register('Recorder')
+
+    def sink(self, event):
+        self.received.append(event.data.i)
+        if self.delay:
+            sleep(self.delay)
+
+def test_priority_lanes():
+    with Session(NullLogger()):
+        schedular = event.event_schedular('virtual')
+        recorder = Recorder()
+        labels = ['gaze', 'burn', 'click', 'gaze', 'key', 'change', 'place', 'click']
+        for i, label in enumerate(labels):
+            schedular.push(Event('agent', 'Recorder', label=label, i=i))
+        schedular.push(Event('agent', 'Recorder', label='gaze', i=len(labels)), priority=event.PRIORITY_INPUT)
+        assert schedular.pending() == (4, 2, 3)
+        schedular.run(until=0)
+        # input first, then state, then telemetry, in the order they were pushed
+        assert recorder.received == [2, 4, 7, 8, 1, 5, 0, 3, 6]
+        assert schedular.pending() == (0, 0, 0)
+
+def test_frame_budget():
+    with Session(NullLogger()):
+        schedular = event.event_schedular('virtual')
+        schedular.frame_budget = 1 # ms
+        recorder = Recorder(delay=0.002)
+        for i in range(5):
+            schedular.push(Event('agent', 'Recorder', label='gaze', i=i))
+        seen = []
+        schedular.after(0, lambda: seen.append(list(recorder.received))) # e.g. a redraw
+        schedular.run(until=0)
+        assert seen == [[0]] # the drain yielded after one event, it was out of budget
+        assert recorder.received == list(range(5))
+
+class QueueSchedular(event.Schedular):
+    # callbacks are run by the thread that calls run (e.g. the tk thread), after may be called from any thread
+
+    def __init__(self):
+        super(QueueSchedular, self).__init__()
+        self.callbacks = deque()
+
+    def after(self, sleep, fun, *args):
+        self.callbacks.append((fun, args))
+
+    def run(self, done, timeout=10):
+        end = monotonic() + timeout
+        while not done() and monotonic() < end:
+            try:
+                fun, args = self.callbacks.popleft()
+            except IndexError:
+                sleep(0)
+                continue
+            self._call(fun, *args)
+
+def slow_any(iterable):
+    # widens the gap between the drain finding the lanes empty and the drain finishing
+    result = any(iterable)
+    sleep(0.0005)
+    return result
+
+def test_push_from_thread(monkeypatch):
+    n = 200
+    monkeypatch.setattr(event, 'any', slow_any, raising=False)
+    with Session(NullLogger()) as session:
+        schedular = session.schedular = QueueSchedular()
+        recorder = Recorder()
+        def producer():
+            # each event is pushed once the one before it has been triggered, while the drain is finishing
+            for i in range(n):
+                schedular.push(Event('EyeTracker', 'Recorder', label='gaze', i=i))
+                end = monotonic() + 1
+                while len(recorder.received) <= i:
+                    if monotonic() > end:
+                        return # stuck in its lane
+                    sleep(0)
+        thread = Thread(target=producer)
+        thread.start()
+        schedular.run(lambda: not thread.is_alive(), timeout=30)
+        thread.join()
+        assert recorder.received == list(range(n)) # no event was left in a lane without a drain
+        assert schedular.pending() == (0, 0, 0)
+
+if __name__ == '__main__':
+    test_pump_toggled_within_tick()
+    test_keyed()
+    test_cancel()
+    test_reschedule()
+    test_priority_lanes()
+    test_frame_budget()
+    class MonkeyPatch:
+        def setattr(self, obj, name, value, raising=True):
+            setattr(obj, name, value)
+    test_push_from_thread(MonkeyPatch())
+    print("OK")
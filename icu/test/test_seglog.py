@@ -0,0 +1,84 @@
+"""
+    Segmented, compressed event logs (see icu.seglog): the records read back are those that were logged, range reads
+    through the index, and events stamped by another clock (an eye tracker) do not affect chunks or the index.
+"""
+import os
+import gzip
+import tempfile
+
+from icu.event import Event
+from icu.seglog import SegmentedEventLogger, SegmentedEventLog, CODECS
+from icu.binlog import parse_line
+
+START = 1600000000.
+TRACKER = 12. # the eye tracker clock (see eyetracking.EyeTracker)
+SECOND = 10 ** 9
+
+def session(logger, seconds=60, tracker=False):
+    # 20 Hz of task events over `seconds`, with gaze events stamped by the eye tracker clock
+    logged = [Event('Global', 'Global', timestamp=START, monotonic=0, label='session')]
+    for i in range(seconds * 20):
+        m = i * SECOND // 20
+        logged.append(Event('FuelTank:A', 'FuelTank:A', timestamp=START + m / SECOND, monotonic=m, label='burn', value=-0.5))
+        if tracker:
+            logged.append(Event('EyeTracker', 'Overlay:0', timestamp=TRACKER + i / 20, monotonic=m, label='gaze', x=512, y=384))
+    for e in logged:
+        logger.log(e)
+    logger.close()
+    return logged
+
+def record(e):
+    return (e.name, e.timestamp, e.monotonic, e.src, e.dst, dict(e.data))
+
+def in_range(logged, start, end):
+    return [record(e) for e in logged if start <= START + e.monotonic / SECOND < end]
+
+def test_round_trip():
+    for codec in CODECS:
+        path = os.path.join(tempfile.mkdtemp(), 'event_log')
+        logged = session(SegmentedEventLogger(path, codec=codec, chunk_bytes=1 << 12, segment_bytes=1 << 12))
+        log = SegmentedEventLog(path)
+        assert len(log) == len(logged)
+        assert len(log.chunks) > 1 and len(set(chunk['segment'] for chunk in log.chunks)) > 1
+        assert list(log.records()) == [record(e) for e in logged]
+        assert (log.start, log.end) == (START, START + (len(logged) - 2) / 20)
+
+def test_segment_readable():
+    # a segment is a series of complete gzip members (zcat)
+    path = os.path.join(tempfile.mkdtemp(), 'event_log')
+    logged = session(SegmentedEventLogger(path, chunk_bytes=1 << 12, segment_bytes=None))
+    log = SegmentedEventLog(path)
+    segment, = set(chunk['segment'] for chunk in log.chunks)
+    with gzip.open(os.path.join(os.path.dirname(path), segment), 'rt') as f:
+        assert [parse_line(line) for line in f] == [record(e) for e in logged]
+
+def test_range():
+    path = os.path.join(tempfile.mkdtemp(), 'event_log')
+    logged = session(SegmentedEventLogger(path, chunk_seconds=5), seconds=120)
+    log = SegmentedEventLog(path)
+    assert len(log.chunks) == 24
+    for start, end in ((START + 30, START + 31), (START + 12.5, START + 47.25), (None, START + 3), (START + 119, None)):
+        chunks = log.find(start, end)
+        assert len(chunks) < len(log.chunks)
+        expected = in_range(logged, START if start is None else start, START + 1000 if end is None else end)
+        assert expected and list(log.records(start, end)) == expected
+    assert list(log.records(START + 200, START + 300)) == []
+
+def test_mixed_clocks():
+    # gaze events are stamped by the eye tracker clock, chunks and the index follow the session clock
+    path = os.path.join(tempfile.mkdtemp(), 'event_log')
+    logged = session(SegmentedEventLogger(path, chunk_seconds=10), seconds=60, tracker=True)
+    log = SegmentedEventLog(path)
+    assert len(log) == len(logged)
+    assert len(log.chunks) == 6
+    assert log.start == START
+    minute = list(log.records(START + 30, START + 40))
+    assert minute == in_range(logged, START + 30, START + 40)
+    assert sum(src == 'EyeTracker' for _, _, _, src, _, _ in minute) == 200
+
+if __name__ == '__main__':
+    test_round_trip()
+    test_segment_readable()
+    test_range()
+    test_mixed_clocks()
+    print("OK")
@@ -0,0 +1,74 @@
+"""
+    Sessions (see event.Session): independent registries and event buses, the current session is restored when a
+    session is deactivated or closed, and no log file is created unless one is given.
+"""
+import os
+import sys
+import subprocess
+import tempfile
+
+from icu import event
+from icu.event import EventCallback, Session, handles
+from icu.log import NullLogger
+
+class Counter(EventCallback):
+
+    def __init__(self, name):
+        super(Counter, self).__init__()
+        self.count = 0
+        self.register(name)
+
+    @handles('tick')
+    def tick_callback(self, event):
+        self.count += 1
+
+def test_registries():
+    s1, s2 = Session(), Session()
+    assert s1.registry('Highlight') is s1.registry('Highlight')
+    assert s1.registry('Highlight') is not s2.registry('Highlight')
+    s1.registry('Highlight')['Highlight:Pump:AB'] = 1
+    assert 'Highlight:Pump:AB' not in s2.registry('Highlight')
+
+def test_isolated():
+    counters = []
+    for _ in range(2):
+        with Session(NullLogger()) as session:
+            schedular = event.event_schedular('virtual')
+            counters.append((schedular, Counter('Counter')))
+    (v1, c1), (v2, c2) = counters
+    v1.schedule(event.Event('agent', 'Counter', label='tick'), sleep=10)
+    v2.schedule(event.Event('agent', 'Counter', label='tick'), sleep=20)
+    v2.schedule(event.Event('agent', 'Counter', label='tick'), sleep=30)
+    v1.run(until=100)
+    v2.run(until=100)
+    assert (c1.count, c2.count) == (1, 2)
+
+def test_restore():
+    current = event.session()
+    s1, s2 = Session(), Session()
+    s1.activate()
+    with s2:
+        assert event.session() is s2
+    assert event.session() is s1
+    s1.deactivate()
+    assert event.session() is current
+
+    s1.activate()
+    s2.activate()
+    s2.close()
+    assert event.session() is s1
+    s1.close()
+    assert event.session() is current
+
+def test_no_log_at_import():
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        subprocess.check_call([sys.executable, '-c', 'import icu.event; icu.event.Session().close()'], cwd=directory, env=env)
+        assert os.listdir(directory) == []
+
+if __name__ == '__main__':
+    test_registries()
+    test_isolated()
+    test_restore()
+    test_no_log_at_import()
+    print("OK")
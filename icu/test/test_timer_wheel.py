@@ -0,0 +1,47 @@
+"""
+    Timing of the timer wheel schedular (see event.TKWheelSchedular), timers must never fire before their delay has
+    passed, including timers added between two ticks of the wheel. Runs without a display (tkinter.Tcl).
+"""
+import tkinter
+
+from time import monotonic
+
+from icu.event import TimerWheel, TKWheelSchedular
+
+DELAYS = [1, 5, 10, 20, 35, 50]
+
+def test_add_between_ticks():
+    wheel = TimerWheel(resolution=10)
+    wheel.advance(3)
+    wheel.add(20, print, now=38) # 8 ms after tick 3, due at 58 ms
+    assert not wheel.advance(5)
+    assert len(wheel.advance(6)) == 1
+
+def test_never_early():
+    root = tkinter.Tcl()
+    schedular = TKWheelSchedular(root, resolution=10)
+    fired = [] # (delay, elapsed)
+
+    def timer(delay, start):
+        fired.append((delay, (monotonic() - start) * 1000))
+
+    def add(i):
+        # add timers at odd times between the ticks of the wheel
+        for delay in DELAYS:
+            schedular.after(delay, timer, delay, monotonic())
+        if i < 20:
+            root.after(7, add, i + 1)
+
+    add(0)
+    end = monotonic() + 2
+    while len(fired) < 21 * len(DELAYS) and monotonic() < end:
+        root.tk.dooneevent()
+    schedular.close()
+    assert len(fired) == 21 * len(DELAYS)
+    early = [(delay, elapsed) for delay, elapsed in fired if elapsed < delay]
+    assert not early, early
+
+if __name__ == '__main__':
+    test_add_between_ticks()
+    test_never_early()
+    print("OK")
@@ -0,0 +1,133 @@
+"""
+    The shared memory RingBuffer transport (see icu.transport): variable length records, wrapping at the end of
+    the buffer, full/empty, a child process as producer, and errors of oversized payloads staying in the sink.
+"""
+from multiprocessing import Process
+from queue import Empty, Full
+
+from icu.event import Event, ExternalEventSink, encode, decode
+from icu.transport import RingBuffer
+
+def test_variable_length():
+    ring = RingBuffer(capacity=8, record_size=64)
+    payloads = [bytes([i]) * n for i, n in enumerate([0, 1, 3, 60, 100, 200])] # larger than a record
+    for payload in payloads:
+        ring.put(payload)
+    assert ring.qsize() == len(payloads)
+    assert [ring.get() for _ in payloads] == payloads
+    assert ring.empty()
+    ring.close()
+
+def test_wrap():
+    ring = RingBuffer(capacity=4, record_size=64) # 256 bytes
+    for i in range(100):
+        payload = bytes([i % 256]) * (i % 70)
+        ring.put(payload)
+        ring.put(payload[:5])
+        assert ring.get() == payload
+        assert ring.get() == payload[:5]
+    ring.close()
+
+def test_full_and_empty():
+    ring = RingBuffer(capacity=2, record_size=64)
+    try:
+        ring.get(timeout=0.01)
+    except Empty:
+        pass
+    else:
+        assert False, "empty"
+    ring.put(b'a')
+    ring.put(b'b')
+    assert ring.full()
+    try:
+        ring.put(b'c', block=False)
+    except Full:
+        pass
+    else:
+        assert False, "full (records)"
+    ring.get()
+    ring.get()
+    ring.put(b'x' * 100) # space for at most 128 bytes
+    try:
+        ring.put(b'y' * 100, block=False)
+    except Full:
+        pass
+    else:
+        assert False, "full (bytes)"
+    ring.close()
+
+def test_too_large():
+    ring = RingBuffer(capacity=2, record_size=64)
+    try:
+        ring.put(b'x' * 200)
+    except ValueError:
+        pass
+    else:
+        assert False, "too large"
+    ring.close()
+
+def produce(ring, n):
+    for i in range(n):
+        ring.put(encode(Event('agent', 'Pump:AB', label='click', i=i, padding='x' * (i % 1000))))
+
+def test_process():
+    ring = RingBuffer(capacity=64, record_size=256)
+    p = Process(target=produce, args=(ring, 2000))
+    p.start()
+    for i in range(2000):
+        event = decode(ring.get(timeout=10))
+        assert event.data.i == i and len(event.data.padding) == i % 1000
+    p.join()
+    ring.close()
+
+def test_oversized_event_in_sink():
+    sink = ExternalEventSink(transport='ring', overflow='drop-newest')
+    event = Event('A', 'B', label='delta', changes='x' * sink._ExternalEventSink__buffer.size)
+    sink._put(encode(event), event) # does not raise
+    assert sink.stats()['dropped'] == 1
+    small = Event('A', 'B', label='click')
+    sink._put(encode(small), small)
+    assert sink.get().name == small.name
+    sink.close()
+
+def test_ring_sink_default_policy():
+    sink = ExternalEventSink(transport='ring')
+    assert sink.overflow == 'drop-newest'
+    assert sink.capacity == sink._ExternalEventSink__buffer.capacity
+    sink.close()
+
+def test_ring_sink_full():
+    # the receiver is not reading, ICU must not wait for it
+    sink = ExternalEventSink(transport='ring', capacity=4)
+    events = [Event('A', 'B', label='click', i=i) for i in range(10)]
+    for event in events:
+        sink._put(encode(event), event)
+    stats = sink.stats()
+    assert (stats['sent'], stats['dropped']) == (4, 6)
+    assert [e.data.i for e in sink.drain()] == [0, 1, 2, 3]
+    sink.close()
+
+def test_ring_sink_full_bytes():
+    # the ring runs out of bytes before it runs out of records, the overflow policy applies
+    sink = ExternalEventSink(transport=RingBuffer(capacity=100, record_size=64), overflow='coalesce')
+    events = [Event('A', 'B', label='change', attr='x', value='x' * 500, i=i) for i in range(100)]
+    for event in events:
+        sink._put(encode(event), event)
+    stats = sink.stats()
+    assert stats['sent'] < 100 and stats['pending'] == 1
+    assert len(sink.drain()) == stats['sent']
+    sink._flush()
+    assert sink.drain()[-1].data.i == 99 # the latest change
+    sink.close()
+
+if __name__ == '__main__':
+    test_variable_length()
+    test_wrap()
+    test_full_and_empty()
+    test_too_large()
+    test_process()
+    test_oversized_event_in_sink()
+    test_ring_sink_default_policy()
+    test_ring_sink_full()
+    test_ring_sink_full_bytes()
+    print("OK")
@@ -0,0 +1,53 @@
+"""
+    A 60 minute session simulated in virtual time (icu.run(schedular='virtual')), the session ends at the configured
+    shutdown time. The widgets are still built on a tk root, the test is skipped without a display (run it with
+    xvfb-run on a server).
+"""
+import icu
+import os
+import json
+import time
+import tempfile
+
+import pytest
+
+from icu import event
+from icu.binlog import parse_line
+
+DURATION = 60 * 60 * 1000
+
+def display():
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+    except Exception: # no tkinter or no display
+        return False
+    return True
+
+def simulate(directory):
+    path = os.path.join(directory, 'config.json')
+    with open(path, 'w') as f:
+        json.dump(dict(shutdown=DURATION, input=dict(eyetracker=dict(enabled=False))), f)
+    session = event.Session(log=os.path.join(directory, 'event_log.txt'))
+    icu.run(config=path, schedular='virtual', session=session)
+    return session
+
+def test_virtual_session():
+    if not display():
+        pytest.skip("requires a display")
+    directory = tempfile.mkdtemp()
+    session = simulate(directory)
+    assert session.bus.is_closed
+    with open(os.path.join(directory, 'event_log.txt')) as f:
+        records = [record for record in map(parse_line, f) if record is not None]
+    anchor, = [(timestamp, monotonic) for _, timestamp, monotonic, src, _, data in records if data.get('label', None) == 'session']
+    shutdown, = [monotonic for _, _, monotonic, _, _, data in records if data.get('command', None) == 'shutdown']
+    assert DURATION <= (shutdown - anchor[1]) / 10 ** 6 < DURATION + 1000 # in virtual time
+    tanks = session.registry('FuelTank')
+    assert tanks and any(tank.fuel != tank.capacity for tank in tanks.values())
+
+if __name__ == '__main__':
+    start = time.time()
+    session = simulate(tempfile.mkdtemp())
+    print("SIMULATED {0} minutes in {1:.2f} seconds".format(DURATION // 60000, time.time() - start))
+    print("FUEL: ", {k:v.fuel for k,v in session.registry('FuelTank').items()})
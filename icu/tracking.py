@@ -6,7 +6,7 @@ from .constants import WARNING_OUTLINE_COLOUR, WARNING_OUTLINE_WIDTH
 from .constants import EVENT_LABEL_MOVE, EVENT_LABEL_KEY
 
 
-from .event import Event, EventCallback
+from .event import Event, EventCallback, handles, session
 from .component import Component
 
 from .component import Component, CanvasWidget, SimpleComponent, BoxComponent, LineComponent, BaseComponent
@@ -23,10 +23,8 @@ class Target(CanvasWidget):
 
 class Tracking(EventCallback, Component, CanvasWidget):
 
-    __instance__ = None
-
-    def all_components():
-        return [Tracking.__instance__.name]
+    def all_components(): # names, of the current session
+        return list(session().registry('Tracking', list))
 
     def __init__(self, canvas, config, size, **kwargs):
         super(Tracking, self).__init__(canvas, width=size, height=size, background_colour=BACKGROUND_COLOUR, **kwargs)
@@ -104,8 +102,9 @@ class Tracking(EventCallback, Component, CanvasWidget):
         highlight = config['overlay']
         self.highlight = Highlight(canvas, self, **highlight)
         
-        assert Tracking.__instance__ is None #there can only be one tracking widget
-        Tracking.__instance__ = self
+        instances = self.session.registry('Tracking', list)
+        assert not instances #there can only be one tracking widget in a session
+        instances.append(self.name)
         
         if config[name].get('invert', True):
             self.invert = (-1,-1)
@@ -119,29 +118,29 @@ class Tracking(EventCallback, Component, CanvasWidget):
         self.bind("<Down>")
 
 
-    def sink(self, event):
-        #print(event)
-        x, y = self.components['target'].position
-        w, h = self.components['target'].size
-        rx, ry = self.position
+    @handles(EVENT_LABEL_KEY)
+    def key_callback(self, event):
         rw, rh = self.components['background'].size #TODO fix the aspect ratio code - e.g. use content_size?
-
         sx, sy = rw / 200, rh / 200 #the default speed (relative to he size of the widget)
 
-        if event.data.label == EVENT_LABEL_KEY:
-            dx, dy = 0, 0
-            key = event.data.key
-            #for key in event.data.key:
-            dx += self.key_events[key][0]
-            dy += self.key_events[key][1]
-            dx, dy = sx * dx * self.invert[0], sy * dy * self.invert[1]
+        dx, dy = 0, 0
+        key = event.data.key
+        #for key in event.data.key:
+        dx += self.key_events[key][0]
+        dy += self.key_events[key][1]
+        self.move_target(sx * dx * self.invert[0], sy * dy * self.invert[1])
 
-        else:
-            #TODO speed here?
-            dx = event.data.dx * self.invert[0]
-            dy = event.data.dy * self.invert[1]
+    @handles(EVENT_LABEL_MOVE)
+    def move_callback(self, event):
+        #TODO speed here?
+        self.move_target(event.data.dx * self.invert[0], event.data.dy * self.invert[1])
+
+    def move_target(self, dx, dy):
+        x, y = self.components['target'].position
+        w, h = self.components['target'].size
+        rx, ry = self.position
+        rw, rh = self.components['background'].size
 
-        
         nx, ny = x + dx, y + dy
         #clip bounds
         nx = max(rx, min(rx + rw - w, nx))
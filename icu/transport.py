@@ -0,0 +1,268 @@
+"""
+    Transports for external event sources and sinks. A transport carries encoded events (bytes, see event.encode)
+    between processes and has the same interface as multiprocessing.Queue (the default transport).
+"""
+
+import os
+import struct
+
+from queue import Empty, Full
+from multiprocessing import Queue, reduction
+from time import sleep, monotonic
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError: # python < 3.8
+    shared_memory = None
+
+RING_CAPACITY = 4096    # records
+RING_RECORD_SIZE = 512  # average bytes per record (the buffer has capacity * record_size bytes)
+
+_LENGTH = struct.Struct("I")
+_WRAP = 0xFFFFFFFF # length of the padding at the end of the buffer, the next record starts at the beginning
+_HEAD = 0   # read offset (written only by the consumer), in 8 byte words
+_GOT = 1    # records read (written only by the consumer)
+_TAIL = 8   # write offset (written only by the producer), on its own cache line
+_PUT = 9    # records written (written only by the producer)
+_HEADER = 128
+
+def _align(size):
+    return (size + 3) & ~3
+
+class RingBuffer:
+    """
+        A lock-free single-producer/single-consumer ring buffer of variable length records in shared memory
+        (see multiprocessing.shared_memory). A drop-in replacement for multiprocessing.Queue when there is
+        exactly one producer (thread) and one consumer (thread), each payload is copied once into shared
+        memory, there is no pickling, pipe or feeder thread.
+
+        The buffer holds at most `capacity` records in capacity * record_size bytes, a record is a 4 byte 
+        length followed by its payload. A payload may be larger than record_size, as long as it fits in the buffer.
+
+        The buffer can be passed to a child process (fork or spawn), it is unlinked when closed (or garbage 
+        collected) in the process that created it.
+    """
+
+    def __init__(self, capacity=RING_CAPACITY, record_size=RING_RECORD_SIZE):
+        super(RingBuffer, self).__init__()
+        if shared_memory is None:
+            raise NotImplementedError("RingBuffer requires multiprocessing.shared_memory (python 3.8+)")
+        self.capacity = capacity
+        self.record_size = record_size
+        self.size = _align(capacity * record_size) # bytes
+        self.__owner = os.getpid()
+        self.__shm = shared_memory.SharedMemory(create=True, size=_HEADER + self.size)
+        self.__attach()
+        for i in (_HEAD, _GOT, _TAIL, _PUT):
+            self.__index[i] = 0
+
+    def __getstate__(self):
+        return dict(name=self.__shm.name, capacity=self.capacity, record_size=self.record_size, owner=self.__owner)
+
+    def __setstate__(self, state):
+        self.capacity = state['capacity']
+        self.record_size = state['record_size']
+        self.size = _align(self.capacity * self.record_size)
+        self.__owner = state['owner']
+        self.__shm = shared_memory.SharedMemory(name=state['name'])
+        # the owner is responsible for unlinking, otherwise the resource tracker of this process would unlink it at exit
+        resource_tracker.unregister(self.__shm._name, 'shared_memory')
+        self.__attach()
+
+    def __attach(self):
+        self.__buf = self.__shm.buf
+        # indices are read/written as single words, struct.pack_into clears the bytes before writing them
+        self.__index = self.__buf[:_HEADER].cast('Q')
+
+    @property
+    def name(self):
+        return self.__shm.name
+
+    def qsize(self):
+        return self.__index[_PUT] - self.__index[_GOT]
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def full(self):
+        return self.qsize() >= self.capacity
+
+    def put(self, payload, block=True, timeout=None):
+        """ Write a payload to the buffer.
+
+        Args:
+            payload (bytes): payload, at most capacity * record_size - 4 bytes.
+            block (bool, optional): wait for space if the buffer is full. Defaults to True.
+            timeout (float, optional): maximum time (seconds) to wait for space. Defaults to None (no limit).
+
+        Raises:
+            ValueError: if the payload does not fit in the buffer.
+            queue.Full: if there was no space.
+        """
+        size = len(payload)
+        length = _LENGTH.size + _align(size)
+        if length > self.size:
+            raise ValueError("Payload of {0} bytes does not fit in a ring buffer of {1} bytes.".format(size, self.size))
+        buf, index = self.__buf, self.__index
+        tail, put = index[_TAIL], index[_PUT]
+        offset = tail % self.size
+        skip = self.size - offset if self.size - offset < length else 0 # the record does not fit before the end
+        end = tail + skip + length
+        if end - index[_HEAD] > self.size or put - index[_GOT] >= self.capacity:
+            self.__wait(lambda: end - index[_HEAD] <= self.size and put - index[_GOT] < self.capacity, block, timeout, Full)
+        if skip:
+            _LENGTH.pack_into(buf, _HEADER + offset, _WRAP)
+            offset = 0
+        offset += _HEADER
+        _LENGTH.pack_into(buf, offset, size)
+        buf[offset + _LENGTH.size:offset + _LENGTH.size + size] = payload
+        index[_PUT] = put + 1
+        index[_TAIL] = end # publish the record
+
+    def put_nowait(self, payload):
+        return self.put(payload, block=False)
+
+    def get(self, block=True, timeout=None):
+        """ Read a payload from the buffer.
+
+        Args:
+            block (bool, optional): wait for a payload if the buffer is empty. Defaults to True.
+            timeout (float, optional): maximum time (seconds) to wait. Defaults to None (no limit).
+
+        Raises:
+            queue.Empty: if there was no payload.
+
+        Returns:
+            bytes: the payload.
+        """
+        buf, index = self.__buf, self.__index
+        head = index[_HEAD]
+        if index[_TAIL] == head:
+            self.__wait(lambda: index[_TAIL] != head, block, timeout, Empty)
+        offset = head % self.size
+        size = _LENGTH.unpack_from(buf, _HEADER + offset)[0]
+        if size == _WRAP:
+            head += self.size - offset
+            offset = 0
+            size = _LENGTH.unpack_from(buf, _HEADER)[0]
+        offset += _HEADER + _LENGTH.size
+        payload = bytes(buf[offset:offset + size])
+        index[_GOT] += 1
+        index[_HEAD] = head + _LENGTH.size + _align(size) # release the record
+        return payload
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def __wait(self, ready, block, timeout, error):
+        if not block:
+            raise error()
+        end = None if timeout is None else monotonic() + timeout
+        backoff = 0.
+        while not ready():
+            if end is not None and monotonic() > end:
+                raise error()
+            sleep(backoff)
+            backoff = min(0.001, backoff + 0.00001)
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        if getattr(self, '_RingBuffer__shm', None) is None:
+            return
+        self.__index.release()
+        self.__index = self.__buf = None
+        try:
+            self.__shm.close()
+        except BufferError: # a view of the buffer is still in use (e.g. by another thread), it is unmapped at exit
+            pass
+        if os.getpid() == self.__owner:
+            self.__shm.unlink()
+        self.__shm = None
+
+class Wakeup:
+    """
+        A pipe that wakes the consumer of a transport (e.g. the tk event loop, see Schedular.watch) when a payload 
+        has been put. The producer signals once for each payload after it is put, the consumer counts the signals 
+        to know how many payloads to get.
+
+        If block is False the producer never waits for the consumer, signals are dropped while the pipe is full 
+        (it is readable anyway), the consumer should then get payloads until the transport is empty rather than count.
+
+        A Wakeup can be passed to a child process (fork or spawn).
+    """
+
+    def __init__(self, block=True):
+        super(Wakeup, self).__init__()
+        self.__r, self.__w = os.pipe()
+        self.__block = block
+        os.set_blocking(self.__r, False)
+        os.set_blocking(self.__w, block)
+
+    def __getstate__(self):
+        return dict(r=reduction.DupFd(self.__r), w=reduction.DupFd(self.__w), block=self.__block)
+
+    def __setstate__(self, state):
+        self.__r = state['r'].detach()
+        self.__w = state['w'].detach()
+        self.__block = state['block']
+
+    def fileno(self):
+        """ The file descriptor that becomes readable when signalled. """
+        return self.__r
+
+    def signal(self):
+        """ Signal that a payload has been put (blocks if the consumer is more than a pipe buffer of signals behind, see block). """
+        try:
+            os.write(self.__w, b'\0')
+        except BlockingIOError:
+            pass # block=False and the pipe is full
+
+    def consume(self):
+        """ Consume all pending signals.
+
+        Returns:
+            int: the number of signals since consume was last called.
+        """
+        n = 0
+        while True:
+            try:
+                data = os.read(self.__r, 4096)
+            except BlockingIOError:
+                return n
+            n += len(data)
+            if len(data) < 4096:
+                return n
+
+    def close(self):
+        if self.__r is not None:
+            os.close(self.__r)
+            os.close(self.__w)
+            self.__r = self.__w = None
+
+def wakeup(block=True):
+    """ Create a Wakeup, None if non-blocking pipes are not supported on this platform. """
+    if not hasattr(os, 'set_blocking'):
+        return None
+    return Wakeup(block=block)
+
+TRANSPORTS = {'queue' : Queue, 'ring' : RingBuffer}
+
+def transport(transport=None, **kwargs):
+    """ Create a transport.
+
+    Args:
+        transport (str, object, optional): name of a transport (see TRANSPORTS) or a transport. Defaults to None ('queue').
+        kwargs: transport arguments (e.g. capacity, record_size of a RingBuffer).
+
+    Returns:
+        a transport (e.g. multiprocessing.Queue, RingBuffer)
+    """
+    if transport is None:
+        transport = 'queue'
+    if not isinstance(transport, str):
+        return transport
+    if transport not in TRANSPORTS:
+        raise ValueError("Invalid transport: {0}, must be one of {1}".format(transport, tuple(TRANSPORTS.keys())))
+    return TRANSPORTS[transport](**kwargs)
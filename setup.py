@@ -19,6 +19,7 @@ setuptools.setup(name='icu',
       package_data={'icu': ['*.json']},
       include_package_data=True,
       install_requires=[],
+      extras_require={'binlog': ['numpy']}, # reading binary event logs (icu.binlog)
       python_requires='>=3.6',
       classifiers=[
         "Programming Language :: Python :: 3.7",